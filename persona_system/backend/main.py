@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import json
+import hashlib
 
 # 프로젝트 루트를 경로에 추가
 project_root = Path(__file__).parent.parent
@@ -22,8 +23,10 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from loguru import logger
 import uvicorn
+from starlette.concurrency import run_in_threadpool
 
-from utils import PersonaChatbot, SearchSystem
+from utils import PersonaChatbot, SearchSystem, QueryBatcher, ShardManager, get_model_registry
+from utils.near_dedup import collapse_near_duplicates
 from config import settings
 
 
@@ -58,6 +61,21 @@ templates = Jinja2Templates(directory=str(templates_path))
 chatbot: Optional[PersonaChatbot] = None
 user_sessions: Dict[str, PersonaChatbot] = {}
 
+# 동시 /api/chat 질문을 모아 한 번에 임베딩/검색하는 배처
+query_batcher = QueryBatcher(
+    max_batch_size=settings.query_batch_size,
+    max_wait_ms=settings.query_batch_wait_ms
+)
+
+# 세션의 독자(작성자)별 인덱스 샤드 (작성자 선택 시 해당 샤드로 검색 라우팅)
+shard_manager = ShardManager(
+    root_path=settings.shard_root,
+    memory_budget_mb=settings.shard_memory_budget_mb,
+    mmap=settings.shard_mmap,
+    auto_migrate=settings.index_auto_migrate,
+    latency_budget_ms=settings.index_latency_budget_ms
+)
+
 
 # Pydantic 모델들
 class ChatMessage(BaseModel):
@@ -65,6 +83,7 @@ class ChatMessage(BaseModel):
     session_id: Optional[str] = "default"
     use_search: bool = True
     search_k: int = 5
+    search_preset: Optional[str] = None  # None이면 settings.chat_search_preset
 
 
 class PersonaAnalysisRequest(BaseModel):
@@ -88,7 +107,7 @@ class ChatResponse(BaseModel):
 
 
 def get_chatbot(session_id: str = "default") -> PersonaChatbot:
-    """세션별 챗봇 인스턴스 반환 (싱글톤 패턴)"""
+    """세션별 챗봇 인스턴스 반환 (싱글톤 패턴, 임베딩 모델은 레지스트리에서 공유)"""
     global user_sessions
     
     if session_id not in user_sessions:
@@ -98,6 +117,37 @@ def get_chatbot(session_id: str = "default") -> PersonaChatbot:
     return user_sessions[session_id]
 
 
+def get_reader(item: Dict[str, Any]) -> Optional[str]:
+    """데이터 항목의 독자(작성자) 식별자"""
+    reader = item.get('reader_id') or item.get('author') or item.get('writer') or item.get('user_name')
+    return str(reader) if reader else None
+
+
+def get_author_name(item: Dict[str, Any]) -> Optional[str]:
+    """데이터 항목의 작성자 이름 (세션 인덱스의 author 필터와 같은 필드)"""
+    author = item.get('author') or item.get('writer') or item.get('user_name')
+    return str(author) if author else None
+
+
+def is_unchanged(vector_db, item_id: str, digest: str) -> bool:
+    """같은 id가 같은 내용(content_hash)으로 이미 색인되어 있는지 여부"""
+    if item_id == f"uploaded_{digest}":
+        # 내용 해시에서 만든 id는 id가 같으면 내용도 같음
+        return vector_db.contains(item_id)
+    meta = vector_db.get_metadata(item_id)
+    if meta is None:
+        return False
+    if meta.get('id') != item_id:
+        # 근중복 대표로 합쳐진 구성원은 대표에 기록된 구성원 내용 해시와 비교
+        return meta.get('duplicate_hashes', {}).get(item_id) == digest
+    return meta.get('content_hash') == digest
+
+
+def get_tenant_id(session_id: str, reader: str) -> str:
+    """세션 안의 독자별 샤드 ID (세션끼리 데이터가 섞이지 않도록 세션 ID를 앞에 붙임)"""
+    return f"{session_id}/{reader}"
+
+
 @app.on_event("startup")
 async def startup_event():
     """서버 시작시 초기화"""
@@ -117,6 +167,13 @@ async def startup_event():
         logger.warning("⚠️ OpenAI API 키가 설정되지 않았습니다. 일부 기능이 제한됩니다.")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서버 종료시 바뀐 샤드 저장"""
+    saved = shard_manager.flush()
+    logger.info(f"💾 샤드 저장 완료: {saved}개")
+
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """메인 웹 인터페이스"""
@@ -145,11 +202,44 @@ async def chat_endpoint(chat_request: ChatMessage):
     try:
         session_chatbot = get_chatbot(chat_request.session_id)
         
-        # 프로젝트 추천 생성
-        result = session_chatbot.generate_project_recommendations(
+        # 의미적 검색 (동시 요청과 함께 배치 처리)
+        search_results = []
+        search_preset = chat_request.search_preset or settings.chat_search_preset
+        selected_author = getattr(session_chatbot, 'selected_author', None) or {}
+        if chat_request.use_search and selected_author.get('tenant_id'):
+            # 작성자를 선택한 세션은 해당 독자 샤드로 라우팅
+            search_results = await run_in_threadpool(
+                session_chatbot.search_system.shard_search,
+                shard_manager,
+                chat_request.message,
+                [selected_author['tenant_id']],
+                k=chat_request.search_k,
+                search_params=search_preset
+            )
+        elif chat_request.use_search and selected_author.get('filters'):
+            # 독자 샤드가 없는 작성자는 세션 인덱스를 작성자 필터로 검색
+            search_results = await run_in_threadpool(
+                session_chatbot.search_system.semantic_search,
+                chat_request.message,
+                k=chat_request.search_k,
+                search_params=search_preset,
+                filters=selected_author['filters']
+            )
+        elif chat_request.use_search:
+            search_results = await query_batcher.semantic_search(
+                session_chatbot.search_system,
+                chat_request.message,
+                k=chat_request.search_k,
+                search_params=search_preset
+            )
+        
+        # 프로젝트 추천 생성 (OpenAI 호출이 이벤트 루프를 막지 않도록 스레드 풀에서 실행)
+        result = await run_in_threadpool(
+            session_chatbot.generate_project_recommendations,
             user_question=chat_request.message,
             search_k=chat_request.search_k,
-            use_conversation_history=True
+            use_conversation_history=True,
+            search_results=search_results
         )
         
         if result['success']:
@@ -223,19 +313,55 @@ async def upload_user_data(
         session_chatbot = get_chatbot(session_id)
         search_system = session_chatbot.search_system
         
-        # 텍스트 추출
+        # 텍스트 추출 (id가 없는 항목은 내용 해시로 안정적인 id 부여)
         texts = []
         metadata = []
-        for i, item in enumerate(user_data):
+        seen_ids = set()
+        skipped_count = 0
+        for item in user_data:
             content = item.get('content', '')
             if content:
-                texts.append(content)
-                metadata.append({
-                    'id': f'uploaded_{i}',
+                digest = hashlib.sha1(content.encode('utf-8')).hexdigest()[:16]
+                meta = {
+                    'id': f"uploaded_{digest}",
                     'type': item.get('type', 'user_data'),
                     'date': item.get('date', datetime.now().isoformat()),
-                    **item
-                })
+                    **item,
+                    'content_hash': digest
+                }
+                meta['id'] = str(meta['id'])
+                
+                # 내용 해시 id는 이미 색인되어 있으면 같은 내용이므로 건너뛰고, 호출자가 준 id는
+                # 내용이 바뀐 경우에만 upsert로 갱신 (같은 id로 수정본을 다시 올리는 경우)
+                if meta['id'] in seen_ids or is_unchanged(search_system.vector_db, meta['id'], digest):
+                    skipped_count += 1
+                    continue
+                seen_ids.add(meta['id'])
+                texts.append(content)
+                metadata.append(meta)
+        
+        # 근중복 문서는 독자별로 대표 하나만 임베딩/색인 (구성원 id와 내용 해시는 대표 메타데이터에 기록)
+        # - 다른 독자의 글과 합치면 구성원이 자기 독자 샤드에 들어가지 못하므로 독자 단위로 묶음
+        groups: Dict[Optional[str], List[int]] = {}
+        for i, meta in enumerate(metadata):
+            groups.setdefault(get_reader(meta), []).append(i)
+        
+        content_hashes = {meta['id']: meta['content_hash'] for meta in metadata}
+        dedup_stats = {'total_count': len(texts), 'unique_count': 0, 'removed_count': 0}
+        deduped_texts, deduped_metadata = [], []
+        for rows in groups.values():
+            deduped = collapse_near_duplicates([texts[i] for i in rows], [metadata[i] for i in rows])
+            for meta in deduped['metadata']:
+                if meta.get('duplicate_ids'):
+                    meta['duplicate_hashes'] = {member_id: content_hashes[member_id]
+                                                for member_id in meta['duplicate_ids']}
+            deduped_texts.extend(deduped['texts'])
+            deduped_metadata.extend(deduped['metadata'])
+            dedup_stats['unique_count'] += deduped['stats']['unique_count']
+            dedup_stats['removed_count'] += deduped['stats']['removed_count']
+            dedup_stats['threshold'] = deduped['stats']['threshold']
+        dedup_stats['removed_ratio'] = dedup_stats['removed_count'] / len(texts) if texts else 0.0
+        texts, metadata = deduped_texts, deduped_metadata
         
         if texts:
             # 임베딩 생성 및 인덱스에 추가
@@ -245,19 +371,41 @@ async def upload_user_data(
             else:
                 embeddings = embedding_result
             
-            # 기존 인덱스가 없다면 새로 생성
+            # 기존 인덱스가 없다면 새로 생성 (Flat으로 시작해 커지면 백그라운드에서 더 알맞은 타입으로 재구축)
             if search_system.vector_db.index is None:
                 search_system.vector_db.create_index(embeddings.shape[1], index_type="Flat")
+                search_system.vector_db.auto_migrate = settings.index_auto_migrate
+                search_system.vector_db.latency_budget_ms = settings.index_latency_budget_ms
             
-            search_system.vector_db.add_vectors(embeddings, metadata)
+            upserted = search_system.vector_db.upsert_vectors(embeddings, metadata)
             
-            logger.info(f"📁 사용자 데이터 업로드 완료: {len(texts)}개 문서, 세션 {session_id}")
+            # 독자별 샤드에도 색인 (작성자 선택 시 재구축 없이 바로 검색)
+            by_reader: Dict[str, List[int]] = {}
+            for i, meta in enumerate(metadata):
+                reader = get_reader(meta)
+                if reader:
+                    by_reader.setdefault(reader, []).append(i)
+            for reader, rows in by_reader.items():
+                await run_in_threadpool(
+                    shard_manager.upsert_vectors,
+                    get_tenant_id(session_id, reader),
+                    embeddings[rows],
+                    [metadata[i] for i in rows]
+                )
+            
+            logger.info(f"📁 사용자 데이터 업로드 완료: {len(texts)}개 문서 (갱신 {upserted['updated']}개), "
+                        f"독자 샤드 {len(by_reader)}개, 세션 {session_id}")
+        else:
+            upserted = {'inserted': 0, 'updated': 0}
         
         return {
             "success": True,
             "message": f"{len(texts)}개 문서가 성공적으로 업로드되었습니다.",
             "session_id": session_id,
-            "document_count": len(texts)
+            "document_count": len(texts),
+            "updated_count": upserted['updated'],
+            "skipped_existing": skipped_count,
+            "dedup": dedup_stats
         }
         
     except json.JSONDecodeError:
@@ -357,6 +505,9 @@ async def get_system_stats():
                 for chatbot in user_sessions.values()
             ),
             "system_status": chatbot.get_system_status() if chatbot else {},
+            "model_registry": get_model_registry().get_stats(),
+            "query_batcher": query_batcher.get_stats(),
+            "shards": shard_manager.get_stats(),
             "timestamp": datetime.now().isoformat()
         }
         
@@ -371,23 +522,26 @@ async def get_system_stats():
 async def get_session_authors(session_id: str):
     """세션의 작성자 목록 조회"""
     try:
-        if session_id not in user_sessions:
+        # 독자 샤드가 있는 작성자 (디스크에 내려간 샤드 포함)
+        prefix = get_tenant_id(session_id, "")
+        shard_authors = {tenant_id[len(prefix):] for tenant_id in shard_manager.tenants(prefix=prefix)}
+        
+        if session_id not in user_sessions and not shard_authors:
             return {
                 "success": True,
                 "authors": [],
                 "message": "세션에 데이터가 없습니다."
             }
         
-        session_chatbot = user_sessions[session_id]
-        search_system = session_chatbot.search_system
-        
         # 메타데이터에서 작성자 정보 추출
-        authors = set()
-        if hasattr(search_system.vector_db, 'metadata') and search_system.vector_db.metadata:
-            for metadata in search_system.vector_db.metadata:
-                author = metadata.get('author') or metadata.get('writer') or metadata.get('user_name')
-                if author:
-                    authors.add(author)
+        authors = set(shard_authors)
+        if session_id in user_sessions:
+            vector_db = user_sessions[session_id].search_system.vector_db
+            if hasattr(vector_db, 'metadata') and vector_db.metadata:
+                for metadata in vector_db.iter_live_metadata():
+                    author = get_author_name(metadata)
+                    if author:
+                        authors.add(author)
         
         return {
             "success": True,
@@ -407,60 +561,49 @@ class AuthorSelectionRequest(BaseModel):
 
 @app.post("/api/select-author")
 async def select_author(request: AuthorSelectionRequest):
-    """특정 작성자 선택 및 해당 작성자의 데이터만으로 페르소나 설정"""
+    """
+    특정 작성자 선택 (세션 인덱스는 그대로 유지)
+    
+    작성자 이름이 독자 샤드 키(get_reader)와 같으면 이후 채팅 검색을 그 샤드로 라우팅하고,
+    아니면(reader_id가 따로 있는 작성자, 샤드 없이 세션 인덱스에만 있는 데이터) 세션 인덱스를
+    작성자 필터로 검색한다.
+    """
     try:
         session_chatbot = get_chatbot(request.session_id)
-        search_system = session_chatbot.search_system
+        tenant_id = get_tenant_id(request.session_id, request.author_name)
         
-        if not hasattr(search_system.vector_db, 'metadata') or not search_system.vector_db.metadata:
-            raise HTTPException(status_code=400, detail="세션에 업로드된 데이터가 없습니다.")
-        
-        # 선택된 작성자의 데이터만 필터링
-        author_data = []
-        author_texts = []
-        author_embeddings = []
-        author_metadata = []
-        
-        for i, metadata in enumerate(search_system.vector_db.metadata):
-            author = metadata.get('author') or metadata.get('writer') or metadata.get('user_name')
-            if author == request.author_name:
-                author_data.append(metadata)
-                author_texts.append(metadata.get('content', ''))
-                if hasattr(search_system.vector_db, 'vectors') and i < len(search_system.vector_db.vectors):
-                    author_embeddings.append(search_system.vector_db.vectors[i])
-                author_metadata.append(metadata)
-        
-        if not author_data:
-            raise HTTPException(status_code=404, detail=f"작성자 '{request.author_name}'의 데이터를 찾을 수 없습니다.")
+        selection = {'name': request.author_name}
+        shard = await run_in_threadpool(shard_manager.get_shard, tenant_id)
+        if shard is not None and shard.live_count > 0:
+            selection['tenant_id'] = tenant_id
+            data_count = shard.live_count
+        else:
+            data_count = sum(1 for metadata in session_chatbot.search_system.vector_db.iter_live_metadata()
+                             if get_author_name(metadata) == request.author_name)
+            selection['filters'] = {'author': request.author_name}
         
-        # 새로운 벡터 DB 생성 (해당 작성자만)
-        if author_embeddings:
-            import numpy as np
-            author_embeddings_array = np.array(author_embeddings)
-            
-            # 새 인덱스 생성
-            search_system.vector_db.create_index(author_embeddings_array.shape[1], index_type="Flat")
-            search_system.vector_db.add_vectors(author_embeddings_array, author_metadata)
+        if data_count == 0:
+            raise HTTPException(status_code=404, detail=f"작성자 '{request.author_name}'의 데이터를 찾을 수 없습니다.")
         
         # 세션에 선택된 작성자 정보 저장
-        if not hasattr(session_chatbot, 'selected_author'):
-            session_chatbot.selected_author = {}
         session_chatbot.selected_author = {
-            'name': request.author_name,
-            'data_count': len(author_data),
+            **selection,
+            'data_count': data_count,
             'selected_at': datetime.now().isoformat()
         }
         
-        logger.info(f"👤 작성자 선택: {request.author_name}, 데이터 {len(author_data)}개, 세션 {request.session_id}")
+        logger.info(f"👤 작성자 선택: {request.author_name}, 데이터 {data_count}개, 세션 {request.session_id}")
         
         return {
             "success": True,
             "message": f"작성자 '{request.author_name}'이 선택되었습니다.",
             "author_name": request.author_name,
-            "data_count": len(author_data),
+            "data_count": data_count,
             "session_id": request.session_id
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ 작성자 선택 오류: {e}")
         raise HTTPException(status_code=500, detail=str(e))
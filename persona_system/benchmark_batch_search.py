@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+배치 검색 결과 조립 벤치마크 (결과마다 dict 복사 vs 열 배열 + 지연 메타데이터)
+
+질문 배치(기본 1000개)를 한 번에 검색한 뒤 결과를 꺼내는 방식별 시간을 비교한다.
+  - search_only: FAISS 검색과 톰스톤 처리까지 (SearchResults 생성, 메타데이터 읽지 않음)
+  - columnar: 검색 + 점수/순위/외부 ID 배열
+  - views: 검색 + 질문별 읽기 전용 메타데이터 뷰
+  - to_dicts: 검색 + 점수/순위가 들어간 dict 복사본 (batch_search와 같은 형식)
+  - legacy: 검색 + 이전 batch_search의 결과마다 copy()/float() 루프
+
+사용 예:
+    python benchmark_batch_search.py
+    python benchmark_batch_search.py --queries 1000 --k 20 --vectors 200000 --index-type HNSW
+    python benchmark_batch_search.py --index ./data/faiss_index/faiss_index --output ./data/benchmarks/batch_search.json
+"""
+import sys
+import json
+import time
+import argparse
+import statistics
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from utils.vector_database import VectorDatabase
+
+
+def build_database(path: Path, vectors: int, dim: int, index_type: str) -> VectorDatabase:
+    """합성 벡터와 실제와 비슷한 크기의 메타데이터로 벤치마크용 벡터 DB 생성"""
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((vectors, dim)).astype(np.float32)
+    metadata = [{
+        "id": f"bench_{i}",
+        "type": "book_review" if i % 3 else "note",
+        "author": f"reader_{i % 500}",
+        "date": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}",
+        "content": f"합성 청크 {i} " + "독서 기록 " * 30,
+    } for i in range(vectors)]
+
+    vector_db = VectorDatabase(index_path=str(path))
+    vector_db.create_index(dim, index_type=index_type, vector_count=vectors)
+    vector_db.add_vectors(embeddings, metadata)
+    return vector_db
+
+
+def legacy_assembly(results) -> list:
+    """이전 batch_search의 결과 조립 (고유 라벨 일괄 조회 후 결과마다 dict 복사)"""
+    distances, indices = results.scores, results.labels
+    unique_labels = np.unique(indices[indices != -1]).tolist()
+    rows = dict(zip(unique_labels, results._metadata_store.get_many(unique_labels)))
+
+    all_results_metadata = []
+    for query_idx in range(len(indices)):
+        query_results = []
+        for rank_idx, idx in enumerate(indices[query_idx]):
+            if idx != -1:
+                meta = rows[idx].copy()
+                meta['similarity_score'] = float(distances[query_idx][rank_idx])
+                meta['rank'] = rank_idx + 1
+                query_results.append(meta)
+        all_results_metadata.append(query_results)
+    return all_results_metadata
+
+
+def columnar(results) -> tuple:
+    """점수/순위/외부 ID 배열만 사용"""
+    return results.scores, results.ranks, results.ids
+
+
+def views(results) -> list:
+    """질문별 읽기 전용 메타데이터 뷰"""
+    return [results.metadata(i) for i in range(len(results))]
+
+
+MODES = {
+    "search_only": None,
+    "columnar": columnar,
+    "views": views,
+    "to_dicts": lambda results: results.to_dicts(),
+    "legacy": legacy_assembly,
+}
+
+
+def measure(vector_db: VectorDatabase, queries: np.ndarray, k: int, assemble, repeat: int) -> dict:
+    """검색 + 결과 조립을 repeat번 실행해 중앙값/최솟값 (ms)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = vector_db.batch_search_results(queries.copy(), k)
+        if assemble is not None:
+            assemble(results)
+        timings.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": statistics.median(timings), "min_ms": min(timings)}
+
+
+def main():
+    """배치 검색 결과 조립 벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="배치 검색 결과 조립 벤치마크 (dict 복사 vs 열 배열)")
+    parser.add_argument("--index", default=None, help="측정할 인덱스 경로 (확장자 제외, 없으면 합성 DB 생성)")
+    parser.add_argument("--vectors", type=int, default=50000, help="합성 DB 벡터 수")
+    parser.add_argument("--dim", type=int, default=128, help="합성 DB 차원")
+    parser.add_argument("--index-type", default="HNSW", help="합성 DB 인덱스 타입")
+    parser.add_argument("--queries", type=int, default=1000, help="배치 질문 수")
+    parser.add_argument("--k", type=int, default=10, help="질문별 결과 수")
+    parser.add_argument("--repeat", type=int, default=5, help="방식별 반복 횟수")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    from loguru import logger
+    logger.remove()
+
+    temp_dir = None
+    if args.index is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        print(f"🧱 합성 DB 생성: {args.index_type}, {args.vectors}개 x {args.dim}차원")
+        vector_db = build_database(Path(temp_dir.name), args.vectors, args.dim, args.index_type)
+    else:
+        vector_db = VectorDatabase(index_path=str(Path(args.index).parent))
+        vector_db.load_index(args.index)
+
+    dim = vector_db.projection.input_dim if vector_db.projection else vector_db.index.d
+    queries = np.random.default_rng(1).standard_normal((args.queries, dim)).astype(np.float32)
+
+    # 첫 실행의 초기화 비용 제외
+    vector_db.batch_search_results(queries[:8].copy(), args.k).to_dicts()
+
+    print(f"⚡ 배치 검색: 질문 {args.queries}개 x k={args.k}, 방식별 {args.repeat}회\n")
+    results = {}
+    for mode, assemble in MODES.items():
+        results[mode] = measure(vector_db, queries, args.k, assemble, args.repeat)
+
+    search_ms = results["search_only"]["median_ms"]
+    for mode, result in results.items():
+        assembly_ms = max(result["median_ms"] - search_ms, 0.0)
+        result["assembly_ms"] = assembly_ms
+        print(f"  • {mode:<12} {result['median_ms']:9.1f} ms  (조립 {assembly_ms:8.1f} ms)")
+
+    legacy_ms = results["legacy"]["assembly_ms"]
+    for mode in ("columnar", "views", "to_dicts"):
+        if results[mode]["assembly_ms"] > 0:
+            print(f"\n  legacy 대비 {mode} 조립 속도: {legacy_ms / results[mode]['assembly_ms']:.1f}배", end="")
+    print()
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(),
+                "settings": vars(args),
+                "results": results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {output_path}")
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+EmbeddingGenerator 처리량 벤치마크
+
+합성 한국어 코퍼스로 배치 크기 x 시퀀스 길이 조합별 texts/sec, tokens/sec를
+측정한다. (추론 백엔드 x 스레드 수) 조합마다 새 프로세스에서 실행하므로
+최대 RSS와 모델 로드/첫 호출 워밍업 지연도 조합별로 분리되어 기록된다.
+결과 JSON에는 git 커밋이 함께 기록되어 커밋 간 비교에 사용할 수 있다.
+
+사용 예:
+    python benchmark_embedding.py
+    python benchmark_embedding.py --backends torch,onnx,onnx-int8 --threads 1,4 \\
+        --batch-sizes 1,8,32 --seq-lens 32,128,256 --output ./data/benchmarks/embedding.json
+"""
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+
+# 합성 코퍼스 어휘 (리뷰/실천 목록 문체)
+_WORDS = [
+    "오늘", "책을", "읽고", "나서", "생각이", "많아졌다", "주인공의", "선택이", "인상", "깊었고",
+    "문장", "하나하나가", "마음에", "남는다", "프로젝트", "계획을", "세우고", "매일", "조금씩",
+    "실천하기로", "했다", "글쓰기", "습관을", "만들기", "위해", "아침마다", "기록을", "남긴다",
+    "감정을", "정리하는", "시간이", "필요하다", "새로운", "아이디어를", "떠올리는", "방법", "독서",
+    "모임에서", "나눈", "이야기가", "오래", "기억에", "남았다", "작가의", "시선이", "따뜻하고",
+    "솔직해서", "좋았다", "다음에는", "다른", "장르도", "읽어보고", "싶다", "이번", "주에는",
+]
+
+# (백엔드 이름) -> EmbeddingGenerator 인자
+BACKENDS = {
+    "torch": {"backend": "torch", "quantize": False},
+    "onnx": {"backend": "onnx", "quantize": False},
+    "onnx-int8": {"backend": "onnx", "quantize": True},
+}
+
+
+def synthetic_corpus(count: int, words_per_text: int, seed: int = 0) -> list:
+    """고정 시드의 합성 한국어 텍스트 생성"""
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(count):
+        words = rng.choice(_WORDS, size=words_per_text)
+        texts.append(" ".join(words) + ".")
+    return texts
+
+
+def peak_rss_mb() -> float:
+    """현재 프로세스의 최대 RSS (MB, Linux 기준 ru_maxrss는 KB)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != "darwin" else peak / 1024 / 1024
+
+
+def count_tokens(generator, texts: list) -> int:
+    """패딩을 제외한 실제 토큰 수"""
+    inputs = generator.tokenizer(texts, return_tensors="np", max_length=512, truncation=True, padding=True)
+    return int(np.asarray(inputs["attention_mask"]).sum())
+
+
+def run_worker(config: dict) -> dict:
+    """
+    (백엔드, 스레드 수) 조합 하나 측정 - 새 프로세스에서 실행
+
+    Args:
+        config: 모델/백엔드/스레드 수와 측정할 배치 크기, 시퀀스 길이 목록
+
+    Returns:
+        조합별 측정 결과
+    """
+    from utils.embedding_cache import EmbeddingCache
+    from utils.embedding_generator import EmbeddingGenerator
+
+    start = time.perf_counter()
+    generator = EmbeddingGenerator(
+        model_name=config["model"],
+        cache=EmbeddingCache(memory_size=0),  # 캐시 히트가 처리량을 왜곡하지 않도록 비활성화
+        num_threads=config["threads"],
+        onnx_dir=config["onnx_dir"],
+        use_registry=False,
+        lazy_load=False,
+        **BACKENDS[config["backend"]]
+    )
+    load_seconds = time.perf_counter() - start
+
+    # 첫 호출 워밍업 지연 (그래프 최적화, 메모리 할당 등)
+    start = time.perf_counter()
+    generator.generate_embeddings(synthetic_corpus(1, 16, seed=999))
+    warmup_seconds = time.perf_counter() - start
+
+    # 단어 하나당 토큰 수를 보정해 목표 시퀀스 길이에 맞는 코퍼스 생성
+    calibration = synthetic_corpus(32, 64, seed=998)
+    tokens_per_word = count_tokens(generator, calibration) / (32 * 64)
+
+    runs = []
+    for seq_len in config["seq_lens"]:
+        words_per_text = max(1, int(seq_len / tokens_per_word))
+        for batch_size in config["batch_sizes"]:
+            texts = synthetic_corpus(config["texts"], words_per_text, seed=seq_len)
+            total_tokens = count_tokens(generator, texts)
+
+            timings = []
+            for _ in range(config["repeat"]):
+                start = time.perf_counter()
+                generator.generate_embeddings(texts, batch_size=batch_size)
+                timings.append(time.perf_counter() - start)
+            elapsed = float(np.median(timings))
+
+            runs.append({
+                "seq_len": seq_len,
+                "mean_tokens": total_tokens / len(texts),
+                "batch_size": batch_size,
+                "texts": len(texts),
+                "median_seconds": elapsed,
+                "texts_per_second": len(texts) / elapsed,
+                "tokens_per_second": total_tokens / elapsed
+            })
+
+    return {
+        "backend": config["backend"],
+        "threads": config["threads"],
+        "load_seconds": load_seconds,
+        "warmup_seconds": warmup_seconds,
+        "peak_rss_mb": peak_rss_mb(),
+        "runs": runs
+    }
+
+
+def run_config(config: dict) -> dict:
+    """조합 하나를 새 프로세스에서 실행하고 결과 JSON 수집"""
+    proc = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--worker-config", json.dumps(config)],
+        cwd=str(project_root),
+        capture_output=True,
+        text=True
+    )
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+        return {"backend": config["backend"], "threads": config["threads"], "error": error}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> str:
+    """현재 git 커밋 (git 저장소가 아니면 None)"""
+    try:
+        proc = subprocess.run(["git", "rev-parse", "HEAD"], cwd=str(project_root),
+                              capture_output=True, text=True)
+        return proc.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    """임베딩 처리량 벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="EmbeddingGenerator 처리량 벤치마크")
+    parser.add_argument("--model", default="klue/roberta-base", help="임베딩 모델명")
+    parser.add_argument("--backends", default="torch", help=f"측정할 백엔드 (쉼표 구분, {', '.join(BACKENDS)})")
+    parser.add_argument("--threads", default="1,4", help="intra-op 스레드 수 (쉼표 구분)")
+    parser.add_argument("--batch-sizes", default="1,8,32", help="배치 크기 (쉼표 구분)")
+    parser.add_argument("--seq-lens", default="32,128,256", help="목표 시퀀스 길이(토큰) (쉼표 구분)")
+    parser.add_argument("--texts", type=int, default=128, help="측정당 텍스트 수")
+    parser.add_argument("--repeat", type=int, default=3, help="측정 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--onnx-dir", default="./data/onnx_models", help="ONNX 모델 저장 경로")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--worker-config", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_config:
+        # 하위 프로세스: 결과를 JSON 한 줄로 출력
+        print(json.dumps(run_worker(json.loads(args.worker_config))))
+        return
+
+    backends = args.backends.split(",")
+    unknown = [b for b in backends if b not in BACKENDS]
+    if unknown:
+        parser.error(f"지원하지 않는 백엔드: {unknown}")
+
+    print(f"🏎️  임베딩 처리량 벤치마크: {args.model}\n")
+
+    results = []
+    for backend in backends:
+        for threads in (int(t) for t in args.threads.split(",")):
+            config = {
+                "model": args.model,
+                "backend": backend,
+                "threads": threads,
+                "batch_sizes": [int(b) for b in args.batch_sizes.split(",")],
+                "seq_lens": [int(s) for s in args.seq_lens.split(",")],
+                "texts": args.texts,
+                "repeat": args.repeat,
+                "onnx_dir": args.onnx_dir
+            }
+            result = run_config(config)
+            results.append(result)
+
+            print(f"▶ {backend} x 스레드 {threads}")
+            if "error" in result:
+                print(f"  ❌ {result['error']}\n")
+                continue
+            print(f"  로드 {result['load_seconds']:.2f}s, 워밍업 {result['warmup_seconds'] * 1000:.0f}ms, "
+                  f"최대 RSS {result['peak_rss_mb']:.0f}MB")
+            for run in result["runs"]:
+                print(f"  • 길이 {run['seq_len']:>4} 배치 {run['batch_size']:>3}: "
+                      f"{run['texts_per_second']:8.1f} texts/s  {run['tokens_per_second']:10.1f} tokens/s")
+            print()
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(),
+                "git_commit": git_commit(),
+                "python": sys.version.split()[0],
+                "model": args.model,
+                "results": results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
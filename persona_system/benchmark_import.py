@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+엔트리 포인트별 import 시간 벤치마크
+
+각 대상을 새 파이썬 프로세스에서 import하여 벽시계 시간을 재고,
+import 후 어떤 무거운 의존성(torch, transformers, faiss, boto3, sklearn)이
+로드됐는지 함께 기록한다.
+
+사용 예:
+    python benchmark_import.py
+    python benchmark_import.py --repeat 5 --output ./data/benchmarks/import_time.json
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+project_root = Path(__file__).parent
+
+# 대상 이름 -> 새 프로세스에서 실행할 import 문
+TARGETS = {
+    "run_backend.py": "import run_backend",
+    "analyze_real_supabase.py": "import analyze_real_supabase",
+    "embed_corpus.py": "import embed_corpus",
+    "utils.EmotionAnalyzer": "from utils import EmotionAnalyzer",
+    "utils.StorageManager": "from utils import StorageManager",
+    "utils.SearchSystem": "from utils import SearchSystem",
+    "backend.main": "import backend.main",
+}
+
+HEAVY_MODULES = ["torch", "transformers", "faiss", "boto3", "sklearn", "onnxruntime"]
+
+# import 시간과 로드된 무거운 모듈을 JSON 한 줄로 출력하는 측정 코드
+_PROBE = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{statement}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def measure_target(statement: str, repeat: int) -> dict:
+    """새 프로세스에서 import를 repeat번 측정"""
+    timings = []
+    heavy = []
+    error = None
+
+    for _ in range(repeat):
+        code = _PROBE.format(root=str(project_root), statement=statement, heavy=HEAVY_MODULES)
+        proc = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=str(project_root),
+            capture_output=True,
+            text=True
+        )
+        if proc.returncode != 0:
+            error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "unknown error"
+            break
+
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        heavy = result["heavy"]
+
+    if error:
+        return {"statement": statement, "error": error}
+
+    return {
+        "statement": statement,
+        "median_seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "runs": len(timings),
+        "heavy_modules_loaded": heavy
+    }
+
+
+def main():
+    """import 시간 벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="엔트리 포인트 import 시간 벤치마크")
+    parser.add_argument("--repeat", type=int, default=3, help="대상별 측정 횟수")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    print("⏱️  import 시간 벤치마크\n")
+
+    results = {}
+    for name, statement in TARGETS.items():
+        result = measure_target(statement, args.repeat)
+        results[name] = result
+
+        if "error" in result:
+            print(f"  • {name:<28} ❌ {result['error']}")
+        else:
+            heavy = ", ".join(result["heavy_modules_loaded"]) or "-"
+            print(f"  • {name:<28} {result['median_seconds'] * 1000:8.1f} ms  (무거운 모듈: {heavy})")
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(),
+                "python": sys.version.split()[0],
+                "results": results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+FAISS 인덱스 로드 방식 벤치마크 (일반 로드 vs 메모리 매핑)
+
+각 로드 방식마다
+  - 콜드 시작: 인덱스 파일을 페이지 캐시에서 내보낸 뒤 새 프로세스에서 로드
+  - 웜 시작: 페이지 캐시에 올라온 상태에서 새 프로세스로 다시 로드
+  - 동시 워커: N개 프로세스가 같은 인덱스를 로드한 상태에서 워커별 RSS/PSS/전용 메모리
+를 측정한다. PSS는 공유 페이지를 공유 프로세스 수로 나눈 값이라 워커 간 공유 효과가 드러난다.
+
+사용 예:
+    python benchmark_index_loading.py
+    python benchmark_index_loading.py --index ./data/faiss_index/faiss_index --workers 4
+    python benchmark_index_loading.py --vectors 200000 --dim 768 --index-type HNSW \\
+        --output ./data/benchmarks/index_loading.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+MODES = {"default": False, "mmap": True}
+
+
+def memory_usage_mb() -> dict:
+    """현재 프로세스의 RSS, PSS, 전용(dirty) 메모리 (MB, Linux /proc 기준)"""
+    usage = {}
+    with open("/proc/self/smaps_rollup", encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if parts[0] in ("Rss:", "Pss:", "Private_Dirty:"):
+                usage[parts[0].rstrip(":").lower()] = int(parts[1]) / 1024
+    return {"rss_mb": usage.get("rss", 0.0), "pss_mb": usage.get("pss", 0.0),
+            "private_mb": usage.get("private_dirty", 0.0)}
+
+
+def evict_page_cache(index_path: Path) -> None:
+    """인덱스 파일 페이지를 페이지 캐시에서 내보내기 (콜드 시작 재현, 루트 권한 불필요)"""
+    with open(index_path, "rb") as f:
+        os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+
+def build_index(path: Path, vectors: int, dim: int, index_type: str) -> None:
+    """합성 벡터로 벤치마크용 인덱스 생성"""
+    from utils.vector_database import VectorDatabase
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((vectors, dim)).astype(np.float32)
+    metadata = [{"id": f"bench_{i}", "text": f"합성 청크 {i}"} for i in range(vectors)]
+
+    vector_db = VectorDatabase(index_path=str(path.parent))
+    vector_db.create_index(dim, index_type=index_type, vector_count=vectors)
+    vector_db.add_vectors(embeddings, metadata)
+    vector_db.save_index(str(path))
+
+
+def run_worker(config: dict) -> None:
+    """
+    인덱스 하나를 로드하고 측정 결과를 출력 (새 프로세스에서 실행)
+
+    로드 결과를 한 줄 출력한 뒤 표준 입력으로 'measure'를 받으면 메모리를 다시 측정해
+    출력하고 종료한다. 부모가 모든 워커의 로드를 기다린 뒤 동시에 측정하기 위함이다.
+    """
+    from loguru import logger
+    logger.remove()
+
+    from utils.vector_database import VectorDatabase
+
+    before = memory_usage_mb()
+    start = time.perf_counter()
+    vector_db = VectorDatabase(index_path=str(Path(config["index"]).parent))
+    vector_db.load_index(config["index"], mmap=config["mmap"])
+    load_seconds = time.perf_counter() - start
+
+    # 첫 검색 지연 (매핑된 페이지는 검색 시 읽힘)
+    dim = vector_db.index.d
+    queries = np.random.default_rng(1).standard_normal((config["queries"], dim)).astype(np.float32)
+    start = time.perf_counter()
+    vector_db.batch_search(queries, k=5)
+    first_search_ms = (time.perf_counter() - start) * 1000
+
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "first_search_ms": first_search_ms,
+        "mmapped": vector_db.index_mmapped,
+        "baseline_rss_mb": before["rss_mb"],
+        **memory_usage_mb()
+    }), flush=True)
+
+    if sys.stdin.readline().strip() == "measure":
+        print(json.dumps(memory_usage_mb()), flush=True)
+
+
+def start_worker(index: str, mmap: bool, queries: int) -> subprocess.Popen:
+    """워커 프로세스 시작"""
+    config = {"index": index, "mmap": mmap, "queries": queries}
+    return subprocess.Popen(
+        [sys.executable, str(Path(__file__).resolve()), "--worker-config", json.dumps(config)],
+        cwd=str(project_root),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True
+    )
+
+
+def run_workers(index: str, mmap: bool, workers: int, queries: int) -> list:
+    """워커 N개를 띄워 모두 로드한 상태에서 동시에 메모리 측정"""
+    procs = [start_worker(index, mmap, queries) for _ in range(workers)]
+    loaded = [json.loads(proc.stdout.readline()) for proc in procs]
+
+    for proc in procs:
+        proc.stdin.write("measure\n")
+        proc.stdin.flush()
+    results = []
+    for proc, load in zip(procs, loaded):
+        results.append({**load, **json.loads(proc.stdout.readline())})
+        proc.wait()
+    return results
+
+
+def main():
+    """인덱스 로드 벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="FAISS 인덱스 로드 방식 벤치마크 (일반 vs 메모리 매핑)")
+    parser.add_argument("--index", default=None, help="측정할 인덱스 경로 (확장자 제외, 없으면 합성 인덱스 생성)")
+    parser.add_argument("--vectors", type=int, default=100000, help="합성 인덱스 벡터 수")
+    parser.add_argument("--dim", type=int, default=768, help="합성 인덱스 차원")
+    parser.add_argument("--index-type", default="Flat", help="합성 인덱스 타입 (Flat, HNSW, IVFFlat)")
+    parser.add_argument("--workers", type=int, default=4, help="동시 워커 프로세스 수")
+    parser.add_argument("--queries", type=int, default=16, help="로드 직후 검색 질문 수")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--worker-config", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_config:
+        run_worker(json.loads(args.worker_config))
+        return
+
+    temp_dir = None
+    if args.index is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        args.index = str(Path(temp_dir.name) / "faiss_index")
+        print(f"🧱 합성 인덱스 생성: {args.index_type}, {args.vectors}개 x {args.dim}차원")
+        build_index(Path(args.index), args.vectors, args.dim, args.index_type)
+
+    index_file = Path(args.index).with_suffix(".faiss")
+    print(f"📦 인덱스 파일: {index_file} ({index_file.stat().st_size / 1024 / 1024:.1f} MB)\n")
+
+    results = {}
+    for mode, mmap in MODES.items():
+        evict_page_cache(index_file)
+        cold = run_workers(args.index, mmap, 1, args.queries)[0]
+        warm = run_workers(args.index, mmap, 1, args.queries)[0]
+        concurrent = run_workers(args.index, mmap, args.workers, args.queries)
+        results[mode] = {"cold": cold, "warm": warm, "workers": concurrent}
+
+        print(f"▶ {mode} (매핑 적용: {cold['mmapped']})")
+        print(f"  콜드 로드 {cold['load_seconds'] * 1000:8.1f} ms  첫 검색 {cold['first_search_ms']:7.1f} ms")
+        print(f"  웜 로드   {warm['load_seconds'] * 1000:8.1f} ms  첫 검색 {warm['first_search_ms']:7.1f} ms")
+        print(f"  워커 {args.workers}개 평균: RSS {np.mean([w['rss_mb'] for w in concurrent]):7.1f} MB  "
+              f"PSS {np.mean([w['pss_mb'] for w in concurrent]):7.1f} MB  "
+              f"전용 {np.mean([w['private_mb'] for w in concurrent]):7.1f} MB\n")
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "created_at": datetime.now().isoformat(),
+                "settings": vars(args),
+                "index_size_mb": index_file.stat().st_size / 1024 / 1024,
+                "results": results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"💾 결과 저장: {output_path}")
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
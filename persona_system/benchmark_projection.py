@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+차원 축소 투영 recall@k 벤치마크
+
+저장된 임베딩(.npy)에서 일부를 질문으로 떼어 내고, 원본 차원의 정확한 검색 결과를
+기준으로 목표 차원별 PCA/OPQ 투영 후 검색의 recall@k를 측정한다.
+목표 recall을 주면 이를 만족하는 가장 작은 차원을 추천한다.
+
+사용 예:
+    python benchmark_projection.py --embeddings ./data/embeddings/corpus.npy
+    python benchmark_projection.py --embeddings ./data/embeddings/corpus.npy \\
+        --dims 64,128,256,384 --method opq --target-recall 0.95 --output ./data/benchmarks/projection.json
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime
+
+import numpy as np
+import faiss
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from utils.vector_projection import VectorProjection
+from utils.embedding_quantization import restore_from_metadata
+
+
+def load_embeddings(path: str) -> np.ndarray:
+    """임베딩 로드 (옆에 메타데이터 .json이 있으면 저장 정밀도 복원)"""
+    path = Path(path)
+    embeddings = np.load(path, mmap_mode='r')
+
+    metadata_path = path.with_suffix('.json')
+    if metadata_path.exists():
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            embeddings = restore_from_metadata(embeddings, json.load(f))
+
+    embeddings = np.array(embeddings, dtype=np.float32)
+    faiss.normalize_L2(embeddings)
+    return embeddings
+
+
+def exact_neighbors(database: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """원본 차원 정확 검색 결과 (기준값)"""
+    index = faiss.IndexFlatIP(database.shape[1])
+    index.add(database)
+    _, indices = index.search(queries, k)
+    return indices
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """질문별 상위 k개 교집합 비율의 평균"""
+    hits = [len(set(t) & set(f)) / len(t) for t, f in zip(truth, found)]
+    return float(np.mean(hits))
+
+
+def measure_dimension(database: np.ndarray,
+                      queries: np.ndarray,
+                      train_sample: np.ndarray,
+                      truth: np.ndarray,
+                      dim: int,
+                      method: str,
+                      k: int) -> dict:
+    """목표 차원 하나에 대해 투영 학습 후 recall@k 측정"""
+    projection = VectorProjection(database.shape[1], dim, method)
+
+    start = time.perf_counter()
+    projection.train(train_sample)
+    train_seconds = time.perf_counter() - start
+
+    index = faiss.IndexFlatIP(dim)
+    index.add(projection.apply(database))
+
+    start = time.perf_counter()
+    _, found = index.search(projection.apply(queries), k)
+    search_seconds = time.perf_counter() - start
+
+    return {
+        'dim': dim,
+        'recall_at_k': recall_at_k(truth, found),
+        'explained_variance_ratio': projection.explained_variance_ratio(),
+        'bytes_per_vector': dim * 4,
+        'train_seconds': train_seconds,
+        'search_ms_per_query': search_seconds / len(queries) * 1000
+    }
+
+
+def main():
+    """recall@k vs 차원 벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="차원 축소 투영 recall@k 벤치마크")
+    parser.add_argument("--embeddings", required=True, help="임베딩 .npy 경로")
+    parser.add_argument("--dims", default="64,128,192,256,384", help="측정할 목표 차원 (쉼표 구분)")
+    parser.add_argument("--method", default="pca", choices=["pca", "opq"], help="투영 방식")
+    parser.add_argument("--k", type=int, default=10, help="recall@k의 k")
+    parser.add_argument("--queries", type=int, default=200, help="질문으로 떼어 낼 벡터 수")
+    parser.add_argument("--train-size", type=int, default=20000, help="투영 학습 샘플 수")
+    parser.add_argument("--target-recall", type=float, default=None, help="추천 차원을 고를 목표 recall")
+    parser.add_argument("--seed", type=int, default=42, help="샘플링 시드")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    embeddings = load_embeddings(args.embeddings)
+    input_dim = embeddings.shape[1]
+    if len(embeddings) <= args.queries + args.k:
+        print(f"❌ 임베딩 수({len(embeddings)})가 질문 수 + k보다 많아야 합니다.")
+        sys.exit(1)
+
+    # 질문과 데이터베이스를 겹치지 않게 분리
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(embeddings))
+    queries = embeddings[order[:args.queries]]
+    database = embeddings[order[args.queries:]]
+    train_sample = database[rng.permutation(len(database))[:args.train_size]]
+
+    print(f"📐 차원 축소 recall@{args.k} 벤치마크 ({args.method.upper()})")
+    print(f"  - 원본 차원: {input_dim}, 데이터베이스: {len(database)}개, 질문: {len(queries)}개\n")
+
+    truth = exact_neighbors(database, queries, args.k)
+
+    results = []
+    for dim in sorted(int(d) for d in args.dims.split(",")):
+        if dim > input_dim:
+            print(f"  • {dim:>4}차원  건너뜀 (원본 차원보다 큼)")
+            continue
+
+        result = measure_dimension(database, queries, train_sample, truth, dim, args.method, args.k)
+        results.append(result)
+
+        variance = result['explained_variance_ratio']
+        variance_text = f", 분산 보존 {variance:.1%}" if variance is not None else ""
+        print(f"  • {dim:>4}차원  recall@{args.k} {result['recall_at_k']:.3f}  "
+              f"({result['bytes_per_vector']} B/벡터{variance_text})")
+
+    recommended = None
+    if args.target_recall is not None:
+        passing = [r for r in results if r['recall_at_k'] >= args.target_recall]
+        recommended = passing[0]['dim'] if passing else None
+        if recommended:
+            print(f"\n✅ 목표 recall {args.target_recall} 이상인 최소 차원: {recommended}")
+        else:
+            print(f"\n⚠️ 목표 recall {args.target_recall}을 만족하는 차원이 없습니다.")
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(),
+                'embeddings': str(args.embeddings),
+                'method': args.method,
+                'input_dim': input_dim,
+                'k': args.k,
+                'database_size': len(database),
+                'query_count': len(queries),
+                'target_recall': args.target_recall,
+                'recommended_dim': recommended,
+                'results': results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+동시 질문 마이크로 배칭 부하 벤치마크
+
+N명의 동시 사용자가 각자 질문을 연속으로 보내는 상황을 asyncio로 흉내 내고,
+요청마다 따로 검색하는 방식(스레드 풀)과 QueryBatcher로 합쳐 처리하는 방식의
+처리량과 p50/p99 지연 시간을 비교한다.
+
+사용 예:
+    python benchmark_query_batching.py --index ./data/faiss_index/faiss_index
+    python benchmark_query_batching.py --index ./data/faiss_index/faiss_index \\
+        --users 50 --requests-per-user 20 --batch-size 32 --wait-ms 5 --output ./data/benchmarks/batching.json
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from utils.search_system import SearchSystem
+from utils.query_batcher import QueryBatcher
+
+
+SAMPLE_QUERIES = [
+    "책 추천해줘",
+    "프로젝트 추천",
+    "요즘 읽은 책에서 느낀 감정을 정리하고 싶어",
+    "글쓰기 습관을 만드는 방법",
+    "새로운 아이디어가 필요해",
+    "감정 일기를 쓰는 프로젝트",
+    "독서 모임을 시작하려면",
+    "창의적인 사이드 프로젝트 아이디어",
+]
+
+
+def summarize(latencies: list, elapsed: float) -> dict:
+    """지연 시간 목록을 처리량/백분위 요약으로 변환"""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'elapsed_seconds': elapsed,
+        'throughput_rps': len(latencies) / elapsed if elapsed > 0 else None,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': float(np.percentile(latencies, 99)) * 1000,
+        'max_ms': latencies[-1] * 1000
+    }
+
+
+async def run_load(search_fn, users: int, requests_per_user: int) -> dict:
+    """동시 사용자 부하 실행"""
+    latencies = []
+
+    async def user(user_index: int):
+        for request_index in range(requests_per_user):
+            # 캐시 효과를 줄이기 위해 사용자/요청마다 질문을 조금씩 바꿈
+            query = f"{SAMPLE_QUERIES[(user_index + request_index) % len(SAMPLE_QUERIES)]} {user_index}-{request_index}"
+            start = time.perf_counter()
+            await search_fn(query)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(users)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def benchmark(search_system: SearchSystem, args) -> dict:
+    """요청별 처리와 배치 처리 비교"""
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=args.users)
+
+    async def per_request(query: str):
+        return await loop.run_in_executor(executor, search_system.semantic_search, query, args.k)
+
+    batcher = QueryBatcher(max_batch_size=args.batch_size, max_wait_ms=args.wait_ms)
+
+    async def batched(query: str):
+        return await batcher.semantic_search(search_system, query, k=args.k)
+
+    # 모델 로드와 첫 호출 비용을 측정에서 제외
+    search_system.semantic_search(SAMPLE_QUERIES[0], args.k)
+
+    baseline = await run_load(per_request, args.users, args.requests_per_user)
+    coalesced = await run_load(batched, args.users, args.requests_per_user)
+    coalesced['batcher'] = batcher.get_stats()
+
+    await batcher.close()
+    executor.shutdown()
+    return {'per_request': baseline, 'batched': coalesced}
+
+
+def main():
+    """마이크로 배칭 벤치마크 실행"""
+    parser = argparse.ArgumentParser(description="동시 질문 마이크로 배칭 부하 벤치마크")
+    parser.add_argument("--index", required=True, help="FAISS 인덱스 경로 (확장자 제외)")
+    parser.add_argument("--model", default="klue/roberta-base", help="임베딩 모델명")
+    parser.add_argument("--users", type=int, default=50, help="동시 사용자 수")
+    parser.add_argument("--requests-per-user", type=int, default=10, help="사용자별 요청 수")
+    parser.add_argument("--k", type=int, default=5, help="검색 결과 수")
+    parser.add_argument("--batch-size", type=int, default=32, help="최대 배치 크기")
+    parser.add_argument("--wait-ms", type=float, default=5.0, help="최대 배치 대기 시간 (ms)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    search_system = SearchSystem(vector_db_path=str(Path(args.index).parent), embedding_model=args.model)
+    if not search_system.load_index(args.index):
+        print(f"❌ 인덱스를 로드할 수 없습니다: {args.index}")
+        sys.exit(1)
+
+    print(f"⚡ 마이크로 배칭 벤치마크: 동시 사용자 {args.users}명 x {args.requests_per_user}회\n")
+    results = asyncio.run(benchmark(search_system, args))
+
+    for name, label in (("per_request", "요청별 처리"), ("batched", "배치 처리")):
+        result = results[name]
+        print(f"  • {label:<8} {result['throughput_rps']:8.1f} req/s  "
+              f"p50 {result['p50_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms")
+    print(f"\n  평균 배치 크기: {results['batched']['batcher']['avg_batch_size']:.1f}")
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(),
+                'settings': vars(args),
+                'results': results
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
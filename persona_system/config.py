@@ -31,6 +31,22 @@ class Settings(BaseSettings):
     vector_db_path: str = "./data/faiss_index"
     data_path: str = "./data/processed"
     
+    # 독자별 샤드 설정 (메모리 예산을 넘으면 오래 쓰지 않은 샤드를 디스크로 내림)
+    shard_root: str = "./data/shards"
+    shard_memory_budget_mb: float = 512.0
+    shard_mmap: bool = False
+    
+    # 인덱스 타입 자동 마이그레이션 (Flat -> HNSW -> IVFPQ, 백그라운드 재구축)
+    index_auto_migrate: bool = True
+    index_latency_budget_ms: Optional[float] = None  # 질문당 검색 지연 시간 예산 (넘으면 마이그레이션 앞당김)
+    
+    # 검색 배치 설정 (동시 질문 합치기)
+    query_batch_size: int = 32
+    query_batch_wait_ms: float = 5.0
+    
+    # 채팅 검색 기본 프리셋 (fast, balanced, exact)
+    chat_search_preset: str = "fast"
+    
     # 로깅 설정
     log_level: str = "INFO"
     log_file: str = "./logs/persona_system.log"
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+전체 코퍼스 임베딩 스크립트
+
+Supabase의 books.review와 action_lists.content 전체를 프로세스 풀로 임베딩한다.
+
+사용 예:
+    python embed_corpus.py --workers 8 --threads 2 --output ./data/embeddings/corpus
+    python embed_corpus.py --scaling 1,2,4,8,16   # 워커 수별 처리량 측정
+    python embed_corpus.py --dedup 0.8            # 근중복 청크는 대표 하나만 임베딩
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from supabase_client import SupabaseClient
+from utils.bulk_embedding import BulkEmbeddingRunner
+from utils.embedding_stream import save_embeddings_stream
+from utils.near_dedup import NearDuplicateDetector, collapse_near_duplicates
+
+
+def save_dedup_assignments(assignments, result):
+    """
+    원래 코퍼스 순서 -> 출력 임베딩 행 매핑을 .assignments.npy로 저장
+
+    출력 .npy에는 대표 청크만 있으므로, 원래 i번째 텍스트의 임베딩은
+    embeddings[assignments[i]] (utils.near_dedup.expand_embeddings)로 찾는다.
+    """
+    embeddings_path = Path(result['embeddings_path'])
+    assignments_path = embeddings_path.with_suffix('.assignments.npy')
+    np.save(assignments_path, np.asarray(assignments, dtype=np.int64))
+
+    # 메타데이터에도 매핑 파일과 원래 코퍼스 크기를 기록
+    metadata_path = Path(result['metadata_path'])
+    with open(metadata_path, 'r', encoding='utf-8') as f:
+        metadata = json.load(f)
+    metadata['assignments_file'] = assignments_path.name
+    metadata['corpus_count'] = len(assignments)
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    return str(assignments_path)
+
+
+def collect_corpus_texts(client: SupabaseClient):
+    """books.review와 action_lists.content 수집"""
+    texts = []
+
+    for book in client.get_all_books():
+        if book.get('review'):
+            texts.append(book['review'])
+
+    for action in client.get_all_action_lists():
+        if action.get('content'):
+            texts.append(action['content'])
+
+    return texts
+
+
+def run_scaling_test(texts, worker_counts, args):
+    """워커 수별 처리량 측정"""
+    print("\n=== 📈 워커 수별 처리량 ===\n")
+    baseline = None
+
+    for workers in worker_counts:
+        runner = BulkEmbeddingRunner(
+            model_name=args.model,
+            num_workers=workers,
+            threads_per_worker=args.threads or 1,
+            batch_size=args.batch_size,
+            shard_size=args.shard_size,
+            backend=args.backend,
+            quantize=args.quantize
+        )
+        result = runner.generate_embeddings(texts)
+        throughput = result['texts_per_second']
+        baseline = baseline or throughput
+
+        print(f"  • 워커 {workers:>2}개: {throughput:8.1f} texts/sec "
+              f"(x{throughput / baseline:.2f}, 이상적 x{workers / worker_counts[0]:.0f})")
+
+
+def main():
+    """전체 코퍼스 임베딩 실행"""
+    parser = argparse.ArgumentParser(description="전체 코퍼스 임베딩")
+    parser.add_argument("--model", default="klue/roberta-base", help="임베딩 모델명")
+    parser.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: CPU 코어 수)")
+    parser.add_argument("--threads", type=int, default=None, help="워커별 intra-op 스레드 수")
+    parser.add_argument("--batch-size", type=int, default=32, help="워커 내부 배치 크기")
+    parser.add_argument("--shard-size", type=int, default=256, help="워커에 넘기는 샤드 크기")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch", help="추론 백엔드")
+    parser.add_argument("--quantize", action="store_true", help="ONNX 동적 int8 양자화 사용")
+    parser.add_argument("--output", default="./data/embeddings/corpus", help="저장 경로 (.npy/.json)")
+    parser.add_argument("--scaling", default=None, help="처리량 측정할 워커 수 목록 (예: 1,2,4,8)")
+    parser.add_argument("--dedup", type=float, default=None,
+                        help="근중복 제거 임계값 (MinHash 추정 Jaccard, 예: 0.8)")
+    args = parser.parse_args()
+
+    print("🤖 전체 코퍼스 임베딩 시작\n")
+
+    client = SupabaseClient()
+    texts = collect_corpus_texts(client)
+    print(f"📚 임베딩 대상: {len(texts)}개 텍스트")
+
+    if not texts:
+        print("⚠️  임베딩할 텍스트가 없습니다.")
+        return
+
+    deduped = None
+    if args.dedup is not None:
+        deduped = collapse_near_duplicates(texts, detector=NearDuplicateDetector(threshold=args.dedup))
+        stats = deduped['stats']
+        texts = deduped['texts']
+        print(f"🧹 근중복 제거: {stats['removed_count']}개 ({stats['removed_ratio']:.1%}) → {len(texts)}개 임베딩")
+
+    if args.scaling:
+        worker_counts = [int(n) for n in args.scaling.split(",")]
+        run_scaling_test(texts, worker_counts, args)
+        return
+
+    runner = BulkEmbeddingRunner(
+        model_name=args.model,
+        num_workers=args.workers,
+        threads_per_worker=args.threads,
+        batch_size=args.batch_size,
+        shard_size=args.shard_size,
+        backend=args.backend,
+        quantize=args.quantize
+    )
+    # 샤드 결과를 모으지 않고 .npy 파일로 바로 기록
+    start_time = time.perf_counter()
+    result = save_embeddings_stream(runner.iter_embeddings(texts), args.output, args.model)
+    elapsed = time.perf_counter() - start_time
+
+    print(f"\n✅ 완료: {result['chunk_count']}개 임베딩, {result['chunk_count'] / elapsed:.1f} texts/sec")
+    print(f"💾 저장 위치: {args.output}")
+    if deduped is not None:
+        assignments_path = save_dedup_assignments(deduped['assignments'], result)
+        print(f"🔗 코퍼스 행 -> 임베딩 행 매핑: {assignments_path} ({len(deduped['assignments'])}개)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+🧪 인덱스 스냅샷 테스트: 게시 / 체크섬 검사 / CURRENT 유지
+
+이 파일은 버전별 인덱스 스냅샷 저장소를 테스트합니다 (임베딩 모델 없이 numpy/faiss만 사용):
+✅ 스냅샷 게시와 CURRENT 교체
+✅ 파일 하나가 손상되면 MANIFEST의 SHA-256 검사로 거부
+✅ 손상된 스냅샷으로는 CURRENT가 바뀌지 않고 이전 버전을 계속 가리킴
+"""
+import sys
+import tempfile
+from pathlib import Path
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from utils.vector_database import VectorDatabase
+from utils.index_snapshots import SnapshotStore, SNAPSHOT_INDEX_NAME
+
+DIM = 32
+
+
+def make_db(count: int, work_dir: str) -> VectorDatabase:
+    """문서 count개를 넣은 Flat 벡터 DB"""
+    vectors = np.random.default_rng(count).standard_normal((count, DIM)).astype('float32')
+    vector_db = VectorDatabase(index_path=str(Path(work_dir) / "working" / "faiss_index"))
+    vector_db.create_index(DIM, index_type="Flat")
+    vector_db.add_vectors(vectors, [{'id': f"doc_{i}", 'content': f"문서 {i}"} for i in range(count)])
+    return vector_db
+
+
+def corrupt(path: Path) -> None:
+    """크기는 그대로 두고 파일 가운데 바이트 하나를 뒤집음 (체크섬으로만 잡히는 손상)"""
+    data = bytearray(path.read_bytes())
+    data[len(data) // 2] ^= 0xFF
+    path.write_bytes(bytes(data))
+
+
+def test_1_publish(store: SnapshotStore, work_dir: str):
+    """1. 스냅샷 게시 테스트"""
+    print("=" * 60)
+    print("📦 1. 스냅샷 게시 테스트")
+    print("=" * 60)
+
+    try:
+        version = store.publish(make_db(100, work_dir))
+        manifest = store.verify(version)
+        loaded = store.load()
+
+        ok = (store.current_version() == version
+              and manifest['live_vectors'] == 100
+              and loaded.snapshot_version == version and loaded.live_count == 100)
+        print(f"  {'✅' if ok else '❌'} {version} 게시, 파일 {len(manifest['files'])}개, CURRENT {store.current_version()}")
+        return version if ok else None
+
+    except Exception as e:
+        print(f"  ❌ 게시 테스트 실패: {e}")
+        return None
+
+
+def test_2_corrupted_snapshot_rejected(store: SnapshotStore, work_dir: str, previous: str) -> bool:
+    """2. 손상된 스냅샷이 거부되고 CURRENT가 이전 버전에 남는지 테스트"""
+    print("\n" + "=" * 60)
+    print("🛡️ 2. 손상된 스냅샷 거부 테스트")
+    print("=" * 60)
+
+    try:
+        # 새 버전은 CURRENT로 바꾸지 않고 게시한 뒤 파일 하나를 손상
+        version = store.publish(make_db(200, work_dir), make_current=False)
+        corrupt(store.root_path / version / f"{SNAPSHOT_INDEX_NAME}.faiss")
+
+        rejected = []
+        for name, action in [("verify", lambda: store.verify(version)),
+                             ("load", lambda: store.load(version)),
+                             ("set_current", lambda: store.set_current(version))]:
+            try:
+                action()
+                print(f"  ❌ {name}: 손상된 스냅샷을 받아들임")
+            except ValueError as e:
+                rejected.append(name)
+                print(f"  ✅ {name}: 거부 ({e})")
+
+        loaded = store.load()
+        ok = (len(rejected) == 3
+              and store.current_version() == previous
+              and loaded.snapshot_version == previous and loaded.live_count == 100)
+        print(f"  {'✅' if ok else '❌'} CURRENT {store.current_version()} 유지 (이전 버전 {previous})")
+        return ok
+
+    except Exception as e:
+        print(f"  ❌ 손상 스냅샷 테스트 실패: {e}")
+        return False
+
+
+def main():
+    """메인 테스트 실행"""
+    print("🧪 인덱스 스냅샷 테스트 시작")
+    print("=" * 80)
+
+    test_results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        store = SnapshotStore(str(Path(work_dir) / "snapshots"), keep=0)
+
+        version = test_1_publish(store, work_dir)
+        test_results["스냅샷 게시"] = version is not None
+
+        if version:
+            test_results["손상된 스냅샷 거부"] = test_2_corrupted_snapshot_rejected(store, work_dir, version)
+        else:
+            print("\n❌ 스냅샷 게시 실패로 테스트 중단")
+            test_results["손상된 스냅샷 거부"] = False
+
+    # 최종 결과 요약
+    print("\n" + "=" * 80)
+    print("🎯 인덱스 스냅샷 테스트 결과 요약")
+    print("=" * 80)
+
+    for test_name, success in test_results.items():
+        print(f"  {'✅ 성공' if success else '❌ 실패'} {test_name}")
+
+    success_count = sum(test_results.values())
+    print(f"\n📊 전체 성공률: {success_count}/{len(test_results)}")
+
+    if success_count < len(test_results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+🧪 벡터 DB 갱신 테스트: upsert / 삭제 / 저장 후 로드 / 컴팩션
+
+이 파일은 재구축 없이 벡터를 갱신하는 경로를 테스트합니다 (임베딩 모델 없이 numpy/faiss만 사용):
+✅ upsert가 같은 외부 ID의 벡터와 메타데이터를 교체
+✅ 삭제 후 검색이 살아 있는 결과로 정확히 k개 반환
+✅ 저장 후 로드해도 톰스톤 유지
+✅ 컴팩션 후에도 외부 ID 유지
+✅ id가 없거나 None인 행은 서로 겹치지 않는 외부 ID 자동 생성
+"""
+import sys
+import tempfile
+from pathlib import Path
+import numpy as np
+
+# 프로젝트 루트를 Python 경로에 추가
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from utils.vector_database import VectorDatabase
+
+DIM = 32
+INDEX_TYPES = ["Flat", "IVFFlat", "HNSW"]
+
+
+def make_vectors(count: int, seed: int = 0) -> np.ndarray:
+    """정규화된 임의 벡터"""
+    vectors = np.random.default_rng(seed).standard_normal((count, DIM)).astype('float32')
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def make_db(index_type: str, count: int, work_dir: str) -> VectorDatabase:
+    """문서 count개를 넣은 벡터 DB (자동 컴팩션/마이그레이션 없음)"""
+    vector_db = VectorDatabase(index_path=str(Path(work_dir) / index_type / "faiss_index"))
+    vector_db.compaction_threshold = None
+    vector_db.create_index(DIM, index_type=index_type, vector_count=count)
+    metadata = [{'id': f"doc_{i}", 'content': f"문서 {i}", 'version': 1} for i in range(count)]
+    vector_db.add_vectors(make_vectors(count), metadata)
+    return vector_db
+
+
+def result_ids(vector_db: VectorDatabase, query: np.ndarray, k: int):
+    """검색 결과의 외부 ID 리스트"""
+    _, _, results = vector_db.search(query, k=k)
+    return [meta['id'] for meta in results]
+
+
+def test_1_upsert_replaces(work_dir: str) -> bool:
+    """1. upsert가 벡터와 메타데이터를 교체하는지 테스트"""
+    print("=" * 60)
+    print("🔁 1. upsert 교체 테스트")
+    print("=" * 60)
+
+    try:
+        success = True
+        for index_type in INDEX_TYPES:
+            vector_db = make_db(index_type, 500, work_dir)
+            new_vector = make_vectors(1, seed=99)
+
+            result = vector_db.upsert_vectors(new_vector, [{'id': "doc_7", 'content': "수정본", 'version': 2}])
+            meta = vector_db.get_metadata("doc_7")
+            top_ids = result_ids(vector_db, new_vector[0], 5)
+
+            ok = (result == {'inserted': 0, 'updated': 1}
+                  and meta['version'] == 2 and meta['content'] == "수정본"
+                  and top_ids[0] == "doc_7" and top_ids.count("doc_7") == 1
+                  and vector_db.live_count == 500)
+            print(f"  {'✅' if ok else '❌'} {index_type}: {result}, 버전 {meta['version']}, 상위 결과 {top_ids[:3]}")
+            success &= ok
+
+        return success
+
+    except Exception as e:
+        print(f"  ❌ upsert 테스트 실패: {e}")
+        return False
+
+
+def test_2_delete_then_search(work_dir: str) -> bool:
+    """2. 삭제 후 검색이 살아 있는 결과 정확히 k개를 반환하는지 테스트"""
+    print("\n" + "=" * 60)
+    print("🗑️ 2. 삭제 후 검색 테스트")
+    print("=" * 60)
+
+    try:
+        success = True
+        k = 10
+        for index_type in INDEX_TYPES:
+            vector_db = make_db(index_type, 500, work_dir)
+            query = make_vectors(1, seed=1)[0]
+
+            # 질문에 가장 가까운 문서들을 지워 삭제분이 상위 결과를 차지하게 함
+            deleted_ids = result_ids(vector_db, query, 50)
+            vector_db.delete(deleted_ids)
+            top_ids = result_ids(vector_db, query, k)
+
+            ok = (len(top_ids) == k and len(set(top_ids)) == k
+                  and not set(top_ids) & set(deleted_ids)
+                  and not vector_db.contains(deleted_ids[0]))
+            print(f"  {'✅' if ok else '❌'} {index_type}: {len(deleted_ids)}개 삭제 후 {len(top_ids)}개 결과")
+            success &= ok
+
+        return success
+
+    except Exception as e:
+        print(f"  ❌ 삭제 테스트 실패: {e}")
+        return False
+
+
+def test_3_save_load_tombstones(work_dir: str) -> bool:
+    """3. 저장 후 로드해도 톰스톤이 유지되는지 테스트"""
+    print("\n" + "=" * 60)
+    print("💾 3. 저장/로드 톰스톤 테스트")
+    print("=" * 60)
+
+    try:
+        success = True
+        for index_type in INDEX_TYPES:
+            vector_db = make_db(index_type, 500, work_dir)
+            vector_db.delete([f"doc_{i}" for i in range(0, 500, 5)])
+            vector_db.upsert_vectors(make_vectors(1, seed=7), [{'id': "doc_1", 'content': "수정본", 'version': 2}])
+            vector_db.save_index()
+
+            loaded = VectorDatabase(index_path=vector_db.index_path)
+            loaded.load_index()
+            query = make_vectors(1, seed=2)[0]
+            top_ids = result_ids(loaded, query, 20)
+
+            ok = (loaded.deleted_count == vector_db.deleted_count == 101
+                  and loaded.live_count == 400
+                  and not loaded.contains("doc_5") and loaded.contains("doc_6")
+                  and loaded.get_metadata("doc_1")['version'] == 2
+                  and len(top_ids) == 20
+                  and all(int(doc_id.split('_')[1]) % 5 for doc_id in top_ids))
+            print(f"  {'✅' if ok else '❌'} {index_type}: 톰스톤 {loaded.deleted_count}개, 살아 있는 벡터 {loaded.live_count}개")
+            success &= ok
+
+        return success
+
+    except Exception as e:
+        print(f"  ❌ 저장/로드 테스트 실패: {e}")
+        return False
+
+
+def test_4_compaction_keeps_ids(work_dir: str) -> bool:
+    """4. 컴팩션 후에도 외부 ID가 유지되는지 테스트"""
+    print("\n" + "=" * 60)
+    print("🧹 4. 컴팩션 외부 ID 테스트")
+    print("=" * 60)
+
+    try:
+        success = True
+        vectors = make_vectors(500)
+        for index_type in INDEX_TYPES:
+            vector_db = make_db(index_type, 500, work_dir)
+            vector_db.delete([f"doc_{i}" for i in range(0, 500, 2)])
+            compacted = vector_db.compact()
+
+            # 살아 있는 문서는 자기 벡터로 검색하면 자기 ID가 맨 위
+            live_ids = [f"doc_{i}" for i in range(1, 500, 2)]
+            self_hits = sum(result_ids(vector_db, vectors[int(doc_id.split('_')[1])], 1) == [doc_id]
+                            for doc_id in live_ids[:50])
+
+            ok = (compacted and vector_db.deleted_count == 0
+                  and vector_db.index.ntotal == 250
+                  and all(vector_db.contains(doc_id) for doc_id in live_ids)
+                  and not vector_db.contains("doc_0")
+                  and vector_db.get_metadata("doc_3")['content'] == "문서 3"
+                  and self_hits == 50)
+            print(f"  {'✅' if ok else '❌'} {index_type}: 컴팩션 후 {vector_db.index.ntotal}개, 자기 검색 {self_hits}/50")
+            success &= ok
+
+        return success
+
+    except Exception as e:
+        print(f"  ❌ 컴팩션 테스트 실패: {e}")
+        return False
+
+
+def test_5_missing_ids(work_dir: str) -> bool:
+    """5. id가 없거나 None인 행이 서로 덮어쓰지 않는지 테스트"""
+    print("\n" + "=" * 60)
+    print("🆔 5. 외부 ID 자동 생성 테스트")
+    print("=" * 60)
+
+    try:
+        vector_db = VectorDatabase(index_path=str(Path(work_dir) / "missing_ids" / "faiss_index"))
+        vector_db.create_index(DIM, index_type="Flat")
+        vectors = make_vectors(4, seed=5)
+        vector_db.add_vectors(vectors[:3], [{'id': None, 'content': "가"}, {'id': None, 'content': "나"},
+                                            {'content': "다"}])
+        result = vector_db.upsert_vectors(vectors[3:], [{'id': None, 'content': "라"}])
+
+        ok = (result == {'inserted': 1, 'updated': 0}
+              and vector_db.live_count == 4
+              and len(set(vector_db.external_ids)) == 4
+              and "None" not in vector_db.external_ids)
+        print(f"  {'✅' if ok else '❌'} 외부 ID {vector_db.external_ids}, 살아 있는 벡터 {vector_db.live_count}개")
+        return ok
+
+    except Exception as e:
+        print(f"  ❌ 외부 ID 테스트 실패: {e}")
+        return False
+
+
+def main():
+    """메인 테스트 실행"""
+    print("🧪 벡터 DB 갱신 테스트 시작")
+    print("=" * 80)
+
+    test_results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        test_results["upsert 교체"] = test_1_upsert_replaces(work_dir)
+        test_results["삭제 후 검색"] = test_2_delete_then_search(work_dir)
+        test_results["저장/로드 톰스톤"] = test_3_save_load_tombstones(work_dir)
+        test_results["컴팩션 외부 ID"] = test_4_compaction_keeps_ids(work_dir)
+        test_results["외부 ID 자동 생성"] = test_5_missing_ids(work_dir)
+
+    # 최종 결과 요약
+    print("\n" + "=" * 80)
+    print("🎯 벡터 DB 갱신 테스트 결과 요약")
+    print("=" * 80)
+
+    for test_name, success in test_results.items():
+        print(f"  {'✅ 성공' if success else '❌ 실패'} {test_name}")
+
+    success_count = sum(test_results.values())
+    print(f"\n📊 전체 성공률: {success_count}/{len(test_results)}")
+
+    if success_count < len(test_results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
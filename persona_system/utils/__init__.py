@@ -1,23 +1,45 @@
 """
 유틸리티 모듈
+
+torch, transformers, faiss, boto3 등 무거운 의존성을 가진 하위 모듈은
+해당 이름에 처음 접근할 때 import한다 (PEP 562 모듈 __getattr__).
 """
+import importlib
+
+# 공개 이름 -> 정의된 하위 모듈
+_LAZY_IMPORTS = {
+    "TextPreprocessor": ".text_preprocessor",
+    "EmotionAnalyzer": ".emotion_analyzer",
+    "TopicAnalyzer": ".topic_analyzer",
+    "EmbeddingCache": ".embedding_cache",
+    "QueryEmbeddingCache": ".query_cache",
+    "ModelRegistry": ".model_registry",
+    "get_model_registry": ".model_registry",
+    "NearDuplicateDetector": ".near_dedup",
+    "EmbeddingGenerator": ".embedding_generator",
+    "VectorDatabase": ".vector_database",
+    "VectorProjection": ".vector_projection",
+    "MetadataStore": ".metadata_store",
+    "StorageManager": ".storage_manager",
+    "SearchSystem": ".search_system",
+    "ShardManager": ".shard_manager",
+    "SnapshotStore": ".index_snapshots",
+    "QueryBatcher": ".query_batcher",
+    "PersonaChatbot": ".persona_chatbot",
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # 이후 접근은 일반 속성 조회
+    return value
+
 
-from .text_preprocessor import TextPreprocessor
-from .emotion_analyzer import EmotionAnalyzer
-from .topic_analyzer import TopicAnalyzer
-from .embedding_generator import EmbeddingGenerator
-from .vector_database import VectorDatabase
-from .storage_manager import StorageManager
-from .search_system import SearchSystem
-from .persona_chatbot import PersonaChatbot
-
-__all__ = [
-    "TextPreprocessor",
-    "EmotionAnalyzer", 
-    "TopicAnalyzer",
-    "EmbeddingGenerator",
-    "VectorDatabase", 
-    "StorageManager",
-    "SearchSystem",
-    "PersonaChatbot"
-] 
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,210 @@
+"""
+대용량 코퍼스 임베딩 - 프로세스 풀 샤딩
+
+입력을 샤드로 나눠 N개의 워커 프로세스에 분배한다. 각 워커는 모델을 한 번만
+로드하고 intra-op 스레드 수를 고정하며, 결과는 입력 순서대로 스트리밍된다.
+"""
+import os
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Iterator, Iterable
+import numpy as np
+from loguru import logger
+
+
+# 워커 프로세스별 임베딩 생성기 (initializer에서 한 번 생성)
+_worker_generator = None
+
+
+def _init_worker(model_name: str,
+                 num_threads: int,
+                 batch_size: int,
+                 backend: str,
+                 quantize: bool,
+                 onnx_dir: str) -> None:
+    """워커 프로세스 초기화 - 스레드 수 고정 후 모델 로드"""
+    global _worker_generator
+
+    # torch/onnxruntime가 스레드 풀을 만들기 전에 설정해야 적용된다
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(num_threads)
+
+    from .embedding_generator import EmbeddingGenerator
+
+    _worker_generator = EmbeddingGenerator(
+        model_name=model_name,
+        batch_size=batch_size,
+        backend=backend,
+        quantize=quantize,
+        onnx_dir=onnx_dir,
+        num_threads=num_threads,
+        lazy_load=False
+    )
+
+
+def _embed_shard(shard_index: int, texts: List[str]) -> Dict[str, Any]:
+    """워커에서 샤드 하나를 임베딩"""
+    try:
+        result = _worker_generator.generate_embeddings(texts)
+    except ValueError as e:
+        # 샤드 전체가 비었거나 실패한 경우 - 빈 결과로 순서를 유지
+        logger.warning(f"샤드 {shard_index} 임베딩 결과 없음: {e}")
+        result = {'embeddings': None, 'chunks': []}
+
+    return {
+        'shard_index': shard_index,
+        'embeddings': result['embeddings'],
+        'chunks': result['chunks'],
+        'pid': os.getpid()
+    }
+
+
+class BulkEmbeddingRunner:
+    """프로세스 풀 기반 대용량 임베딩 실행기"""
+
+    def __init__(self,
+                 model_name: str = "klue/roberta-base",
+                 num_workers: Optional[int] = None,
+                 threads_per_worker: Optional[int] = None,
+                 batch_size: int = 32,
+                 shard_size: int = 256,
+                 backend: str = "torch",
+                 quantize: bool = False,
+                 onnx_dir: str = "./data/onnx_models"):
+        """
+        대용량 임베딩 실행기 초기화
+
+        Args:
+            model_name: 사용할 모델명
+            num_workers: 워커 프로세스 수 (None이면 CPU 코어 수)
+            threads_per_worker: 워커별 intra-op 스레드 수 (None이면 코어 수 / 워커 수)
+            batch_size: 워커 내부 배치 크기
+            shard_size: 워커 하나에 한 번에 넘기는 텍스트 수
+            backend: 추론 백엔드 ("torch", "onnx")
+            quantize: ONNX 동적 int8 양자화 사용 여부
+            onnx_dir: ONNX 모델 저장 경로
+        """
+        cpu_count = os.cpu_count() or 1
+        self.num_workers = max(1, num_workers or cpu_count)
+        self.threads_per_worker = max(1, threads_per_worker or cpu_count // self.num_workers)
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.shard_size = max(1, shard_size)
+        self.backend = backend
+        self.quantize = quantize
+        self.onnx_dir = onnx_dir
+
+        logger.info(f"대용량 임베딩 실행기 초기화: 워커 {self.num_workers}개 x 스레드 {self.threads_per_worker}개")
+
+    def _iter_shards(self, texts: Iterable[str]) -> Iterator[List[str]]:
+        """입력 텍스트를 shard_size 단위로 분할"""
+        shard = []
+        for text in texts:
+            shard.append(text)
+            if len(shard) >= self.shard_size:
+                yield shard
+                shard = []
+        if shard:
+            yield shard
+
+    def _prepare_onnx_model(self) -> None:
+        """ONNX 백엔드면 워커 시작 전에 부모 프로세스에서 한 번만 내보내기"""
+        if self.backend != "onnx":
+            return
+
+        from .onnx_backend import OnnxEmbeddingBackend
+        target = OnnxEmbeddingBackend(self.model_name, onnx_dir=self.onnx_dir, quantize=self.quantize)
+        if target.model_path.exists():
+            return
+
+        # 여러 워커가 동시에 같은 파일을 내보내지 않도록 부모에서 먼저 생성
+        from .embedding_generator import EmbeddingGenerator
+        from .model_registry import get_model_registry
+        exporter = EmbeddingGenerator(
+            model_name=self.model_name,
+            backend=self.backend,
+            quantize=self.quantize,
+            onnx_dir=self.onnx_dir,
+            lazy_load=False
+        )
+        exporter.close()
+        get_model_registry().unload_unused()
+
+    def iter_embeddings(self, texts: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        샤드 단위 임베딩 결과를 입력 순서대로 스트리밍
+
+        동시에 처리 중인 샤드 수를 워커 수의 2배로 제한해 입력이 커도
+        메모리 사용량이 일정하게 유지된다.
+
+        Args:
+            texts: 임베딩할 텍스트 이터러블
+
+        Yields:
+            샤드 결과 딕셔너리 (shard_index, embeddings, chunks, pid)
+        """
+        self._prepare_onnx_model()
+
+        # fork 후 torch 스레드 풀 교착을 피하기 위해 spawn 사용
+        context = multiprocessing.get_context("spawn")
+        max_in_flight = self.num_workers * 2
+
+        with ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.model_name, self.threads_per_worker, self.batch_size,
+                      self.backend, self.quantize, self.onnx_dir)
+        ) as executor:
+            in_flight = deque()
+            for shard_index, shard in enumerate(self._iter_shards(texts)):
+                in_flight.append(executor.submit(_embed_shard, shard_index, shard))
+                if len(in_flight) >= max_in_flight:
+                    yield in_flight.popleft().result()
+
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def generate_embeddings(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        전체 텍스트 임베딩 (EmbeddingGenerator.generate_embeddings와 같은 형식)
+
+        Args:
+            texts: 임베딩할 텍스트 리스트
+
+        Returns:
+            임베딩 데이터 딕셔너리 (처리량 통계 포함)
+        """
+        logger.info(f"🚀 대용량 임베딩 시작: {len(texts)}개 텍스트")
+        start_time = time.perf_counter()
+
+        embedding_parts = []
+        chunks = []
+        worker_pids = set()
+
+        for shard_result in self.iter_embeddings(texts):
+            if shard_result['embeddings'] is not None:
+                embedding_parts.append(shard_result['embeddings'])
+                chunks.extend(shard_result['chunks'])
+            worker_pids.add(shard_result['pid'])
+
+        if not embedding_parts:
+            raise ValueError("모든 텍스트의 임베딩 생성에 실패했습니다.")
+
+        embeddings_array = np.vstack(embedding_parts).astype(np.float32)
+        elapsed = time.perf_counter() - start_time
+
+        logger.info(f"✅ 대용량 임베딩 완료: {len(chunks)}개, {elapsed:.1f}초 ({len(chunks) / elapsed:.1f} texts/sec)")
+
+        return {
+            'embeddings': embeddings_array,
+            'chunks': chunks,
+            'model_name': self.model_name,
+            'embedding_dim': embeddings_array.shape[1],
+            'chunk_count': len(chunks),
+            'elapsed_seconds': elapsed,
+            'texts_per_second': len(chunks) / elapsed if elapsed > 0 else None,
+            'workers_used': len(worker_pids)
+        }
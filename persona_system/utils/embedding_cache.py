@@ -0,0 +1,233 @@
+"""
+임베딩 캐시 - (모델명, 정규화 텍스트 해시) 기반 2단계 캐시
+
+메모리 LRU 계층과 디스크 계층(메모리 매핑 벡터 파일 + 키 인덱스)으로 구성된다.
+"""
+import os
+import json
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+import numpy as np
+from loguru import logger
+
+
+class EmbeddingCache:
+    """콘텐츠 주소 기반 임베딩 캐시"""
+
+    VECTORS_FILE = "vectors.f32"
+    INDEX_FILE = "index.json"
+
+    def __init__(self, cache_dir: Optional[str] = None, memory_size: int = 4096):
+        """
+        임베딩 캐시 초기화
+
+        Args:
+            cache_dir: 디스크 캐시 경로 (None이면 메모리 캐시만 사용)
+            memory_size: 메모리 LRU 계층의 최대 항목 수
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.memory_size = max(0, memory_size)
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # 디스크 계층 상태
+        self._disk_index: Dict[str, int] = {}
+        self._embedding_dim: Optional[int] = None
+        self._disk_rows = 0
+        self._disk_vectors: Optional[np.memmap] = None
+        self._dirty = False
+
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            self._load_disk_index()
+
+        logger.info(f"임베딩 캐시 초기화: 메모리 {self.memory_size}개, 디스크 {self.cache_dir or '사용 안 함'}")
+
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """캐시 키 계산용 텍스트 정규화 (유니코드 NFC + 공백 정리)"""
+        return " ".join(unicodedata.normalize("NFC", text).split())
+
+    @classmethod
+    def make_key(cls, model_name: str, text: str) -> str:
+        """(모델명, 정규화 텍스트) 해시 키 생성"""
+        payload = f"{model_name}\x00{cls.normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        캐시에서 임베딩 조회 (메모리 → 디스크 순)
+
+        Args:
+            key: make_key()로 만든 캐시 키
+
+        Returns:
+            임베딩 벡터 또는 None
+        """
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            row = self._disk_index.get(key)
+            if row is not None:
+                vector = np.array(self._get_disk_vectors()[row], dtype=np.float32)
+                self._remember(key, vector)
+                self.hits += 1
+                return vector
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """
+        임베딩을 캐시에 저장
+
+        Args:
+            key: make_key()로 만든 캐시 키
+            vector: 임베딩 벡터
+        """
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+
+        with self._lock:
+            self._remember(key, vector)
+
+            if self.cache_dir is None or key in self._disk_index:
+                return
+
+            if self._embedding_dim is None:
+                self._embedding_dim = vector.shape[0]
+            elif vector.shape[0] != self._embedding_dim:
+                logger.warning(f"캐시 차원 불일치로 디스크 저장 생략: {vector.shape[0]} != {self._embedding_dim}")
+                return
+
+            # 벡터 파일 끝에 추가하고 인덱스에 행 번호 기록
+            with open(self.cache_dir / self.VECTORS_FILE, 'ab') as f:
+                f.write(vector.tobytes())
+            self._disk_index[key] = self._disk_rows
+            self._disk_rows += 1
+            self._disk_vectors = None
+            self._dirty = True
+
+    def flush(self) -> None:
+        """디스크 키 인덱스 저장 (임시 파일 후 원자적 교체)"""
+        if self.cache_dir is None:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+
+            index_path = self.cache_dir / self.INDEX_FILE
+            tmp_path = index_path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'embedding_dim': self._embedding_dim,
+                    'rows': self._disk_rows,
+                    'keys': self._disk_index
+                }, f)
+            os.replace(tmp_path, index_path)
+            self._dirty = False
+
+        logger.debug(f"임베딩 캐시 인덱스 저장: {self._disk_rows}개")
+
+    def clear(self) -> None:
+        """캐시 전체 초기화 (디스크 포함)"""
+        with self._lock:
+            self._memory.clear()
+            self._disk_index = {}
+            self._disk_rows = 0
+            self._disk_vectors = None
+            self._embedding_dim = None
+            self._dirty = False
+            self.hits = 0
+            self.misses = 0
+
+            if self.cache_dir:
+                for name in (self.VECTORS_FILE, self.INDEX_FILE):
+                    path = self.cache_dir / name
+                    if path.exists():
+                        path.unlink()
+
+        logger.info("임베딩 캐시 초기화 완료")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'memory_entries': len(self._memory),
+            'memory_size': self.memory_size,
+            'disk_entries': len(self._disk_index),
+            'cache_dir': str(self.cache_dir) if self.cache_dir else None
+        }
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        """메모리 LRU 계층에 저장 (호출자가 lock 보유)"""
+        if self.memory_size == 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _get_disk_vectors(self) -> np.memmap:
+        """디스크 벡터 파일의 메모리 매핑 뷰 반환 (호출자가 lock 보유)"""
+        if self._disk_vectors is None:
+            self._disk_vectors = np.memmap(
+                self.cache_dir / self.VECTORS_FILE,
+                dtype=np.float32,
+                mode='r',
+                shape=(self._disk_rows, self._embedding_dim)
+            )
+        return self._disk_vectors
+
+    def _load_disk_index(self) -> None:
+        """디스크 키 인덱스 로드"""
+        index_path = self.cache_dir / self.INDEX_FILE
+        vectors_path = self.cache_dir / self.VECTORS_FILE
+        if not vectors_path.exists():
+            return
+        if not index_path.exists():
+            # 인덱스 없이 남은 벡터 파일은 행 번호를 알 수 없으므로 버린다
+            vectors_path.unlink()
+            return
+
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            self._embedding_dim = data['embedding_dim']
+            self._disk_index = data['keys']
+            self._disk_rows = data['rows']
+
+            # 인덱스 저장 이후 덧붙은 행(비정상 종료)은 잘라내 파일과 인덱스를 맞춘다
+            if self._embedding_dim:
+                expected_size = self._disk_rows * self._embedding_dim * 4
+                actual_size = vectors_path.stat().st_size
+                if actual_size < expected_size:
+                    raise ValueError(f"벡터 파일이 인덱스보다 짧습니다: {actual_size} < {expected_size}")
+                if actual_size > expected_size:
+                    with open(vectors_path, 'r+b') as f:
+                        f.truncate(expected_size)
+
+            logger.info(f"디스크 임베딩 캐시 로드: {len(self._disk_index)}개")
+
+        except Exception as e:
+            logger.error(f"디스크 임베딩 캐시 로드 실패, 새로 시작합니다: {e}")
+            self._disk_index = {}
+            self._disk_rows = 0
+            self._embedding_dim = None
+            vectors_path.unlink()
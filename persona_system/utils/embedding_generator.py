@@ -3,44 +3,143 @@
 """
 import os
 import json
+import time
+import weakref
+import threading
 import numpy as np
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Union
 from datetime import datetime
 from loguru import logger
 
-# sentence-transformers 대신 transformers 직접 사용
-from transformers import AutoTokenizer, AutoModel
-import torch
+from .embedding_cache import EmbeddingCache
+from .model_registry import get_model_registry
+from .embedding_stream import save_embeddings_stream, load_chunks_sidecar
+from .embedding_quantization import quantize_embeddings, quantization_metadata, restore_from_metadata
 
 
 class EmbeddingGenerator:
     """텍스트 임베딩 생성기 (transformers 직접 사용)"""
     
-    def __init__(self, model_name: str = "klue/roberta-base"):
+    def __init__(self,
+                 model_name: str = "klue/roberta-base",
+                 batch_size: int = 32,
+                 cache: Optional[EmbeddingCache] = None,
+                 cache_dir: Optional[str] = None,
+                 backend: str = "torch",
+                 quantize: bool = False,
+                 onnx_dir: str = "./data/onnx_models",
+                 num_threads: Optional[int] = None,
+                 use_registry: bool = True,
+                 lazy_load: bool = True):
         """
         임베딩 생성기 초기화
         
         Args:
             model_name: 사용할 모델명 (기본값: klue/roberta-base)
+            batch_size: 한 번의 forward pass에 넣을 텍스트 수 (기본값: 32)
+            cache: 사용할 임베딩 캐시 (None이면 cache_dir별 공유 캐시 사용)
+            cache_dir: 디스크 캐시 경로 (cache가 None일 때만 사용, None이면 메모리 캐시만 사용)
+            backend: 추론 백엔드 ("torch", "onnx")
+            quantize: ONNX 백엔드에서 동적 int8 양자화 사용 여부
+            onnx_dir: ONNX 모델 저장 경로
+            num_threads: intra-op 스레드 수 고정 (None이면 라이브러리 기본값)
+            use_registry: 프로세스 전역 모델 레지스트리에서 공유 모델을 받을지 여부
+                (False면 이 인스턴스 전용으로 모델을 로드)
+            lazy_load: True면 가중치를 첫 인코딩 시점에 로드 (False면 생성 시 즉시 로드)
         """
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"지원하지 않는 추론 백엔드: {backend}")
+        
         self.model_name = model_name
+        self.batch_size = max(1, batch_size)
+        self.use_registry = use_registry
+        if cache is None:
+            cache = get_model_registry().shared_cache(cache_dir) if use_registry else EmbeddingCache(cache_dir=cache_dir)
+        self.cache = cache
+        self.backend = backend
+        self.quantize = quantize
+        self.onnx_dir = onnx_dir
+        self.num_threads = num_threads
+        self.onnx_backend = None
         self.model = None
         self.tokenizer = None
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.device = None
+        self._model_handle = None
+        self._inference_lock = threading.RLock()
+        self._load_lock = threading.Lock()
         
-        logger.info(f"임베딩 생성기 초기화: {model_name}")
+        logger.info(f"임베딩 생성기 초기화: {model_name} (백엔드: {backend}{', int8' if quantize else ''})")
         logger.info(f"  - 현재 지원: ['local']")
         logger.info(f"  - 향후 지원: ['supabase', 's3', 'hybrid']")
         logger.info(f"  - 현재 단계: Phase 2 - 로컬 FAISS 완료")
         logger.info(f"  - 다음 단계: Phase 3 - 검색 시스템 구현 (로컬 FAISS)")
         logger.info(f"  - 전환 단계: Phase 4 이후 - Supabase 전환")
         
-        # 모델 로딩 시도
-        self.load_model()
+        # 모델 로딩 시도 (lazy_load면 첫 인코딩 때까지 미룸)
+        if not lazy_load:
+            self.load_model()
+    
+    @property
+    def is_loaded(self) -> bool:
+        """모델 가중치 로드 여부"""
+        return self.model is not None and self.tokenizer is not None
+    
+    def _ensure_model_loaded(self) -> None:
+        """아직 로드되지 않았으면 모델 로드 (동시 첫 호출에도 한 번만 로드)"""
+        if self.is_loaded:
+            return
+        with self._load_lock:
+            if not self.is_loaded:
+                self.load_model()
     
     def load_model(self) -> None:
+        """모델 로드 (레지스트리 사용 시 프로세스 안에서 한 번만 실제 로드)"""
+        # torch/transformers는 import 비용이 커서 실제 로드 시점에 가져온다
+        import torch
+        
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        if self.num_threads:
+            torch.set_num_threads(self.num_threads)
+        
+        if self.use_registry:
+            # 다시 로드하면 이전 핸들은 반납 (같은 생성기가 참조를 두 번 잡지 않도록)
+            if self._model_handle is not None:
+                self._model_handle.release()
+                self._model_handle = None
+            
+            variant = f"{self.backend}{'-int8' if self.quantize else ''}"
+            key = (self.model_name, variant, str(self.device))
+            handle = get_model_registry().acquire(key, self._load_model_components)
+            components = handle.components
+            
+            self._model_handle = handle
+            self._inference_lock = handle.lock
+            # 인스턴스가 close() 없이 버려져도 참조 카운트가 반납되도록 등록
+            weakref.finalize(self, handle.release)
+        else:
+            components = self._load_model_components()
+        
+        self.tokenizer = components['tokenizer']
+        self.model = components['model']
+        self.model_name = components['model_name']
+        self.onnx_backend = components['onnx_backend']
+    
+    def close(self) -> None:
+        """공유 모델 핸들 반납 (레지스트리의 참조 카운트 감소)"""
+        if self._model_handle is not None:
+            self._model_handle.release()
+            self._model_handle = None
+        self.model = None
+        self.tokenizer = None
+        self.onnx_backend = None
+    
+    def _load_model_components(self) -> Dict[str, Any]:
         """transformers 모델 로드 (PyTorch 2.2.2 호환)"""
+        # sentence-transformers 대신 transformers 직접 사용
+        from transformers import AutoTokenizer, AutoModel
+        import torch
+        
         try:
             logger.info("모델 로딩 중...")
             
@@ -87,64 +186,123 @@ class EmbeddingGenerator:
             except Exception as e2:
                 logger.error(f"대체 모델도 실패: {e2}")
                 raise
+        
+        if self.backend == "onnx":
+            self._prepare_onnx_backend()
+        
+        return {
+            'tokenizer': self.tokenizer,
+            'model': self.model,
+            'model_name': self.model_name,
+            'onnx_backend': self.onnx_backend
+        }
     
-    def generate_embeddings(self, texts: List[str]) -> Dict[str, Any]:
+    def _prepare_onnx_backend(self) -> None:
+        """ONNX 백엔드 준비 (최초 1회 내보내기 및 양자화)"""
+        from .onnx_backend import OnnxEmbeddingBackend
+        
+        self.onnx_backend = OnnxEmbeddingBackend(
+            model_name=self.model_name,
+            onnx_dir=self.onnx_dir,
+            quantize=self.quantize,
+            num_threads=self.num_threads
+        )
+        self.onnx_backend.prepare(self.model, self.tokenizer)
+        logger.info(f"ONNX 백엔드 준비 완료: {self.onnx_backend.model_path}")
+    
+    @property
+    def model_identity(self) -> str:
+        """캐시 키에 쓰는 모델 식별자 (백엔드/양자화에 따라 출력이 달라지므로 포함)"""
+        if self.onnx_backend is not None:
+            return f"{self.model_name}@onnx{'-int8' if self.quantize else ''}"
+        return self.model_name
+    
+    def generate_embeddings(self, texts: List[str], batch_size: Optional[int] = None) -> Dict[str, Any]:
         """
         텍스트 리스트로부터 임베딩 생성
         
+        길이가 비슷한 텍스트끼리 배치를 묶어 패딩을 줄이고, 배치당 한 번의
+        토크나이저/모델 호출로 임베딩을 만든 뒤 원래 순서대로 돌려준다.
+        
         Args:
             texts: 임베딩을 생성할 텍스트 리스트
+            batch_size: 배치 크기 (None이면 self.batch_size 사용)
             
         Returns:
             임베딩 데이터 딕셔너리
         """
-        if self.model is None or self.tokenizer is None:
-            raise ValueError("모델이 로드되지 않았습니다.")
+        self._ensure_model_loaded()
         
-        logger.info(f"임베딩 생성 시작: {len(texts)}개 텍스트")
+        if batch_size is None:
+            batch_size = self.batch_size
+        batch_size = max(1, batch_size)
         
-        embeddings = []
-        chunks = []
+        logger.info(f"임베딩 생성 시작: {len(texts)}개 텍스트 (배치 크기: {batch_size})")
         
-        for i, text in enumerate(texts):
+        # 빈 텍스트 제외
+        valid_indices = [i for i, text in enumerate(texts) if text and text.strip()]
+        
+        results: Dict[int, np.ndarray] = {}
+        
+        # 캐시 조회 - 미스만 모델로 보낸다 (같은 호출 안의 중복 텍스트도 한 번만 인코딩)
+        cache_keys = {i: EmbeddingCache.make_key(self.model_identity, texts[i]) for i in valid_indices}
+        pending: Dict[str, List[int]] = {}
+        cache_hits = 0
+        for i in valid_indices:
+            key = cache_keys[i]
+            if key in pending:
+                pending[key].append(i)
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[i] = cached
+                cache_hits += 1
+            else:
+                pending[key] = [i]
+        
+        # 길이순 정렬 (패딩 최소화)
+        miss_indices = sorted((members[0] for members in pending.values()), key=lambda i: len(texts[i]))
+        if valid_indices:
+            logger.info(f"임베딩 캐시: 히트 {cache_hits}개, 미스 {len(miss_indices)}개")
+        
+        for start in range(0, len(miss_indices), batch_size):
+            batch_indices = miss_indices[start:start + batch_size]
+            batch_texts = [texts[i] for i in batch_indices]
+            
             try:
-                # 텍스트 전처리
-                if not text or not text.strip():
-                    continue
-                
-                # 토크나이징
-                inputs = self.tokenizer(
-                    text,
-                    return_tensors="pt",
-                    max_length=512,
-                    truncation=True,
-                    padding=True
-                )
-                
-                # 디바이스로 이동
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
-                
-                # 임베딩 생성 (그래디언트 계산 비활성화)
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
-                    # [CLS] 토큰의 임베딩 사용 (문장 전체 표현)
-                    embedding = outputs.last_hidden_state[:, 0, :].cpu().numpy()
-                    embeddings.append(embedding.flatten())
-                    chunks.append(text)
-                
-                logger.debug(f"텍스트 {i+1}/{len(texts)} 임베딩 생성 완료")
+                batch_embeddings = self._encode_batch(batch_texts)
+                for i, embedding in zip(batch_indices, batch_embeddings):
+                    results[i] = embedding
+                logger.debug(f"배치 {start // batch_size + 1} 임베딩 생성 완료: {len(batch_texts)}개")
                 
             except Exception as e:
-                logger.error(f"❌ 텍스트 {i+1} 임베딩 생성 실패: {e}")
-                import traceback
-                logger.error(f"상세 오류: {traceback.format_exc()}")
+                # 배치 실패 시 텍스트 단위로 재시도하여 실패를 격리
+                logger.warning(f"배치 임베딩 실패, 개별 처리로 전환: {e}")
+                for i in batch_indices:
+                    try:
+                        results[i] = self._encode_batch([texts[i]])[0]
+                    except Exception as e2:
+                        logger.error(f"❌ 텍스트 {i+1} 임베딩 생성 실패: {e2}")
+                        import traceback
+                        logger.error(f"상세 오류: {traceback.format_exc()}")
+        
+        # 새로 만든 임베딩을 캐시에 저장하고 중복 텍스트에 복사
+        for i in miss_indices:
+            if i not in results:
                 continue
+            members = pending[cache_keys[i]]
+            self.cache.put(cache_keys[i], results[i])
+            for j in members[1:]:
+                results[j] = results[i]
+        self.cache.flush()
         
-        if not embeddings:
+        if not results:
             raise ValueError("모든 텍스트의 임베딩 생성에 실패했습니다.")
         
-        # NumPy 배열로 변환
-        embeddings_array = np.array(embeddings, dtype=np.float32)
+        # 원래 순서로 복원
+        ordered_indices = sorted(results)
+        embeddings_array = np.stack([results[i] for i in ordered_indices]).astype(np.float32)
+        chunks = [texts[i] for i in ordered_indices]
         
         logger.info(f"임베딩 생성 완료: {len(embeddings_array)}개, 차원: {embeddings_array.shape[1]}")
         
@@ -153,34 +311,206 @@ class EmbeddingGenerator:
             'chunks': chunks,
             'model_name': self.model_name,
             'embedding_dim': embeddings_array.shape[1],
-            'chunk_count': len(chunks)
+            'chunk_count': len(chunks),
+            'cache_hits': cache_hits,
+            'cache_misses': len(miss_indices)
         }
     
-    def save_embeddings(self, embeddings_data: Dict[str, Any], save_path: str, storage_type: str = "local", user_id: str = None) -> None:
+    def generate_embeddings_iter(self,
+                                 texts: Iterable[str],
+                                 batch_size: Optional[int] = None,
+                                 window_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        텍스트 이터러블을 윈도우 단위로 임베딩해 배치별로 yield
+        
+        전체 코퍼스를 메모리에 올리지 않고 처리할 때 사용한다. 각 윈도우 안에서는
+        generate_embeddings와 같은 길이 정렬 배치/캐시/실패 격리가 적용된다.
+        save_embeddings()에 그대로 넘기면 .npy 파일로 바로 기록된다.
+        
+        Args:
+            texts: 임베딩할 텍스트 이터러블 (제너레이터 가능)
+            batch_size: 배치 크기 (None이면 self.batch_size 사용)
+            window_size: 한 번에 읽어 정렬할 텍스트 수 (None이면 배치 크기의 8배)
+            
+        Yields:
+            'embeddings', 'chunks' 키를 가진 배치 딕셔너리
+        """
+        if batch_size is None:
+            batch_size = self.batch_size
+        if window_size is None:
+            window_size = batch_size * 8
+        
+        window = []
+        for text in texts:
+            window.append(text)
+            if len(window) >= window_size:
+                batch = self._embed_window(window, batch_size)
+                if batch is not None:
+                    yield batch
+                window = []
+        
+        if window:
+            batch = self._embed_window(window, batch_size)
+            if batch is not None:
+                yield batch
+    
+    def _embed_window(self, window: List[str], batch_size: int) -> Optional[Dict[str, Any]]:
+        """윈도우 하나 임베딩 (전부 실패하면 None)"""
+        try:
+            result = self.generate_embeddings(window, batch_size=batch_size)
+        except ValueError as e:
+            logger.warning(f"임베딩 윈도우 건너뜀: {e}")
+            return None
+        
+        return {
+            'embeddings': result['embeddings'],
+            'chunks': result['chunks']
+        }
+    
+    def _encode_batch(self, batch_texts: List[str]) -> np.ndarray:
+        """
+        텍스트 배치를 한 번의 forward pass로 인코딩
+        
+        Args:
+            batch_texts: 인코딩할 텍스트 배치
+            
+        Returns:
+            [CLS] 토큰 임베딩 배열 (배치 크기 x 차원)
+        """
+        with self._inference_lock:
+            if self.onnx_backend is not None:
+                return self._encode_batch_onnx(batch_texts)
+            return self._encode_batch_torch(batch_texts)
+    
+    def _encode_batch_torch(self, batch_texts: List[str]) -> np.ndarray:
+        """PyTorch 모델로 배치 인코딩"""
+        import torch
+        
+        # 토크나이징 (배치 내 최대 길이로 패딩)
+        inputs = self.tokenizer(
+            batch_texts,
+            return_tensors="pt",
+            max_length=512,
+            truncation=True,
+            padding=True
+        )
+        
+        # 디바이스로 이동
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        
+        # 임베딩 생성 (그래디언트 계산 비활성화)
+        with torch.no_grad():
+            outputs = self.model(**inputs)
+            # [CLS] 토큰의 임베딩 사용 (문장 전체 표현)
+            return outputs.last_hidden_state[:, 0, :].cpu().numpy()
+    
+    def _encode_batch_onnx(self, batch_texts: List[str]) -> np.ndarray:
+        """ONNX Runtime 세션으로 배치 인코딩"""
+        inputs = self.tokenizer(
+            batch_texts,
+            return_tensors="np",
+            max_length=512,
+            truncation=True,
+            padding=True
+        )
+        return self.onnx_backend.encode(inputs)
+    
+    def check_backend_parity(self, texts: List[str], batch_size: Optional[int] = None) -> Dict[str, Any]:
+        """
+        ONNX 백엔드와 PyTorch 백엔드의 출력 일치도 점검
+        
+        Args:
+            texts: 비교에 사용할 텍스트 리스트
+            batch_size: 배치 크기 (None이면 self.batch_size 사용)
+            
+        Returns:
+            코사인 유사도 및 처리 시간 비교 결과
+        """
+        self._ensure_model_loaded()
+        if self.onnx_backend is None:
+            raise ValueError("ONNX 백엔드가 준비되지 않았습니다. backend='onnx'로 생성하세요.")
+        
+        if batch_size is None:
+            batch_size = self.batch_size
+        texts = [text for text in texts if text and text.strip()]
+        if not texts:
+            raise ValueError("비교할 텍스트가 없습니다.")
+        
+        def _run(encode_fn):
+            start_time = time.perf_counter()
+            parts = [encode_fn(texts[i:i + batch_size]) for i in range(0, len(texts), batch_size)]
+            return np.vstack(parts).astype(np.float32), time.perf_counter() - start_time
+        
+        with self._inference_lock:
+            torch_embeddings, torch_seconds = _run(self._encode_batch_torch)
+            onnx_embeddings, onnx_seconds = _run(self._encode_batch_onnx)
+        
+        torch_norm = torch_embeddings / np.linalg.norm(torch_embeddings, axis=1, keepdims=True)
+        onnx_norm = onnx_embeddings / np.linalg.norm(onnx_embeddings, axis=1, keepdims=True)
+        cosines = np.sum(torch_norm * onnx_norm, axis=1)
+        
+        report = {
+            'backend': self.model_identity,
+            'text_count': len(texts),
+            'mean_cosine': float(cosines.mean()),
+            'min_cosine': float(cosines.min()),
+            'torch_seconds': torch_seconds,
+            'onnx_seconds': onnx_seconds,
+            'speedup': torch_seconds / onnx_seconds if onnx_seconds > 0 else None
+        }
+        
+        logger.info(f"백엔드 일치도: 평균 코사인 {report['mean_cosine']:.4f}, 최소 {report['min_cosine']:.4f}")
+        logger.info(f"  - torch {torch_seconds:.3f}s, onnx {onnx_seconds:.3f}s")
+        
+        return report
+    
+    def save_embeddings(self,
+                        embeddings_data: Union[Dict[str, Any], Iterable[Dict[str, Any]]],
+                        save_path: str,
+                        storage_type: str = "local",
+                        user_id: str = None,
+                        precision: str = "float32") -> None:
         """
         임베딩 데이터 저장
         
         Args:
-            embeddings_data: 저장할 임베딩 데이터
+            embeddings_data: 저장할 임베딩 데이터 (generate_embeddings 결과 또는
+                generate_embeddings_iter 배치 스트림)
             save_path: 저장 경로
             storage_type: 저장소 타입 (현재는 local만 지원)
             user_id: 사용자 ID (향후 확장용)
+            precision: 저장 정밀도 ("float32", "float16", "int8")
         """
+        if not isinstance(embeddings_data, dict):
+            # 배치 스트림은 메모리에 모으지 않고 파일에 바로 기록
+            if storage_type != "local":
+                logger.warning(f"저장소 타입 '{storage_type}'은 아직 지원되지 않습니다. 로컬 저장을 사용합니다.")
+            if precision != "float32":
+                # 차원별 범위를 미리 알 수 없으므로 스트리밍 저장은 float32만 지원
+                logger.warning(f"스트리밍 저장은 float32만 지원합니다. '{precision}' 대신 float32로 저장합니다.")
+            save_embeddings_stream(embeddings_data, save_path, self.model_identity, user_id)
+            return
+        
         if storage_type == "local":
-            self._save_local_embeddings(embeddings_data, save_path, user_id)
+            self._save_local_embeddings(embeddings_data, save_path, user_id, precision)
         else:
             logger.warning(f"저장소 타입 '{storage_type}'은 아직 지원되지 않습니다. 로컬 저장을 사용합니다.")
-            self._save_local_embeddings(embeddings_data, save_path, user_id)
+            self._save_local_embeddings(embeddings_data, save_path, user_id, precision)
     
-    def _save_local_embeddings(self, embeddings_data: Dict[str, Any], save_path: str, user_id: str = None) -> None:
+    def _save_local_embeddings(self,
+                               embeddings_data: Dict[str, Any],
+                               save_path: str,
+                               user_id: str = None,
+                               precision: str = "float32") -> None:
         """로컬 파일 시스템에 임베딩 저장"""
         try:
             save_path = Path(save_path)
             save_path.parent.mkdir(parents=True, exist_ok=True)
             
-            # 임베딩 벡터 저장 (.npy)
+            # 임베딩 벡터 저장 (.npy, 요청한 정밀도로 변환)
             embeddings_path = save_path.with_suffix('.npy')
-            np.save(embeddings_path, embeddings_data['embeddings'])
+            quantized = quantize_embeddings(embeddings_data['embeddings'], precision)
+            np.save(embeddings_path, quantized['data'])
             
             # 메타데이터 저장 (.json)
             metadata = {
@@ -190,9 +520,15 @@ class EmbeddingGenerator:
                 'chunk_count': embeddings_data['chunk_count'],
                 'created_at': datetime.now().isoformat(),
                 'storage_type': 'local',
-                'user_id': user_id
+                'user_id': user_id,
+                **quantization_metadata(quantized, embeddings_data['embeddings'])
             }
             
+            if 'reconstruction_error' in metadata:
+                error = metadata['reconstruction_error']
+                logger.info(f"{precision} 저장 복원 오차: 평균 {error['mean_abs_error']:.6f}, "
+                            f"평균 코사인 {error['mean_cosine']:.6f}")
+            
             metadata_path = save_path.with_suffix('.json')
             with open(metadata_path, 'w', encoding='utf-8') as f:
                 json.dump(metadata, f, ensure_ascii=False, indent=2)
@@ -225,24 +561,31 @@ class EmbeddingGenerator:
         try:
             load_path = Path(load_path)
             
-            # 임베딩 벡터 로드 (.npy)
-            embeddings_path = load_path.with_suffix('.npy')
-            embeddings = np.load(embeddings_path)
-            
             # 메타데이터 로드 (.json)
             metadata_path = load_path.with_suffix('.json')
             with open(metadata_path, 'r', encoding='utf-8') as f:
                 metadata = json.load(f)
             
+            # 임베딩 벡터 로드 (.npy) - 스트리밍 저장본은 메모리 매핑으로 연다
+            embeddings_path = load_path.with_suffix('.npy')
+            if 'chunks_file' in metadata:
+                embeddings = np.load(embeddings_path, mmap_mode='r')
+                chunks = load_chunks_sidecar(load_path.parent / metadata['chunks_file'])
+            else:
+                # float16/int8로 저장된 경우 float32로 복원
+                embeddings = restore_from_metadata(np.load(embeddings_path), metadata)
+                chunks = metadata['chunks']
+            
             # 데이터 통합
             result = {
                 'embeddings': embeddings,
-                'chunks': metadata['chunks'],
+                'chunks': chunks,
                 'model_name': metadata['model_name'],
                 'embedding_dim': metadata['embedding_dim'],
                 'chunk_count': metadata['chunk_count'],
                 'created_at': metadata.get('created_at'),
-                'storage_type': metadata.get('storage_type', 'local')
+                'storage_type': metadata.get('storage_type', 'local'),
+                'storage_precision': metadata.get('storage_precision', 'float32')
             }
             
             logger.info(f"임베딩 로드 완료: {embeddings_path}, {metadata_path}")
@@ -0,0 +1,139 @@
+"""
+임베딩 저장 정밀도 변환 - float16 / 차원별 int8 스칼라 양자화
+
+int8은 차원마다 [min, max] 구간을 [-127, 127]에 선형 매핑하고, 복원에 필요한
+scale/offset을 메타데이터와 함께 저장한다.
+"""
+from typing import Dict, Any, Optional
+import numpy as np
+
+
+SUPPORTED_PRECISIONS = ("float32", "float16", "int8")
+
+_STORAGE_DTYPES = {
+    "float32": np.float32,
+    "float16": np.float16,
+    "int8": np.int8,
+}
+
+
+def storage_dtype(precision: str) -> np.dtype:
+    """저장 정밀도에 해당하는 numpy dtype 반환"""
+    if precision not in _STORAGE_DTYPES:
+        raise ValueError(f"지원하지 않는 저장 정밀도: {precision} (지원: {SUPPORTED_PRECISIONS})")
+    return np.dtype(_STORAGE_DTYPES[precision])
+
+
+def quantize_embeddings(embeddings: np.ndarray, precision: str = "float32") -> Dict[str, Any]:
+    """
+    임베딩을 저장용 정밀도로 변환
+
+    Args:
+        embeddings: (N x 차원) float 임베딩
+        precision: "float32", "float16", "int8"
+
+    Returns:
+        'data'(저장할 배열), 'precision', 'scale', 'offset'(int8만) 딕셔너리
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    dtype = storage_dtype(precision)
+
+    if precision != "int8":
+        return {'data': embeddings.astype(dtype), 'precision': precision, 'scale': None, 'offset': None}
+
+    if embeddings.ndim != 2 or len(embeddings) == 0:
+        raise ValueError(f"int8 양자화에는 비어 있지 않은 2차원 배열이 필요합니다: {embeddings.shape}")
+
+    mins = embeddings.min(axis=0)
+    maxs = embeddings.max(axis=0)
+    offset = (maxs + mins) / 2
+    # 값이 모두 같은 차원은 scale 0이 되지 않도록 보정
+    scale = np.maximum((maxs - mins) / 254.0, np.finfo(np.float32).tiny)
+
+    codes = np.clip(np.rint((embeddings - offset) / scale), -127, 127).astype(np.int8)
+
+    return {
+        'data': codes,
+        'precision': precision,
+        'scale': scale.astype(np.float32),
+        'offset': offset.astype(np.float32)
+    }
+
+
+def dequantize_embeddings(data: np.ndarray,
+                          precision: str = "float32",
+                          scale: Optional[np.ndarray] = None,
+                          offset: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    저장된 배열을 float32 임베딩으로 복원
+
+    Args:
+        data: 저장된 배열
+        precision: 저장 정밀도
+        scale: int8 차원별 scale
+        offset: int8 차원별 offset
+
+    Returns:
+        float32 임베딩
+    """
+    storage_dtype(precision)
+
+    if precision != "int8":
+        return np.asarray(data, dtype=np.float32)
+
+    if scale is None or offset is None:
+        raise ValueError("int8 임베딩 복원에는 scale과 offset이 필요합니다.")
+
+    scale = np.asarray(scale, dtype=np.float32)
+    offset = np.asarray(offset, dtype=np.float32)
+    return np.asarray(data, dtype=np.float32) * scale + offset
+
+
+def reconstruction_error(original: np.ndarray, restored: np.ndarray) -> Dict[str, float]:
+    """
+    양자화 전후 오차 계산
+
+    Args:
+        original: 원본 float32 임베딩
+        restored: 복원된 임베딩
+
+    Returns:
+        평균/최대 절대 오차와 평균/최소 코사인 유사도
+    """
+    original = np.asarray(original, dtype=np.float32)
+    restored = np.asarray(restored, dtype=np.float32)
+
+    abs_error = np.abs(original - restored)
+    norms = np.linalg.norm(original, axis=1) * np.linalg.norm(restored, axis=1)
+    cosines = np.sum(original * restored, axis=1) / np.maximum(norms, np.finfo(np.float32).tiny)
+
+    return {
+        'mean_abs_error': float(abs_error.mean()),
+        'max_abs_error': float(abs_error.max()),
+        'mean_cosine': float(cosines.mean()),
+        'min_cosine': float(cosines.min())
+    }
+
+
+def quantization_metadata(quantized: Dict[str, Any], original: np.ndarray) -> Dict[str, Any]:
+    """JSON 메타데이터에 기록할 정밀도 정보 (scale/offset, 복원 오차)"""
+    if quantized['precision'] == "float32":
+        return {'storage_precision': "float32"}
+
+    restored = dequantize_embeddings(quantized['data'], quantized['precision'],
+                                     quantized['scale'], quantized['offset'])
+    return {
+        'storage_precision': quantized['precision'],
+        'quant_scale': quantized['scale'].tolist() if quantized['scale'] is not None else None,
+        'quant_offset': quantized['offset'].tolist() if quantized['offset'] is not None else None,
+        'reconstruction_error': reconstruction_error(original, restored)
+    }
+
+
+def restore_from_metadata(data: np.ndarray, metadata: Dict[str, Any]) -> np.ndarray:
+    """메타데이터의 정밀도 정보로 저장 배열 복원 (정보가 없으면 float32로 간주)"""
+    precision = metadata.get('storage_precision', "float32")
+    if precision == "float32":
+        return data
+
+    return dequantize_embeddings(data, precision, metadata.get('quant_scale'), metadata.get('quant_offset'))
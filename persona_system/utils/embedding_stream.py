@@ -0,0 +1,145 @@
+"""
+스트리밍 임베딩 저장 - 전체 코퍼스를 메모리에 올리지 않고 .npy 파일로 기록
+
+벡터는 .npy 파일 끝에 배치 단위로 이어 쓰고(헤더의 행 수는 마지막에 갱신),
+청크 텍스트는 한 줄에 하나씩 .chunks.jsonl 사이드카에 기록한다.
+"""
+import json
+import struct
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, Iterable, Optional
+import numpy as np
+from loguru import logger
+
+
+# .npy v1.0 헤더 전체 길이 (행 수가 바뀌어도 같은 길이로 다시 쓸 수 있도록 고정)
+_NPY_HEADER_SIZE = 128
+
+
+class NpyStreamWriter:
+    """행 단위로 이어 쓰는 float32 2차원 .npy 파일 작성기"""
+
+    def __init__(self, path: str):
+        """
+        스트림 작성기 초기화
+
+        Args:
+            path: 기록할 .npy 파일 경로
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rows = 0
+        self.dim: Optional[int] = None
+        self._file = open(self.path, 'wb')
+        self._write_header()
+
+    def _write_header(self) -> None:
+        """현재 행 수로 .npy 헤더 기록 (고정 길이로 패딩)"""
+        header = "{'descr': '<f4', 'fortran_order': False, 'shape': (%d, %d), }" % (self.rows, self.dim or 0)
+        prefix_size = 10  # magic(6) + version(2) + header_len(2)
+        header = header.ljust(_NPY_HEADER_SIZE - prefix_size - 1) + "\n"
+
+        self._file.seek(0)
+        self._file.write(b'\x93NUMPY\x01\x00')
+        self._file.write(struct.pack('<H', len(header)))
+        self._file.write(header.encode('latin1'))
+
+    def write(self, embeddings: np.ndarray) -> None:
+        """
+        임베딩 배치를 파일 끝에 추가
+
+        Args:
+            embeddings: (배치 크기 x 차원) 임베딩 배열
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype='<f4')
+        if embeddings.ndim != 2:
+            raise ValueError(f"2차원 배열만 기록할 수 있습니다: {embeddings.shape}")
+
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"임베딩 차원 불일치: {embeddings.shape[1]} != {self.dim}")
+
+        self._file.seek(0, 2)
+        self._file.write(embeddings.tobytes())
+        self.rows += embeddings.shape[0]
+
+    def close(self) -> None:
+        """최종 행 수로 헤더를 갱신하고 파일 닫기"""
+        if self._file.closed:
+            return
+        self._write_header()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def save_embeddings_stream(batches: Iterable[Dict[str, Any]],
+                           save_path: str,
+                           model_name: str,
+                           user_id: str = None) -> Dict[str, Any]:
+    """
+    배치 스트림을 .npy + .chunks.jsonl + .json 메타데이터로 저장
+
+    Args:
+        batches: 'embeddings', 'chunks' 키를 가진 배치 딕셔너리 이터러블
+            (EmbeddingGenerator.generate_embeddings_iter, BulkEmbeddingRunner.iter_embeddings 출력)
+        save_path: 저장 경로 (확장자는 자동으로 붙음)
+        model_name: 임베딩 모델명
+        user_id: 사용자 ID
+
+    Returns:
+        저장 결과 요약 (경로, 청크 수, 차원)
+    """
+    save_path = Path(save_path)
+    embeddings_path = save_path.with_suffix('.npy')
+    chunks_path = save_path.with_suffix('.chunks.jsonl')
+    metadata_path = save_path.with_suffix('.json')
+
+    chunk_count = 0
+    with NpyStreamWriter(embeddings_path) as writer, open(chunks_path, 'w', encoding='utf-8') as chunks_file:
+        for batch in batches:
+            embeddings = batch.get('embeddings')
+            if embeddings is None or len(embeddings) == 0:
+                continue
+
+            if len(embeddings) != len(batch['chunks']):
+                raise ValueError("임베딩과 청크의 개수가 일치하지 않습니다.")
+
+            writer.write(embeddings)
+            for chunk in batch['chunks']:
+                chunks_file.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+            chunk_count += len(embeddings)
+
+    metadata = {
+        'chunks_file': chunks_path.name,
+        'model_name': model_name,
+        'embedding_dim': writer.dim,
+        'chunk_count': chunk_count,
+        'created_at': datetime.now().isoformat(),
+        'storage_type': 'local',
+        'user_id': user_id
+    }
+    with open(metadata_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+
+    logger.info(f"스트리밍 임베딩 저장 완료: {embeddings_path} ({chunk_count}개)")
+
+    return {
+        'embeddings_path': str(embeddings_path),
+        'chunks_path': str(chunks_path),
+        'metadata_path': str(metadata_path),
+        'chunk_count': chunk_count,
+        'embedding_dim': writer.dim
+    }
+
+
+def load_chunks_sidecar(chunks_path: str) -> list:
+    """.chunks.jsonl 사이드카에서 청크 리스트 로드"""
+    with open(chunks_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
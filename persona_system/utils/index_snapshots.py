@@ -0,0 +1,315 @@
+"""
+인덱스 스냅샷 저장소 - 버전별 디렉토리, 매니페스트/체크섬, 원자적 게시
+
+스냅샷 하나는 인덱스 파일 묶음(.faiss, .metadb, .filters, .json, 투영)을 담은 디렉토리다.
+임시 디렉토리에 모두 쓰고 매니페스트(파일별 크기와 SHA-256)를 기록한 뒤 디렉토리 이름을
+바꿔 게시하고, 마지막으로 CURRENT 포인터 파일을 교체한다. 게시된 스냅샷은 다시 쓰지
+않으므로 읽는 쪽은 반쯤 쓰인 파일 쌍을 볼 수 없다.
+"""
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import time
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+from loguru import logger
+
+from .vector_database import VectorDatabase
+
+
+# 스냅샷 디렉토리 안의 인덱스 파일 이름 (확장자 제외)
+SNAPSHOT_INDEX_NAME = "faiss_index"
+MANIFEST_NAME = "MANIFEST.json"
+CURRENT_NAME = "CURRENT"
+
+# 매니페스트 형식 버전
+MANIFEST_VERSION = 1
+
+_VERSION_PREFIX = "v"
+_TMP_PREFIX = ".tmp-"
+_CHUNK_BYTES = 1024 * 1024
+_STALE_TMP_SECONDS = 3600  # 이보다 오래된 임시 디렉토리는 중단된 게시로 보고 정리
+
+
+def _sha256(path: Path) -> str:
+    """파일 SHA-256 (1MB 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_BYTES), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fsync_dir(path: Path) -> None:
+    """디렉토리 항목(이름 변경)을 디스크에 반영 (지원하지 않는 플랫폼은 무시)"""
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    """임시 파일에 쓰고 fsync한 뒤 교체"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path.parent)
+
+
+class SnapshotStore:
+    """버전별 인덱스 스냅샷 디렉토리와 CURRENT 포인터 관리"""
+
+    def __init__(self, root_path: str = "./data/snapshots", keep: int = 3):
+        """
+        스냅샷 저장소 초기화
+
+        Args:
+            root_path: 스냅샷 루트 디렉토리
+            keep: 게시 후 남길 최근 스냅샷 수 (CURRENT는 항상 유지, 0이면 정리 안 함)
+        """
+        self.root_path = Path(root_path)
+        self.root_path.mkdir(parents=True, exist_ok=True)
+        self.keep = keep
+        self._lock = threading.Lock()  # 같은 프로세스의 게시/정리 직렬화
+
+        logger.info(f"스냅샷 저장소 초기화: {self.root_path} (최근 {keep}개 유지)")
+
+    def _snapshot_dir(self, version: str) -> Path:
+        return self.root_path / version
+
+    def versions(self) -> List[str]:
+        """게시된 스냅샷 버전 목록 (오래된 순)"""
+        return sorted(path.name for path in self.root_path.iterdir()
+                      if path.is_dir() and path.name.startswith(_VERSION_PREFIX)
+                      and (path / MANIFEST_NAME).exists())
+
+    def current_version(self) -> Optional[str]:
+        """CURRENT가 가리키는 스냅샷 버전 (없으면 None)"""
+        current_path = self.root_path / CURRENT_NAME
+        if not current_path.exists():
+            return None
+        version = current_path.read_text(encoding='utf-8').strip()
+        return version or None
+
+    def _next_version(self) -> str:
+        """다음 스냅샷 버전 이름 (v000001, v000002, ...)"""
+        versions = [path.name for path in self.root_path.iterdir()
+                    if path.name.startswith(_VERSION_PREFIX) and path.name[1:].isdigit()]
+        last = max((int(version[1:]) for version in versions), default=0)
+        return f"{_VERSION_PREFIX}{last + 1:06d}"
+
+    def publish(self, vector_db: VectorDatabase, make_current: bool = True) -> str:
+        """
+        벡터 DB를 새 스냅샷으로 게시
+
+        임시 디렉토리에 인덱스 파일과 매니페스트를 쓰고 fsync한 뒤 버전 디렉토리로
+        이름을 바꾸고, CURRENT를 교체한다. 도중에 실패하면 임시 디렉토리를 지우며
+        기존 스냅샷과 CURRENT는 그대로다.
+
+        Args:
+            vector_db: 게시할 벡터 DB
+            make_current: 게시 후 CURRENT를 새 스냅샷으로 바꿀지 여부
+
+        Returns:
+            게시된 스냅샷 버전
+        """
+        if vector_db.index is None:
+            raise ValueError("인덱스가 없는 벡터 DB는 게시할 수 없습니다.")
+
+        tmp_dir = self.root_path / f"{_TMP_PREFIX}{uuid.uuid4().hex}"
+        tmp_dir.mkdir()
+        try:
+            vector_db.write_snapshot(str(tmp_dir / SNAPSHOT_INDEX_NAME))
+
+            files = {}
+            for path in sorted(tmp_dir.iterdir()):
+                with open(path, 'rb') as f:
+                    os.fsync(f.fileno())
+                files[path.name] = {'bytes': path.stat().st_size, 'sha256': _sha256(path)}
+
+            with self._lock:
+                version = self._next_version()
+                manifest = {
+                    'manifest_version': MANIFEST_VERSION,
+                    'version': version,
+                    'created_at': datetime.now().isoformat(),
+                    'index_name': SNAPSHOT_INDEX_NAME,
+                    'index_type': vector_db.get_index_stats().get('index_type'),
+                    'total_vectors': vector_db.index.ntotal,
+                    'live_vectors': vector_db.live_count,
+                    'files': files
+                }
+                _write_atomic(tmp_dir / MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False, indent=2))
+                _fsync_dir(tmp_dir)
+
+                # 디렉토리 이름 변경으로 게시 (같은 이름이 있으면 실패하므로 덮어쓰지 않음)
+                os.rename(tmp_dir, self._snapshot_dir(version))
+                _fsync_dir(self.root_path)
+
+                if make_current:
+                    _write_atomic(self.root_path / CURRENT_NAME, version)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        logger.info(f"스냅샷 게시 완료: {version} ({manifest['live_vectors']}개 벡터, 파일 {len(files)}개)")
+        if self.keep:
+            self.prune(self.keep)
+        return version
+
+    def set_current(self, version: str, verify: bool = True) -> None:
+        """
+        CURRENT를 지정한 스냅샷으로 교체 (롤백용)
+
+        Args:
+            version: 게시된 스냅샷 버전
+            verify: 교체 전에 체크섬을 검사할지 여부 (손상된 스냅샷이면 CURRENT는 그대로)
+
+        Raises:
+            ValueError: 스냅샷 파일이 매니페스트와 다름
+        """
+        if verify:
+            self.verify(version)
+        else:
+            self.read_manifest(version)
+        with self._lock:
+            _write_atomic(self.root_path / CURRENT_NAME, version)
+        logger.info(f"CURRENT 스냅샷 변경: {version}")
+
+    def resolve(self, version: Optional[str] = None) -> str:
+        """버전 지정이 없으면 CURRENT 버전 (게시된 스냅샷이 없으면 FileNotFoundError)"""
+        version = version or self.current_version()
+        if version is None:
+            raise FileNotFoundError(f"게시된 스냅샷이 없습니다: {self.root_path}")
+        return version
+
+    def read_manifest(self, version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        스냅샷 매니페스트 읽기
+
+        Args:
+            version: 스냅샷 버전 (None이면 CURRENT)
+
+        Returns:
+            매니페스트 딕셔너리
+        """
+        manifest_path = self._snapshot_dir(self.resolve(version)) / MANIFEST_NAME
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"스냅샷 매니페스트를 찾을 수 없습니다: {manifest_path}")
+
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('manifest_version', 0) > MANIFEST_VERSION:
+            raise ValueError(f"지원하지 않는 스냅샷 매니페스트 버전: {manifest['manifest_version']}")
+        return manifest
+
+    def verify(self, version: Optional[str] = None) -> Dict[str, Any]:
+        """
+        스냅샷 파일의 크기와 체크섬 검사
+
+        Args:
+            version: 스냅샷 버전 (None이면 CURRENT)
+
+        Returns:
+            매니페스트 딕셔너리
+
+        Raises:
+            ValueError: 파일이 없거나 크기/체크섬이 매니페스트와 다름
+        """
+        manifest = self.read_manifest(version)
+        snapshot_dir = self._snapshot_dir(manifest['version'])
+        for name, expected in manifest['files'].items():
+            path = snapshot_dir / name
+            if not path.exists():
+                raise ValueError(f"스냅샷 파일이 없습니다: {path}")
+            if path.stat().st_size != expected['bytes'] or _sha256(path) != expected['sha256']:
+                raise ValueError(f"스냅샷 파일 체크섬 불일치: {path}")
+        return manifest
+
+    def load(self,
+             version: Optional[str] = None,
+             index_path: Optional[str] = None,
+             mmap: bool = False,
+             verify: bool = True) -> VectorDatabase:
+        """
+        스냅샷을 새 VectorDatabase로 로드
+
+        Args:
+            version: 스냅샷 버전 (None이면 CURRENT)
+            index_path: 로드한 DB의 작업 경로 (이후 save_index 기본 경로, None이면 저장소의
+                        working/<버전>) - 게시된 스냅샷 파일은 덮어쓰지 않음
+            mmap: 인덱스를 메모리 매핑으로 로드할지 여부 (스냅샷 파일은 바뀌지 않으므로 안전)
+            verify: 로드 전에 체크섬을 검사할지 여부
+
+        Returns:
+            로드된 벡터 DB (vector_db.snapshot_version에 버전 기록)
+        """
+        manifest = self.verify(version) if verify else self.read_manifest(version)
+        version = manifest['version']
+        snapshot_dir = self._snapshot_dir(version)
+
+        if index_path is None:
+            index_path = str(self.root_path / "working" / version)
+        vector_db = VectorDatabase(index_path=index_path)
+        vector_db.load_index(str(snapshot_dir / manifest.get('index_name', SNAPSHOT_INDEX_NAME)), mmap=mmap)
+        vector_db.snapshot_version = version
+
+        logger.info(f"스냅샷 로드 완료: {version} (체크섬 검사 {'함' if verify else '생략'})")
+        return vector_db
+
+    def prune(self, keep: Optional[int] = None) -> List[str]:
+        """
+        오래된 스냅샷과 중단된 게시의 임시 디렉토리 삭제 (CURRENT는 항상 유지)
+
+        이전 스냅샷을 매핑해 검색 중인 프로세스가 있을 수 있으므로 최근 keep개는 남긴다.
+
+        Args:
+            keep: 남길 최근 스냅샷 수 (None이면 저장소 설정)
+
+        Returns:
+            삭제한 스냅샷 버전 리스트
+        """
+        keep = self.keep if keep is None else keep
+        with self._lock:
+            current = self.current_version()
+            versions = self.versions()
+            stale = [version for version in versions[:max(len(versions) - keep, 0)] if version != current]
+
+            removed = []
+            for version in stale:
+                try:
+                    shutil.rmtree(self._snapshot_dir(version))
+                    removed.append(version)
+                except OSError as e:
+                    # 다른 프로세스가 파일을 열고 있는 플랫폼에서는 다음 정리 때 다시 시도
+                    logger.warning(f"스냅샷 삭제 실패, 다음 정리 때 다시 시도합니다: {version} ({e})")
+
+            for path in self.root_path.glob(f"{_TMP_PREFIX}*"):
+                if time.time() - path.stat().st_mtime > _STALE_TMP_SECONDS:
+                    shutil.rmtree(path, ignore_errors=True)
+
+        if removed:
+            logger.info(f"오래된 스냅샷 정리: {removed}")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """스냅샷 저장소 통계 반환"""
+        return {
+            'root_path': str(self.root_path),
+            'current_version': self.current_version(),
+            'versions': self.versions(),
+            'keep': self.keep
+        }
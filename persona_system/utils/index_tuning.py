@@ -0,0 +1,509 @@
+"""
+인덱스 자동 튜닝 - 인덱스 타입/압축 선택, 벡터 수 기반 nlist 선택, 목표 재현율 기반 nprobe 탐색,
+컬렉션 크기/지연 시간에 따른 인덱스 타입 자동 마이그레이션 판단
+"""
+import time
+from typing import List, Dict, Any, Optional
+import numpy as np
+import faiss
+from loguru import logger
+
+from .search_params import build_faiss_params
+
+
+# 클러스터당 최소 학습 벡터 수 (FAISS가 이보다 적으면 경고)
+MIN_POINTS_PER_CENTROID = 39
+
+# 클러스터당 학습 샘플 수 (이보다 많은 벡터는 무작위 샘플로 학습)
+TRAINING_POINTS_PER_CENTROID = 128
+
+# 튜닝 전 기본 nprobe
+DEFAULT_NPROBE = 8
+
+# 목표 재현율에 못 미칠 때 최대 재현율과 이 정도 차이 이내면 같은 수준으로 봄
+PLATEAU_TOLERANCE = 0.01
+
+# PQ 코드북 비트 수 (부분 공간당 256개 중심)와 안정적인 학습에 필요한 최소 벡터 수
+PQ_NBITS = 8
+PQ_MIN_TRAINING = (1 << PQ_NBITS) * MIN_POINTS_PER_CENTROID
+
+# 압축 인덱스 타입 (원본 float32 벡터 대신 코드를 저장)
+COMPRESSED_INDEX_TYPES = ("IVFPQ", "OPQIVFPQ", "SQ8", "SQfp16")
+
+# 자동 마이그레이션 단계 (인덱스 타입, 이 벡터 수부터 사용) - 위 단계로만 옮겨 간다
+MIGRATION_STAGES = (("Flat", 0), ("HNSW", 5000), ("IVFPQ", 500000))
+
+# 검색 지연 시간이 예산을 넘으면 단계 기준 벡터 수의 이 비율부터 다음 단계로 앞당김
+LATENCY_EARLY_FRACTION = 0.2
+
+# IVF 인덱스는 벡터 수에 맞는 nlist가 현재 nlist의 이 배수 이상이면 다시 구축
+IVF_REGROW_FACTOR = 2
+
+# 이전 중심으로 시작하는 k-means 반복 수 (처음부터 학습할 때는 FAISS 기본 10회)
+WARM_START_NITER = 4
+
+# 인덱스 타입별 단계 순위 (재순위로 감싼 인덱스 등 목록에 없는 타입은 옮기지 않음)
+_STAGE_RANK = {"Flat": 0, "SQfp16": 0, "SQ8": 0, "HNSW": 1, "IVFFlat": 2, "IVFPQ": 3, "OPQIVFPQ": 3}
+
+# 벡터당 부가 비용 (IDMap2 라벨 매핑, IVF 역색인 ID)
+_ID_OVERHEAD_BYTES = 16
+_IVF_ID_BYTES = 8
+_HNSW_LINKS = 32
+
+
+def choose_pq_m(embedding_dim: int, max_bytes: Optional[int] = None) -> int:
+    """
+    PQ 부분 공간 수 M (= 벡터당 코드 바이트 수) 선택
+
+    차원의 약수 중 부분 공간당 최소 4차원을 유지하는 가장 큰 값을 고르되,
+    max_bytes가 주어지면 그 이하로, 없으면 64 이하로 제한한다.
+
+    Args:
+        embedding_dim: 벡터 차원
+        max_bytes: 벡터당 최대 코드 바이트 수
+
+    Returns:
+        M
+    """
+    limit = min(max_bytes if max_bytes is not None else 64, max(1, embedding_dim // 4))
+    divisors = [m for m in range(1, embedding_dim + 1) if embedding_dim % m == 0 and m <= limit]
+    return max(divisors) if divisors else 1
+
+
+def estimate_bytes_per_vector(index_type: str, embedding_dim: int,
+                              pq_m: Optional[int] = None, rerank: bool = False) -> int:
+    """
+    인덱스 타입별 벡터당 메모리 추정치 (바이트)
+
+    Args:
+        index_type: 인덱스 타입
+        embedding_dim: 벡터 차원
+        pq_m: PQ 부분 공간 수 (IVFPQ 계열)
+        rerank: 정확 재순위용 원본 벡터 보관 여부
+
+    Returns:
+        벡터당 바이트 수
+    """
+    raw = 4 * embedding_dim
+    if index_type == "Flat":
+        size = raw
+    elif index_type == "IVFFlat":
+        size = raw + _IVF_ID_BYTES
+    elif index_type == "HNSW":
+        size = raw + _HNSW_LINKS * 2 * 4
+    elif index_type == "SQfp16":
+        size = 2 * embedding_dim
+    elif index_type == "SQ8":
+        size = embedding_dim
+    elif index_type in ("IVFPQ", "OPQIVFPQ"):
+        size = (pq_m or choose_pq_m(embedding_dim)) + _IVF_ID_BYTES
+    else:
+        raise ValueError(f"지원하지 않는 인덱스 타입: {index_type}")
+
+    if rerank and index_type in COMPRESSED_INDEX_TYPES:
+        size += raw
+    return size + _ID_OVERHEAD_BYTES
+
+
+def index_memory_bytes(index) -> int:
+    """
+    생성된 인덱스의 메모리 추정치 (바이트, 벡터 코드 + ID 매핑 + 그래프 링크)
+
+    직렬화 없이 벡터 수와 코드 크기로 계산하므로 자주 호출해도 된다.
+
+    Args:
+        index: 인덱스 (IDMap2로 감싼 인덱스 포함)
+
+    Returns:
+        바이트 수
+    """
+    index = faiss.downcast_index(index)
+    if index.ntotal == 0:
+        return 0
+
+    base = index
+    if isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        base = faiss.downcast_index(base.index)
+
+    if isinstance(base, faiss.IndexHNSW):
+        per_vector = 4 * base.d + _HNSW_LINKS * 2 * 4
+    else:
+        try:
+            per_vector = base.sa_code_size()
+        except RuntimeError:
+            per_vector = 4 * base.d
+    if faiss.try_extract_index_ivf(base) is not None:
+        per_vector += _IVF_ID_BYTES
+    return index.ntotal * (per_vector + _ID_OVERHEAD_BYTES)
+
+
+def choose_index_type(vector_count: int,
+                      embedding_dim: int,
+                      memory_budget_mb: Optional[float] = None) -> Dict[str, Any]:
+    """
+    auto 모드 인덱스 타입 선택
+
+    벡터 수로 Flat/HNSW/IVFFlat을 고르고, 메모리 예산이 주어졌는데 넘는 경우
+    SQfp16 -> SQ8 -> IVFPQ(예산에 맞는 M) 순으로 압축 인덱스를 고른다.
+    IVFPQ는 PQ 학습에 충분한 벡터가 있을 때만 고른다.
+
+    Args:
+        vector_count: 예상 벡터 수
+        embedding_dim: 벡터 차원
+        memory_budget_mb: 인덱스 메모리 예산 (MB, None이면 벡터 수만 고려)
+
+    Returns:
+        'index_type', 'pq_m', 'bytes_per_vector'
+    """
+    if vector_count < 100:
+        index_type = "Flat"  # 소량 데이터는 Flat 사용
+    elif vector_count < 10000:
+        index_type = "HNSW"  # 중간 규모는 HNSW 사용
+    else:
+        index_type = "IVFFlat"  # 대용량은 IVFFlat 사용
+
+    choice = {'index_type': index_type, 'pq_m': None,
+              'bytes_per_vector': estimate_bytes_per_vector(index_type, embedding_dim)}
+    if memory_budget_mb is None or vector_count <= 0:
+        return choice
+
+    budget_per_vector = memory_budget_mb * 1024 * 1024 / vector_count
+    if choice['bytes_per_vector'] <= budget_per_vector:
+        return choice
+
+    for compressed in ("SQfp16", "SQ8"):
+        size = estimate_bytes_per_vector(compressed, embedding_dim)
+        if size <= budget_per_vector:
+            return {'index_type': compressed, 'pq_m': None, 'bytes_per_vector': size}
+
+    if vector_count >= PQ_MIN_TRAINING:
+        code_budget = int(budget_per_vector) - _IVF_ID_BYTES - _ID_OVERHEAD_BYTES
+        pq_m = choose_pq_m(embedding_dim, max(1, code_budget))
+        return {'index_type': "IVFPQ", 'pq_m': pq_m,
+                'bytes_per_vector': estimate_bytes_per_vector("IVFPQ", embedding_dim, pq_m)}
+
+    # 예산을 맞출 수 없으면 가장 작은 스칼라 양자화 사용
+    logger.warning(f"메모리 예산 {memory_budget_mb}MB를 맞출 수 있는 인덱스가 없어 SQ8을 사용합니다.")
+    return {'index_type': "SQ8", 'pq_m': None,
+            'bytes_per_vector': estimate_bytes_per_vector("SQ8", embedding_dim)}
+
+
+def ivf_of(index):
+    """인덱스(또는 PreTransform/Refine로 감싼 인덱스) 안의 IVF 인덱스 (없으면 None)"""
+    return faiss.try_extract_index_ivf(index)
+
+
+def ivf_search_params(index, nprobe: int):
+    """
+    감싼 구조에 맞춘 nprobe 검색 파라미터
+
+    IndexRefine과 IndexPreTransform은 하위 인덱스 파라미터를 중첩해서 받으므로
+    같은 구조로 감싼다 (search_params.build_faiss_params 참고).
+    """
+    return build_faiss_params(index, nprobe=nprobe)
+
+
+def choose_nlist(vector_count: int) -> int:
+    """
+    벡터 수에 맞는 IVF 클러스터 수 (약 4*sqrt(N), 클러스터당 학습 벡터가 충분하도록 제한)
+
+    Args:
+        vector_count: 예상 벡터 수
+
+    Returns:
+        nlist
+    """
+    if vector_count <= 0:
+        return 1
+    nlist = int(4 * np.sqrt(vector_count))
+    return max(1, min(nlist, vector_count // MIN_POINTS_PER_CENTROID))
+
+
+def training_sample(embeddings: np.ndarray, nlist: int, seed: int = 0) -> np.ndarray:
+    """
+    IVF 학습용 무작위 샘플 (클러스터당 TRAINING_POINTS_PER_CENTROID개까지)
+
+    Args:
+        embeddings: 추가할 전체 임베딩
+        nlist: 클러스터 수
+        seed: 샘플링 시드
+
+    Returns:
+        학습에 사용할 임베딩
+    """
+    max_points = nlist * TRAINING_POINTS_PER_CENTROID
+    if len(embeddings) <= max_points:
+        return embeddings
+    rows = np.sort(np.random.default_rng(seed).choice(len(embeddings), max_points, replace=False))
+    return np.ascontiguousarray(embeddings[rows])
+
+
+def nprobe_candidates(nlist: int) -> List[int]:
+    """탐색할 nprobe 후보 (1부터 2배씩, 마지막은 nlist = 전체 탐색)"""
+    candidates = []
+    nprobe = 1
+    while nprobe < nlist:
+        candidates.append(nprobe)
+        nprobe *= 2
+    candidates.append(nlist)
+    return candidates
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    """질문별 상위 k개 교집합 비율의 평균 (-1 라벨은 제외)"""
+    hits = [len(set(t[t != -1]) & set(f[f != -1])) / max(1, int((t != -1).sum())) for t, f in zip(truth, found)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def _search_labels(index, queries: np.ndarray, k: int, nprobe: Optional[int],
+                   exclude: Optional[np.ndarray]) -> np.ndarray:
+    """지정한 nprobe로 검색해 라벨 반환 (exclude가 있으면 질문별로 그 라벨을 빼고 상위 k개)"""
+    fetch_k = k + 1 if exclude is not None else k
+    if nprobe is None:
+        _, labels = index.search(queries, fetch_k)
+    else:
+        _, labels = index.search(queries, fetch_k, params=ivf_search_params(index, nprobe))
+    return drop_own_labels(labels, k, exclude)
+
+
+def drop_own_labels(labels: np.ndarray, k: int, exclude: Optional[np.ndarray]) -> np.ndarray:
+    """질문별로 exclude 라벨을 빼고 상위 k개만 남김"""
+    if exclude is None:
+        return labels[:, :k]
+
+    # 저장된 벡터를 질문으로 쓴 경우 자기 자신은 정답/결과에서 제외 (leave-one-out)
+    trimmed = np.full((len(labels), k), -1, dtype=labels.dtype)
+    for row, (found, own) in enumerate(zip(labels, exclude)):
+        others = found[found != own][:k]
+        trimmed[row, :len(others)] = others
+    return trimmed
+
+
+def evaluate_recall(index,
+                    queries: np.ndarray,
+                    truth: np.ndarray,
+                    k: int = 10,
+                    exclude: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    nprobe가 없는 인덱스(SQ 등)의 정확 검색 대비 recall@k 측정
+
+    Args:
+        index: 측정할 인덱스
+        queries: 정규화된 질문 벡터
+        truth: 정확 검색 정답 라벨
+        k: 재현율을 잴 상위 k
+        exclude: 질문별로 결과에서 뺄 라벨
+
+    Returns:
+        'recall'과 측정 정보
+    """
+    start = time.perf_counter()
+    found = _search_labels(index, queries, k, None, exclude)
+    elapsed = time.perf_counter() - start
+
+    recall = recall_at_k(truth, found)
+    logger.info(f"압축 인덱스 재현율 측정: recall@{k} {recall:.3f}")
+    return {
+        'nprobe': None,
+        'recall': recall,
+        'k': k,
+        'num_queries': len(queries),
+        'ground_truth': 'exact',
+        'ms_per_query': elapsed / len(queries) * 1000
+    }
+
+
+def sweep_nprobe(index,
+                 nlist: int,
+                 queries: np.ndarray,
+                 k: int = 10,
+                 target_recall: float = 0.95,
+                 exclude: Optional[np.ndarray] = None,
+                 truth: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    nprobe 후보별 재현율/지연 시간을 측정해 목표 재현율을 만족하는 가장 작은 nprobe 선택
+
+    truth가 없으면 nprobe=nlist(모든 클러스터 탐색) 결과를 정답으로 쓴다. IVFFlat에서는
+    정확한 Flat 검색과 같고, PQ 계열에서는 압축 손실을 뺀 상대 재현율이 된다.
+
+    Args:
+        index: IVF 인덱스 (IDMap/PreTransform/Refine으로 감싼 인덱스도 가능)
+        nlist: 클러스터 수
+        queries: 정규화된 질문 벡터
+        k: 재현율을 잴 상위 k
+        target_recall: 목표 recall@k
+        exclude: 질문별로 결과에서 뺄 라벨 (인덱스에 있는 벡터를 질문으로 쓸 때)
+        truth: 정확 검색 정답 라벨 (원본 벡터로 계산한 경우)
+
+    Returns:
+        선택된 'nprobe', 달성 'recall', 후보별 'sweep' 기록
+    """
+    ground_truth = 'exact' if truth is not None else 'full_probe'
+    if truth is None:
+        truth = _search_labels(index, queries, k, nlist, exclude)
+
+    sweep = []
+    chosen = None
+    for nprobe in nprobe_candidates(nlist):
+        start = time.perf_counter()
+        found = _search_labels(index, queries, k, nprobe, exclude)
+        elapsed = time.perf_counter() - start
+
+        recall = recall_at_k(truth, found)
+        sweep.append({
+            'nprobe': nprobe,
+            'recall': recall,
+            'ms_per_query': elapsed / len(queries) * 1000
+        })
+        if recall >= target_recall:
+            chosen = sweep[-1]
+            break
+
+    if chosen is None:
+        # 목표에 못 미치면 (압축 손실 등) 재현율이 더 오르지 않는 가장 작은 nprobe
+        best = max(entry['recall'] for entry in sweep)
+        chosen = next(entry for entry in sweep if entry['recall'] >= best - PLATEAU_TOLERANCE)
+        logger.warning(f"목표 재현율 {target_recall}에 도달하지 못했습니다 (최대 {best:.3f}). "
+                       f"압축 인덱스라면 정확 재순위(rerank)를 고려하세요.")
+    logger.info(f"nprobe 튜닝 완료: nlist {nlist}, nprobe {chosen['nprobe']} "
+                f"(recall@{k} {chosen['recall']:.3f}, 목표 {target_recall})")
+
+    return {
+        'nprobe': chosen['nprobe'],
+        'recall': chosen['recall'],
+        'target_recall': target_recall,
+        'k': k,
+        'nlist': nlist,
+        'num_queries': len(queries),
+        'ground_truth': ground_truth,
+        'sweep': sweep
+    }
+
+
+def index_kind(index) -> Optional[str]:
+    """
+    생성된 인덱스의 create_index 타입 이름 (IDMap2 안쪽 기준)
+
+    Args:
+        index: 인덱스 (IDMap2로 감싼 인덱스 포함)
+
+    Returns:
+        "Flat", "HNSW", "IVFFlat", "IVFPQ", "OPQIVFPQ", "SQ8", "SQfp16"
+        (재순위로 감싼 경우 "+rerank" 접미사, 알 수 없는 타입은 None)
+    """
+    base = faiss.downcast_index(index)
+    if isinstance(base, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        base = faiss.downcast_index(base.index)
+
+    if isinstance(base, faiss.IndexRefine):
+        inner = index_kind(base.base_index)
+        return f"{inner}+rerank" if inner else None
+    if isinstance(base, faiss.IndexPreTransform):
+        return "OPQIVFPQ" if isinstance(faiss.downcast_index(base.index), faiss.IndexIVFPQ) else None
+    if isinstance(base, faiss.IndexIVFPQ):
+        return "IVFPQ"
+    if isinstance(base, faiss.IndexIVFFlat):
+        return "IVFFlat"
+    if isinstance(base, faiss.IndexHNSW):
+        return "HNSW"
+    if isinstance(base, faiss.IndexScalarQuantizer):
+        return "SQ8" if base.sq.qtype == faiss.ScalarQuantizer.QT_8bit else "SQfp16"
+    if isinstance(base, faiss.IndexFlat):
+        return "Flat"
+    return None
+
+
+def migration_target(kind: Optional[str],
+                     vector_count: int,
+                     nlist: Optional[int] = None,
+                     latency_ms: Optional[float] = None,
+                     latency_budget_ms: Optional[float] = None) -> Optional[str]:
+    """
+    벡터 수와 검색 지연 시간으로 옮겨 갈 인덱스 타입 결정
+
+    MIGRATION_STAGES에서 벡터 수가 넘은 가장 높은 단계로 옮긴다. 아직 기준 수에 못
+    미쳐도 질문당 검색 지연 시간이 예산을 넘으면 기준의 LATENCY_EARLY_FRACTION부터
+    다음 단계로 앞당기고, IVF 인덱스는 벡터 수에 비해 nlist가 작아지면 같은 타입으로
+    다시 구축한다.
+
+    Args:
+        kind: 현재 인덱스 타입 (index_kind 결과)
+        vector_count: 살아 있는 벡터 수
+        nlist: 현재 IVF 클러스터 수 (IVF 인덱스일 때)
+        latency_ms: 최근 질문당 검색 지연 시간 (ms)
+        latency_budget_ms: 질문당 검색 지연 시간 예산 (ms, None이면 지연 시간은 보지 않음)
+
+    Returns:
+        새 인덱스 타입 (옮길 필요가 없으면 None)
+    """
+    rank = _STAGE_RANK.get(kind)
+    if rank is None:
+        return None
+
+    target = None
+    for index_type, min_vectors in MIGRATION_STAGES:
+        if vector_count >= min_vectors and _STAGE_RANK[index_type] > rank:
+            target = index_type
+    if target is not None:
+        return target
+
+    if latency_budget_ms is not None and latency_ms is not None and latency_ms > latency_budget_ms:
+        next_stage = next(((index_type, min_vectors) for index_type, min_vectors in MIGRATION_STAGES
+                           if _STAGE_RANK[index_type] > rank), None)
+        if next_stage is not None:
+            index_type, min_vectors = next_stage
+            min_training = PQ_MIN_TRAINING if index_type == "IVFPQ" else 0
+            if vector_count >= max(min_vectors * LATENCY_EARLY_FRACTION, min_training):
+                return index_type
+
+    if nlist and ivf_stage(kind) and choose_nlist(vector_count) >= nlist * IVF_REGROW_FACTOR:
+        return kind
+    return None
+
+
+def ivf_stage(kind: Optional[str]) -> bool:
+    """IVF 계열 인덱스 타입인지 여부"""
+    return kind in ("IVFFlat", "IVFPQ", "OPQIVFPQ")
+
+
+def train_ivf(index, sample: np.ndarray, previous_centroids: Optional[np.ndarray] = None) -> bool:
+    """
+    인덱스 학습 (IVF는 이전 구축의 중심을 k-means 초기값으로 쓰는 warm start)
+
+    이전 중심이 있으면 그것으로 시작해 WARM_START_NITER번만 반복해 새 nlist의 중심을
+    학습하고 양자화기에 넣는다. 그러면 index.train은 양자화기 학습을 건너뛰고 나머지
+    (PQ 코드북 등)만 학습한다. 이전 중심이 nlist보다 많으면 무작위로 고르고, 모자라면
+    나머지는 FAISS가 샘플에서 무작위로 채운다. OPQ 회전이 있는 인덱스는 중심 공간이
+    달라 처음부터 학습한다.
+
+    Args:
+        index: 학습할 인덱스 (IDMap2 안쪽)
+        sample: 정규화된 학습 벡터
+        previous_centroids: 이전 IVF 인덱스의 중심 (nlist x d)
+
+    Returns:
+        warm start 사용 여부
+    """
+    ivf_index = ivf_of(index)
+    warm = (previous_centroids is not None and ivf_index is not None
+            and not isinstance(faiss.downcast_index(index), faiss.IndexPreTransform)
+            and previous_centroids.shape[1] == ivf_index.d and len(sample) >= ivf_index.nlist)
+
+    if warm:
+        init = previous_centroids
+        if len(init) > ivf_index.nlist:
+            rows = np.sort(np.random.default_rng(0).choice(len(init), ivf_index.nlist, replace=False))
+            init = init[rows]
+
+        clustering_params = faiss.ClusteringParameters()
+        clustering_params.niter = WARM_START_NITER
+        clustering_params.spherical = ivf_index.cp.spherical
+        clustering = faiss.Clustering(ivf_index.d, ivf_index.nlist, clustering_params)
+        faiss.copy_array_to_vector(np.ascontiguousarray(init, dtype=np.float32).ravel(), clustering.centroids)
+
+        quantizer = faiss.downcast_index(ivf_index.quantizer)
+        quantizer.reset()
+        clustering.train(sample, quantizer)  # 학습된 중심이 양자화기에 들어감
+
+    index.train(sample)
+    return warm
@@ -0,0 +1,261 @@
+"""
+메타데이터 필터 색인 - 검색 전에 조건에 맞는 라벨 비트맵 계산
+
+범주형 필드(type, author, genre, emotion)는 라벨 순서의 값 코드 열로, 날짜는 정렬
+색인으로 보관한다. 필터 조건은 라벨별 일치 여부 비트맵으로 계산되어 FAISS IDSelector로
+검색에 넘겨지므로, 결과를 뽑은 뒤 거르는 방식과 달리 선택적인 필터에서도 k개를 채운다.
+"""
+import os
+import json
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterable
+import numpy as np
+
+
+# 색인 필드 -> 메타데이터 키 (앞쪽 키부터 값이 있는 것을 사용)
+FILTER_FIELDS = {
+    'type': ('type',),
+    'author': ('author', 'writer', 'user_name'),
+    'genre': ('genre',),
+    'emotion': ('emotion',),
+}
+
+# 날짜 범위 필터 키와 메타데이터 날짜 키
+DATE_RANGE_FILTER = 'date_range'
+DATE_FIELD = 'date'
+
+# 색인 파일 형식 버전
+INDEX_VERSION = 1
+
+# 값이 없는 라벨의 코드 / 날짜
+_MISSING = -1
+
+
+def _to_ordinal(value: Any) -> int:
+    """날짜 값(ISO 문자열, date, datetime) -> 일 단위 서수 (해석 실패 시 _MISSING)"""
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.strip()).date().toordinal()
+        except ValueError:
+            return _MISSING
+    return _MISSING
+
+
+def _field_value(meta: Dict[str, Any], keys: tuple) -> Optional[str]:
+    """필드 키 중 처음으로 값이 있는 것을 문자열로"""
+    for key in keys:
+        value = meta.get(key)
+        if value is not None and value != '':
+            return str(value)
+    return None
+
+
+def validate_filters(filters: Optional[Dict[str, Any]]) -> None:
+    """
+    필터 조건 검사
+
+    Raises:
+        ValueError: 색인되지 않은 필드나 잘못된 날짜 범위
+    """
+    if not filters:
+        return
+    unknown = set(filters) - set(FILTER_FIELDS) - {DATE_RANGE_FILTER}
+    if unknown:
+        raise ValueError(f"색인되지 않은 필터 필드: {sorted(unknown)} "
+                         f"(사용 가능: {', '.join([*FILTER_FIELDS, DATE_RANGE_FILTER])})")
+    if filters.get(DATE_RANGE_FILTER) is not None:
+        _date_bounds(filters[DATE_RANGE_FILTER])
+
+
+def _date_bounds(date_range: Any) -> tuple:
+    """{'start', 'end'} 딕셔너리나 (start, end) 쌍 -> 일 서수 범위 (양 끝 포함, 없는 쪽은 무제한)"""
+    if isinstance(date_range, dict):
+        start, end = date_range.get('start'), date_range.get('end')
+    elif isinstance(date_range, (list, tuple)) and len(date_range) == 2:
+        start, end = date_range
+    else:
+        raise ValueError(f"date_range는 {{'start', 'end'}} 또는 [start, end] 형식이어야 합니다: {date_range!r}")
+
+    bounds = []
+    for value in (start, end):
+        ordinal = _to_ordinal(value) if value is not None else None
+        if value is not None and ordinal == _MISSING:
+            raise ValueError(f"날짜를 해석할 수 없습니다: {value!r}")
+        bounds.append(ordinal)
+    return tuple(bounds)
+
+
+class MetadataIndex:
+    """라벨 순서의 필터 필드 색인 (범주형 값 코드 열 + 날짜 정렬 색인)"""
+
+    def __init__(self):
+        """빈 색인 초기화"""
+        self._size = 0
+        self._codes: Dict[str, np.ndarray] = {field: np.empty(0, dtype=np.int32) for field in FILTER_FIELDS}
+        self._vocab: Dict[str, Dict[str, int]] = {field: {} for field in FILTER_FIELDS}
+        self._dates = np.empty(0, dtype=np.int32)
+        self._date_order: Optional[tuple] = None  # (날짜순 라벨, 정렬된 날짜), 추가 후 첫 날짜 질의에서 다시 계산
+
+    @classmethod
+    def from_metadata(cls, metadata: Iterable[Dict[str, Any]]) -> "MetadataIndex":
+        """메타데이터를 라벨 순서로 읽어 색인 생성 (색인 파일이 없는 인덱스용)"""
+        index = cls()
+        batch = []
+        for meta in metadata:
+            batch.append(meta)
+            if len(batch) >= 10000:
+                index.append(batch)
+                batch = []
+        index.append(batch)
+        return index
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, metadata: List[Dict[str, Any]]) -> None:
+        """
+        다음 라벨부터 순서대로 행 색인
+
+        Args:
+            metadata: 추가된 벡터의 메타데이터 리스트
+        """
+        if not metadata:
+            return
+
+        for field, keys in FILTER_FIELDS.items():
+            vocab = self._vocab[field]
+            codes = np.empty(len(metadata), dtype=np.int32)
+            for i, meta in enumerate(metadata):
+                value = _field_value(meta, keys)
+                codes[i] = _MISSING if value is None else vocab.setdefault(value, len(vocab))
+            self._codes[field] = np.concatenate([self._codes[field], codes])
+
+        dates = np.fromiter((_to_ordinal(meta.get(DATE_FIELD)) for meta in metadata),
+                            dtype=np.int32, count=len(metadata))
+        self._dates = np.concatenate([self._dates, dates])
+        self._date_order = None
+        self._size += len(metadata)
+
+    def take(self, labels: np.ndarray) -> "MetadataIndex":
+        """
+        지정한 라벨의 행만 0부터 다시 번호를 매긴 새 색인 (컴팩션용)
+
+        Args:
+            labels: 유지할 라벨 배열 (새 라벨 순서)
+
+        Returns:
+            새 메타데이터 색인
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        index = MetadataIndex()
+        index._size = len(labels)
+        index._codes = {field: codes[labels] for field, codes in self._codes.items()}
+        index._vocab = {field: dict(vocab) for field, vocab in self._vocab.items()}
+        index._dates = self._dates[labels]
+        return index
+
+    def match(self, filters: Dict[str, Any]) -> np.ndarray:
+        """
+        필터 조건을 모두 만족하는 라벨 비트맵
+
+        필드 값은 하나 또는 리스트(그중 하나와 일치)로 지정한다.
+
+        Args:
+            filters: {'type': ..., 'author': ..., 'genre': ..., 'emotion': ...,
+                      'date_range': {'start': ..., 'end': ...}}
+
+        Returns:
+            라벨별 일치 여부 (bool 배열)
+        """
+        validate_filters(filters)
+        mask = np.ones(self._size, dtype=bool)
+
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field == DATE_RANGE_FILTER:
+                mask &= self._date_mask(*_date_bounds(value))
+                continue
+
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            vocab = self._vocab[field]
+            codes = [vocab[str(v)] for v in values if str(v) in vocab]
+            if not codes:
+                return np.zeros(self._size, dtype=bool)
+            column = self._codes[field]
+            mask &= column == codes[0] if len(codes) == 1 else np.isin(column, codes)
+
+        return mask
+
+    def _date_mask(self, start: Optional[int], end: Optional[int]) -> np.ndarray:
+        """날짜 정렬 색인에서 이분 탐색으로 범위에 드는 라벨 비트맵"""
+        if self._date_order is None:
+            order = np.argsort(self._dates, kind='stable')
+            self._date_order = (order, self._dates[order])
+        date_order, sorted_dates = self._date_order
+
+        # 날짜가 없는 라벨(_MISSING)은 앞쪽에 모이므로 시작을 지정하지 않아도 제외
+        lo = np.searchsorted(sorted_dates, start if start is not None else 0, side='left')
+        hi = np.searchsorted(sorted_dates, end, side='right') if end is not None else len(sorted_dates)
+
+        mask = np.zeros(self._size, dtype=bool)
+        mask[date_order[lo:hi]] = True
+        return mask
+
+    def save(self, path: str) -> None:
+        """
+        색인을 npz 파일로 저장 (임시 파일에 쓴 뒤 교체)
+
+        Args:
+            path: 저장할 파일 경로
+        """
+        path = Path(path)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                version=np.array(INDEX_VERSION),
+                vocab=np.array(json.dumps(self._vocab, ensure_ascii=False)),
+                dates=self._dates,
+                **{f"codes_{field}": codes for field, codes in self._codes.items()}
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "MetadataIndex":
+        """
+        저장된 색인 로드
+
+        Args:
+            path: 색인 파일 경로
+
+        Returns:
+            메타데이터 색인
+        """
+        with np.load(path) as data:
+            version = int(data['version'])
+            if version > INDEX_VERSION:
+                raise ValueError(f"지원하지 않는 메타데이터 색인 버전: {version}")
+
+            index = cls()
+            vocab = json.loads(str(data['vocab']))
+            index._dates = data['dates']
+            index._size = len(index._dates)
+            for field in FILTER_FIELDS:
+                index._vocab[field] = vocab.get(field, {})
+                key = f"codes_{field}"
+                index._codes[field] = data[key] if key in data else np.full(index._size, _MISSING, dtype=np.int32)
+        return index
+
+    def get_stats(self) -> Dict[str, Any]:
+        """색인 통계 반환 (필드별 서로 다른 값 수, 날짜가 있는 행 수)"""
+        return {
+            'rows': self._size,
+            'distinct_values': {field: len(vocab) for field, vocab in self._vocab.items()},
+            'dated_rows': int((self._dates != _MISSING).sum())
+        }
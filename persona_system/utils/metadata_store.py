@@ -0,0 +1,261 @@
+"""
+청크 메타데이터 저장소 - SQLite 기반 라벨 순서 행 저장소
+
+FAISS 라벨(행 번호)을 기본 키로 외부 ID와 압축 없는 JSON 바이트를 행 단위로
+저장한다. 저장된 파일은 읽기 전용으로 열어 두고 검색 결과 상위 k개 행만
+그때그때 dict로 변환하므로, 로드 시간과 메모리가 코퍼스 크기에 비례하지 않는다.
+저장 이후에 추가된 행은 다음 저장 전까지 메모리에 보관한다.
+"""
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from loguru import logger
+
+
+# 저장 파일 형식 버전 (PRAGMA user_version)
+STORE_VERSION = 1
+
+# 한 번의 SQL 질의에 넣을 최대 라벨 수 (SQLite 변수 개수 제한 대비)
+_QUERY_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    label INTEGER PRIMARY KEY,
+    external_id TEXT NOT NULL,
+    data BLOB NOT NULL
+)
+"""
+
+
+def _encode(meta: Dict[str, Any]) -> bytes:
+    """메타데이터 dict -> 공백 없는 JSON 바이트"""
+    return json.dumps(meta, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _decode(data: bytes) -> Dict[str, Any]:
+    """JSON 바이트 -> 메타데이터 dict"""
+    return json.loads(data)
+
+
+class MetadataStore:
+    """라벨로 조회하는 청크 메타데이터 저장소 (리스트처럼 사용 가능)"""
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        메타데이터 저장소 초기화
+
+        Args:
+            path: 읽기 전용으로 열 SQLite 파일 경로 (None이면 빈 저장소)
+        """
+        self.path: Optional[Path] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._base_count = 0  # 파일(또는 메모리 DB)에 있는 행 수, 라벨 0..base_count-1
+        self._pending: List[Dict[str, Any]] = []  # 아직 저장되지 않은 추가 행
+        self._pending_ids: List[str] = []
+        self._lock = threading.Lock()
+
+        if path is not None:
+            self._open(Path(path))
+
+    def _open(self, path: Path) -> None:
+        """SQLite 파일을 읽기 전용으로 열기"""
+        if not path.exists():
+            raise FileNotFoundError(f"메타데이터 저장소 파일을 찾을 수 없습니다: {path}")
+
+        # 검색은 스레드 풀에서 실행되므로 연결은 lock으로 직렬화해 공유
+        conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > STORE_VERSION:
+            conn.close()
+            raise ValueError(f"지원하지 않는 메타데이터 저장소 버전: {version}")
+
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = conn
+        self.path = path
+        self._base_count = conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    @classmethod
+    def from_records(cls, metadata: List[Dict[str, Any]], external_ids: List[str]) -> "MetadataStore":
+        """메모리의 메타데이터 리스트로 저장소 생성 (JSON 사이드카 마이그레이션용)"""
+        store = cls()
+        store.append(metadata, external_ids)
+        return store
+
+    def __len__(self) -> int:
+        return self._base_count + len(self._pending)
+
+    def __getitem__(self, label: int) -> Dict[str, Any]:
+        label = int(label)
+        if label < 0 or label >= len(self):
+            raise IndexError(f"메타데이터 라벨 범위 초과: {label}")
+        return self.get_many([label])[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """라벨 순서로 모든 행 순회 (한 번에 일정량씩 읽어 메모리 사용 제한)"""
+        for start in range(0, self._base_count, _QUERY_CHUNK):
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT data FROM chunks WHERE label >= ? ORDER BY label LIMIT ?",
+                    (start, _QUERY_CHUNK)
+                ).fetchall()
+            for (data,) in rows:
+                yield _decode(data)
+        yield from list(self._pending)
+
+    def append(self, metadata: List[Dict[str, Any]], external_ids: List[str]) -> None:
+        """
+        행 추가 (다음 라벨부터 순서대로)
+
+        Args:
+            metadata: 추가할 메타데이터 리스트
+            external_ids: 각 행의 외부 ID
+        """
+        if len(metadata) != len(external_ids):
+            raise ValueError("메타데이터와 외부 ID의 개수가 일치하지 않습니다.")
+        with self._lock:
+            self._pending.extend(metadata)
+            self._pending_ids.extend(external_ids)
+
+    def get_many(self, labels: List[int]) -> List[Dict[str, Any]]:
+        """
+        라벨 목록의 행만 dict로 변환해 반환 (입력 순서 유지, 중복 허용)
+
+        Args:
+            labels: 조회할 라벨 리스트
+
+        Returns:
+            라벨 순서의 메타데이터 리스트
+        """
+        labels = [int(label) for label in labels]
+        rows = self._fetch_raw(labels, decode=True)
+        return [rows[label][1] for label in labels]
+
+    def _fetch_raw(self, labels: List[int], decode: bool) -> Dict[int, Tuple[str, Any]]:
+        """라벨 -> (외부 ID, 메타데이터 또는 JSON 바이트)"""
+        found: Dict[int, Tuple[str, Any]] = {}
+
+        with self._lock:
+            base_labels = sorted({label for label in labels if 0 <= label < self._base_count})
+            for start in range(0, len(base_labels), _QUERY_CHUNK):
+                chunk = base_labels[start:start + _QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for label, external_id, data in self._conn.execute(
+                    f"SELECT label, external_id, data FROM chunks WHERE label IN ({placeholders})", chunk
+                ):
+                    found[label] = (external_id, _decode(data) if decode else data)
+
+            for label in labels:
+                offset = label - self._base_count
+                if 0 <= offset < len(self._pending) and label not in found:
+                    meta = self._pending[offset]
+                    found[label] = (self._pending_ids[offset], meta if decode else _encode(meta))
+
+        missing = [label for label in labels if label not in found]
+        if missing:
+            raise IndexError(f"메타데이터 라벨 범위 초과: {missing[:5]}")
+        return found
+
+    def external_ids(self) -> List[str]:
+        """라벨 순서의 외부 ID 리스트"""
+        with self._lock:
+            ids = []
+            if self._conn is not None:
+                ids = [row[0] for row in self._conn.execute("SELECT external_id FROM chunks ORDER BY label")]
+            return ids + list(self._pending_ids)
+
+    def take(self, labels: List[int]) -> "MetadataStore":
+        """
+        지정한 라벨의 행만 0부터 다시 번호를 매겨 담은 새 저장소 (컴팩션용)
+
+        행은 dict로 변환하지 않고 JSON 바이트 그대로 메모리 SQLite DB로 복사한다.
+
+        Args:
+            labels: 유지할 라벨 리스트 (새 라벨 순서)
+
+        Returns:
+            새 메타데이터 저장소
+        """
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.execute(_SCHEMA)
+
+        new_label = 0
+        for start in range(0, len(labels), _QUERY_CHUNK):
+            chunk = [int(label) for label in labels[start:start + _QUERY_CHUNK]]
+            rows = self._fetch_raw(chunk, decode=False)
+            conn.executemany(
+                "INSERT INTO chunks (label, external_id, data) VALUES (?, ?, ?)",
+                ((new_label + i, rows[label][0], rows[label][1]) for i, label in enumerate(chunk))
+            )
+            new_label += len(chunk)
+        conn.commit()
+
+        store = MetadataStore()
+        store._conn = conn
+        store._base_count = new_label
+        return store
+
+    def save(self, path: str, reopen: bool = True) -> None:
+        """
+        저장소를 SQLite 파일로 저장 후 그 파일을 읽기 전용으로 다시 열기
+
+        임시 파일에 기록한 뒤 이름을 바꾸므로 저장 중 실패해도 기존 파일은 유지된다.
+
+        Args:
+            path: 저장할 파일 경로
+            reopen: False이면 파일만 기록하고 기존 연결과 추가 행을 그대로 유지 (스냅샷 복사본용)
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        if tmp_path.exists():
+            tmp_path.unlink()
+
+        with self._lock:
+            target = sqlite3.connect(str(tmp_path))
+            try:
+                if self._conn is not None:
+                    # 기존 행은 페이지 단위로 그대로 복사
+                    self._conn.backup(target)
+                target.execute(_SCHEMA)
+                target.executemany(
+                    "INSERT INTO chunks (label, external_id, data) VALUES (?, ?, ?)",
+                    ((self._base_count + i, external_id, _encode(meta))
+                     for i, (external_id, meta) in enumerate(zip(self._pending_ids, self._pending)))
+                )
+                target.execute(f"PRAGMA user_version = {STORE_VERSION}")
+                target.commit()
+            finally:
+                target.close()
+
+            os.replace(tmp_path, path)
+            if not reopen:
+                return
+
+            # 추가분이 파일로 옮겨졌으므로 메모리에서 비우고 새 파일을 기준으로 전환
+            pending_count = len(self._pending)
+            self._open(path)
+            self._pending = []
+            self._pending_ids = []
+
+        logger.info(f"메타데이터 저장소 저장 완료: {path} ({self._base_count}행, 새 행 {pending_count}개)")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """저장소 통계 반환"""
+        return {
+            'backend': 'sqlite',
+            'path': str(self.path) if self.path else None,
+            'stored_rows': self._base_count,
+            'pending_rows': len(self._pending),
+            'file_size_mb': self.path.stat().st_size / 1024 / 1024 if self.path and self.path.exists() else 0.0
+        }
+
+    def close(self) -> None:
+        """SQLite 연결 닫기"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,186 @@
+"""
+프로세스 전역 모델 레지스트리
+
+(모델, 백엔드, 디바이스) 조합마다 가중치를 한 번만 로드하고, 여러 EmbeddingGenerator가
+참조 카운트가 붙은 공유 핸들로 같은 모델을 사용하게 한다.
+"""
+import threading
+from pathlib import Path
+from typing import Dict, Any, Callable, Optional, Tuple
+from loguru import logger
+
+from .embedding_cache import EmbeddingCache
+
+
+ModelKey = Tuple[str, str, str]
+
+
+class SharedModelHandle:
+    """레지스트리가 관리하는 공유 모델 핸들"""
+
+    def __init__(self,
+                 registry: "ModelRegistry",
+                 key: ModelKey,
+                 entry: Dict[str, Any]):
+        self._registry = registry
+        self.key = key
+        # 핸들을 받은 레지스트리 항목 (강제 언로드 후 같은 키로 다시 로드된 항목과 구분)
+        self._entry = entry
+        self.components = entry['components']
+        # fast tokenizer와 torch 모델을 여러 스레드가 동시에 호출하지 않도록 직렬화
+        self.lock = entry['lock']
+        self.released = False
+
+    def release(self) -> None:
+        """핸들 반납 (참조 카운트 감소, 여러 번 호출해도 안전)"""
+        if not self.released:
+            self.released = True
+            self._registry.release(self.key, self._entry)
+
+
+class ModelRegistry:
+    """프로세스 전역 모델 레지스트리"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[ModelKey, Dict[str, Any]] = {}
+        self._caches: Dict[Optional[str], EmbeddingCache] = {}
+
+    def acquire(self, key: ModelKey, loader: Callable[[], Dict[str, Any]]) -> SharedModelHandle:
+        """
+        모델 핸들 획득 (처음 요청될 때만 loader로 로드)
+
+        레지스트리 lock 안에서는 키별 자리(로드 완료 Event)만 잡고, 로드는 lock 밖에서
+        한다. 같은 키를 동시에 요청한 스레드는 그 로드가 끝나기를 기다리고, 다른 키의
+        획득/반납/통계 조회는 막히지 않는다.
+
+        Args:
+            key: (모델명, 백엔드, 디바이스) 키
+            loader: 모델 구성요소 딕셔너리를 반환하는 로더
+
+        Returns:
+            공유 모델 핸들
+
+        Raises:
+            RuntimeError: 같은 키를 먼저 로드하던 스레드의 로드가 실패함
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            loading = entry is None
+            if loading:
+                entry = {
+                    'components': None,
+                    'ref_count': 0,
+                    'lock': threading.RLock(),
+                    'ready': threading.Event(),
+                    'error': None
+                }
+                self._entries[key] = entry
+            # 로드 중에도 unload_unused가 자리를 지우지 않도록 미리 참조를 잡음
+            entry['ref_count'] += 1
+
+        if loading:
+            logger.info(f"📦 모델 레지스트리 로드: {key}")
+            try:
+                entry['components'] = loader()
+            except Exception as e:
+                # 실패한 자리는 지워서 다음 요청이 다시 로드하게 함
+                with self._lock:
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+                entry['error'] = e
+                raise
+            finally:
+                entry['ready'].set()
+        else:
+            entry['ready'].wait()
+            if entry['error'] is not None:
+                raise RuntimeError(f"모델 로드 실패: {key}") from entry['error']
+            logger.info(f"♻️ 공유 모델 재사용: {key} (참조 {entry['ref_count']})")
+
+        return SharedModelHandle(self, key, entry)
+
+    def release(self, key: ModelKey, entry: Optional[Dict[str, Any]] = None) -> None:
+        """
+        참조 카운트 감소 (0이 되어도 unload 전까지는 메모리에 유지)
+
+        Args:
+            key: 모델 키
+            entry: 핸들을 받은 레지스트리 항목 (지정하면 그 항목이 아직 등록되어 있을 때만 감소,
+                   강제 언로드 전에 받은 핸들이 새로 로드된 항목의 참조를 줄이지 않도록)
+        """
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None or (entry is not None and current is not entry):
+                return
+            if current['ref_count'] > 0:
+                current['ref_count'] -= 1
+
+    def unload(self, key: ModelKey, force: bool = False) -> bool:
+        """
+        모델 언로드
+
+        Args:
+            key: 언로드할 모델 키
+            force: 참조가 남아 있어도 언로드할지 여부
+
+        Returns:
+            언로드 여부
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if entry['ref_count'] > 0 and not force:
+                logger.warning(f"사용 중인 모델은 언로드하지 않습니다: {key} (참조 {entry['ref_count']})")
+                return False
+            del self._entries[key]
+
+        logger.info(f"🗑️ 모델 언로드: {key}")
+        return True
+
+    def unload_unused(self) -> int:
+        """참조가 없는 모델 전부 언로드"""
+        with self._lock:
+            unused = [key for key, entry in self._entries.items() if entry['ref_count'] == 0]
+        return sum(1 for key in unused if self.unload(key))
+
+    def shared_cache(self, cache_dir: Optional[str] = None) -> EmbeddingCache:
+        """
+        캐시 경로별 공유 임베딩 캐시 반환
+
+        같은 디스크 경로를 두 캐시 인스턴스가 동시에 쓰면 행 번호가 어긋나므로
+        프로세스 안에서는 경로당 인스턴스 하나만 사용한다.
+        """
+        cache_key = str(Path(cache_dir).resolve()) if cache_dir else None
+        with self._lock:
+            cache = self._caches.get(cache_key)
+            if cache is None:
+                cache = EmbeddingCache(cache_dir=cache_dir)
+                self._caches[cache_key] = cache
+            return cache
+
+    def get_stats(self) -> Dict[str, Any]:
+        """레지스트리 상태 반환"""
+        with self._lock:
+            return {
+                'loaded_models': [
+                    {
+                        'model_name': key[0],
+                        'backend': key[1],
+                        'device': key[2],
+                        'ref_count': entry['ref_count'],
+                        'loading': not entry['ready'].is_set()
+                    }
+                    for key, entry in self._entries.items()
+                ],
+                'shared_caches': len(self._caches)
+            }
+
+
+_registry = ModelRegistry()
+
+
+def get_model_registry() -> ModelRegistry:
+    """프로세스 전역 모델 레지스트리 반환"""
+    return _registry
@@ -0,0 +1,201 @@
+"""
+근중복 청크 탐지 - 문자 shingle MinHash + LSH 밴딩
+
+임베딩 전에 거의 같은 청크를 묶어 대표 청크 하나만 임베딩하고,
+나머지 청크는 대표의 벡터와 메타데이터를 공유하게 한다.
+"""
+import zlib
+from collections import defaultdict
+from typing import List, Dict, Any, Optional
+import numpy as np
+from loguru import logger
+
+from .embedding_cache import EmbeddingCache
+
+
+# MinHash 해시 계열 (multiply-shift) 계수 생성용 시드 - 실행마다 같은 서명이 나오도록 고정
+_HASH_SEED = 20240611
+
+
+class NearDuplicateDetector:
+    """MinHash 기반 근중복 텍스트 탐지기"""
+
+    def __init__(self,
+                 threshold: float = 0.8,
+                 shingle_size: int = 5,
+                 num_perm: int = 64,
+                 bands: int = 16):
+        """
+        근중복 탐지기 초기화
+
+        Args:
+            threshold: 같은 클러스터로 묶을 최소 추정 Jaccard 유사도
+            shingle_size: 문자 shingle 길이
+            num_perm: MinHash 서명 길이
+            bands: LSH 밴드 수 (num_perm의 약수)
+        """
+        if num_perm % bands != 0:
+            raise ValueError(f"밴드 수({bands})가 서명 길이({num_perm})의 약수가 아닙니다.")
+
+        self.threshold = threshold
+        self.shingle_size = max(1, shingle_size)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows_per_band = num_perm // bands
+
+        rng = np.random.default_rng(_HASH_SEED)
+        # 홀수 곱셈 계수 + 임의 덧셈 계수 (uint64 오버플로는 mod 2^64로 의도된 동작)
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def _shingles(self, text: str) -> np.ndarray:
+        """정규화된 텍스트의 문자 shingle 해시 집합"""
+        text = EmbeddingCache.normalize_text(text)
+        size = self.shingle_size
+        if len(text) <= size:
+            grams = {text}
+        else:
+            grams = {text[i:i + size] for i in range(len(text) - size + 1)}
+        return np.fromiter((zlib.crc32(g.encode('utf-8')) for g in grams), dtype=np.uint64, count=len(grams))
+
+    def signature(self, text: str) -> np.ndarray:
+        """텍스트 하나의 MinHash 서명"""
+        shingles = self._shingles(text)
+        with np.errstate(over='ignore'):
+            hashed = (shingles[:, None] * self._a[None, :] + self._b[None, :]) >> np.uint64(32)
+        return hashed.min(axis=0)
+
+    def find_clusters(self, texts: List[str]) -> Dict[str, Any]:
+        """
+        근중복 클러스터 탐지
+
+        Args:
+            texts: 텍스트 리스트
+
+        Returns:
+            'representatives'(대표 인덱스 리스트), 'assignments'(각 텍스트의 대표 인덱스),
+            'clusters'(대표 -> 구성원 인덱스) 및 제거 통계
+        """
+        parent = list(range(len(texts)))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i: int, j: int) -> None:
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                # 먼저 나온 텍스트를 대표로 유지
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+
+        if texts:
+            signatures = np.stack([self.signature(text) for text in texts])
+
+            # LSH: 밴드 하나라도 완전히 같으면 후보 쌍
+            candidates = set()
+            for band in range(self.bands):
+                buckets = defaultdict(list)
+                band_slice = signatures[:, band * self.rows_per_band:(band + 1) * self.rows_per_band]
+                for i, row in enumerate(band_slice):
+                    buckets[row.tobytes()].append(i)
+                for members in buckets.values():
+                    # 버킷이 커도 쌍 수가 선형이 되도록 첫 구성원/직전 구성원과만 비교
+                    for pos in range(1, len(members)):
+                        candidates.add((members[0], members[pos]))
+                        candidates.add((members[pos - 1], members[pos]))
+
+            # 후보 쌍은 서명 일치율(추정 Jaccard)로 검증
+            for i, j in candidates:
+                if np.mean(signatures[i] == signatures[j]) >= self.threshold:
+                    union(i, j)
+
+        assignments = [find(i) for i in range(len(texts))]
+        clusters = defaultdict(list)
+        for i, representative in enumerate(assignments):
+            clusters[representative].append(i)
+
+        representatives = sorted(clusters)
+        removed = len(texts) - len(representatives)
+
+        return {
+            'representatives': representatives,
+            'assignments': assignments,
+            'clusters': dict(clusters),
+            'total_count': len(texts),
+            'unique_count': len(representatives),
+            'removed_count': removed,
+            'removed_ratio': removed / len(texts) if texts else 0.0
+        }
+
+
+def collapse_near_duplicates(texts: List[str],
+                             metadata: Optional[List[Dict[str, Any]]] = None,
+                             detector: Optional[NearDuplicateDetector] = None) -> Dict[str, Any]:
+    """
+    임베딩 전에 근중복 청크를 대표 청크로 합치기
+
+    대표 청크의 메타데이터에는 'duplicate_count'와 구성원 메타데이터의 'id'를 담은
+    'duplicate_ids'가 추가되므로, 인덱스에는 대표만 넣고도 구성원을 찾아갈 수 있다.
+
+    Args:
+        texts: 청크 텍스트 리스트
+        metadata: 청크별 메타데이터 (None이면 텍스트만 처리)
+        detector: 근중복 탐지기 (None이면 기본 설정)
+
+    Returns:
+        'texts', 'metadata'(대표만), 'assignments'(원래 인덱스 -> 대표 위치), 'stats'
+    """
+    if metadata is not None and len(metadata) != len(texts):
+        raise ValueError("텍스트와 메타데이터의 개수가 일치하지 않습니다.")
+
+    detector = detector or NearDuplicateDetector()
+    result = detector.find_clusters(texts)
+
+    position = {representative: pos for pos, representative in enumerate(result['representatives'])}
+    representative_texts = [texts[i] for i in result['representatives']]
+
+    representative_metadata = None
+    if metadata is not None:
+        representative_metadata = []
+        for representative in result['representatives']:
+            meta = dict(metadata[representative])
+            members = result['clusters'][representative][1:]
+            if members:
+                meta['duplicate_count'] = len(members)
+                meta['duplicate_ids'] = [metadata[i].get('id', i) for i in members]
+            representative_metadata.append(meta)
+
+    stats = {
+        'total_count': result['total_count'],
+        'unique_count': result['unique_count'],
+        'removed_count': result['removed_count'],
+        'removed_ratio': result['removed_ratio'],
+        'threshold': detector.threshold
+    }
+
+    if result['removed_count']:
+        logger.info(f"근중복 제거: {result['total_count']}개 -> {result['unique_count']}개 "
+                    f"({result['removed_count']}개, {result['removed_ratio']:.1%} 제거)")
+
+    return {
+        'texts': representative_texts,
+        'metadata': representative_metadata,
+        'assignments': [position[r] for r in result['assignments']],
+        'stats': stats
+    }
+
+
+def expand_embeddings(embeddings: np.ndarray, assignments: List[int]) -> np.ndarray:
+    """
+    대표 청크 임베딩을 원래 청크 순서로 펼치기 (구성원은 대표 벡터를 공유)
+
+    Args:
+        embeddings: 대표 청크 임베딩 (대표 수 x 차원)
+        assignments: collapse_near_duplicates의 'assignments'
+
+    Returns:
+        (원래 청크 수 x 차원) 임베딩
+    """
+    return embeddings[np.asarray(assignments, dtype=np.int64)]
@@ -0,0 +1,159 @@
+"""
+ONNX Runtime 임베딩 추론 백엔드
+
+transformers 모델을 한 번 ONNX로 내보내고(선택적으로 동적 int8 양자화),
+onnxruntime CPU 세션으로 [CLS] 임베딩을 계산한다.
+"""
+import re
+from pathlib import Path
+from typing import Dict, Any, Optional
+import numpy as np
+from loguru import logger
+
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    ONNXRUNTIME_AVAILABLE = False
+    logger.warning("onnxruntime이 설치되지 않았습니다. ONNX 백엔드를 사용할 수 없습니다.")
+
+
+class OnnxEmbeddingBackend:
+    """ONNX Runtime 기반 [CLS] 임베딩 백엔드"""
+
+    def __init__(self,
+                 model_name: str,
+                 onnx_dir: str = "./data/onnx_models",
+                 quantize: bool = False,
+                 num_threads: Optional[int] = None):
+        """
+        ONNX 백엔드 초기화
+
+        Args:
+            model_name: 원본 transformers 모델명
+            onnx_dir: ONNX 모델 저장 경로
+            quantize: 동적 int8 양자화 적용 여부
+            num_threads: onnxruntime intra-op 스레드 수 (None이면 기본값)
+        """
+        if not ONNXRUNTIME_AVAILABLE:
+            raise ImportError("onnxruntime 패키지가 필요합니다: pip install onnxruntime onnx")
+
+        self.model_name = model_name
+        self.quantize = quantize
+        self.num_threads = num_threads
+        self.model_dir = Path(onnx_dir) / re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+        self.session = None
+        self.input_names = []
+
+    @property
+    def fp32_path(self) -> Path:
+        return self.model_dir / "model.onnx"
+
+    @property
+    def int8_path(self) -> Path:
+        return self.model_dir / "model.int8.onnx"
+
+    @property
+    def model_path(self) -> Path:
+        """실제로 세션에 로드할 ONNX 파일 경로"""
+        return self.int8_path if self.quantize else self.fp32_path
+
+    def prepare(self, torch_model, tokenizer) -> None:
+        """
+        필요하면 ONNX 내보내기/양자화 후 추론 세션 생성
+
+        Args:
+            torch_model: 내보낼 transformers 모델 (이미 내보낸 파일이 있으면 사용하지 않음)
+            tokenizer: 더미 입력 생성용 토크나이저
+        """
+        if not self.fp32_path.exists():
+            self.export(torch_model, tokenizer)
+
+        if self.quantize and not self.int8_path.exists():
+            self._quantize()
+
+        self._create_session()
+
+    def export(self, torch_model, tokenizer) -> None:
+        """transformers 모델을 [CLS] 임베딩 출력 ONNX 그래프로 내보내기"""
+        import torch
+
+        class _ClsPooling(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, input_ids, attention_mask):
+                outputs = self.model(input_ids=input_ids, attention_mask=attention_mask)
+                return outputs.last_hidden_state[:, 0, :]
+
+        logger.info(f"ONNX 내보내기 시작: {self.model_name} -> {self.fp32_path}")
+        self.model_dir.mkdir(parents=True, exist_ok=True)
+
+        dummy = tokenizer(["ONNX 내보내기용 더미 문장"], return_tensors="pt")
+        original_device = next(torch_model.parameters()).device
+        wrapper = _ClsPooling(torch_model.to("cpu")).eval()
+
+        with torch.no_grad():
+            torch.onnx.export(
+                wrapper,
+                (dummy["input_ids"], dummy["attention_mask"]),
+                str(self.fp32_path),
+                input_names=["input_ids", "attention_mask"],
+                output_names=["cls_embedding"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "cls_embedding": {0: "batch"}
+                },
+                opset_version=14
+            )
+
+        torch_model.to(original_device)
+        logger.info(f"ONNX 내보내기 완료: {self.fp32_path}")
+
+    def _quantize(self) -> None:
+        """동적 int8 양자화 (가중치만 int8, 활성값은 런타임 양자화)"""
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        logger.info(f"동적 int8 양자화 시작: {self.int8_path}")
+        quantize_dynamic(
+            model_input=str(self.fp32_path),
+            model_output=str(self.int8_path),
+            weight_type=QuantType.QInt8
+        )
+
+        fp32_mb = self.fp32_path.stat().st_size / 1024 / 1024
+        int8_mb = self.int8_path.stat().st_size / 1024 / 1024
+        logger.info(f"양자화 완료: {fp32_mb:.1f}MB -> {int8_mb:.1f}MB")
+
+    def _create_session(self) -> None:
+        """onnxruntime CPU 추론 세션 생성"""
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self.num_threads:
+            options.intra_op_num_threads = self.num_threads
+
+        self.session = ort.InferenceSession(
+            str(self.model_path),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        logger.info(f"ONNX 세션 생성 완료: {self.model_path.name}")
+
+    def encode(self, inputs: Dict[str, Any]) -> np.ndarray:
+        """
+        토크나이저 출력(numpy)으로 [CLS] 임베딩 계산
+
+        Args:
+            inputs: return_tensors="np" 토크나이저 출력
+
+        Returns:
+            [CLS] 임베딩 배열 (배치 크기 x 차원)
+        """
+        if self.session is None:
+            raise ValueError("ONNX 세션이 생성되지 않았습니다. prepare()를 먼저 호출하세요.")
+
+        feed = {name: np.asarray(inputs[name], dtype=np.int64) for name in self.input_names}
+        return self.session.run(None, feed)[0]
@@ -148,7 +148,8 @@ class PersonaChatbot:
     def generate_project_recommendations(self, 
                                        user_question: str,
                                        search_k: int = 5,
-                                       use_conversation_history: bool = True) -> Dict[str, Any]:
+                                       use_conversation_history: bool = True,
+                                       search_results: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """
         개인 맞춤형 프로젝트 추천 생성
         
@@ -156,6 +157,7 @@ class PersonaChatbot:
             user_question: 사용자 질문
             search_k: 검색할 결과 수
             use_conversation_history: 대화 히스토리 사용 여부
+            search_results: 미리 수행한 검색 결과 (None이면 여기서 의미적 검색 실행)
             
         Returns:
             추천 결과 딕셔너리
@@ -164,7 +166,8 @@ class PersonaChatbot:
         
         try:
             # 1. 의미적 검색으로 관련 컨텍스트 수집
-            search_results = self.search_system.semantic_search(user_question, k=search_k)
+            if search_results is None:
+                search_results = self.search_system.semantic_search(user_question, k=search_k)
             
             # 2. 프롬프트 생성
             if search_results:
@@ -0,0 +1,247 @@
+"""
+동시 질문 마이크로 배칭 - 비동기 요청 합치기
+
+짧은 대기 시간(수 ms) 동안 들어온 질문들을 모아 한 번의 배치 임베딩과
+인덱스별 한 번의 FAISS 검색으로 처리한 뒤, 각 요청자에게 결과를 나눠 돌려준다.
+"""
+import time
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Executor
+from typing import List, Dict, Any, Optional
+from loguru import logger
+
+from .search_params import normalize_spec, spec_key
+
+
+class _PendingQuery:
+    """배치를 기다리는 질문 하나"""
+
+    __slots__ = ("search_system", "query", "k", "similarity_threshold", "search_params", "future")
+
+    def __init__(self, search_system, query: str, k: int, similarity_threshold: float,
+                 search_params, future: asyncio.Future):
+        self.search_system = search_system
+        self.query = query
+        self.k = k
+        self.similarity_threshold = similarity_threshold
+        self.search_params = search_params
+        self.future = future
+
+
+class QueryBatcher:
+    """동시 의미적 검색 요청을 모아 배치로 처리하는 코얼레서"""
+
+    def __init__(self,
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0,
+                 executor: Optional[Executor] = None):
+        """
+        코얼레서 초기화
+
+        Args:
+            max_batch_size: 한 배치에 모을 최대 질문 수
+            max_wait_ms: 첫 질문이 도착한 뒤 배치를 닫기까지 기다리는 최대 시간 (ms)
+            executor: 임베딩/검색을 실행할 스레드 풀 (None이면 이벤트 루프 기본 풀)
+        """
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait_seconds = max(0.0, max_wait_ms) / 1000
+        self.executor = executor
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.batch_count = 0
+        self.request_count = 0
+        self.max_observed_batch = 0
+        self.total_batch_seconds = 0.0
+
+        logger.info(f"질문 배처 초기화: 최대 배치 {self.max_batch_size}개, 최대 대기 {max_wait_ms}ms")
+
+    async def semantic_search(self,
+                              search_system,
+                              query: str,
+                              k: Optional[int] = None,
+                              similarity_threshold: Optional[float] = None,
+                              search_params=None) -> List[Dict[str, Any]]:
+        """
+        SearchSystem.semantic_search와 같은 결과를 배치 처리로 반환
+
+        Args:
+            search_system: 검색할 SearchSystem 인스턴스
+            query: 검색 질문
+            k: 반환할 결과 수
+            similarity_threshold: 유사도 임계값
+            search_params: 검색 설정 (프리셋 이름, 파라미터 딕셔너리 또는 FAISS SearchParameters)
+
+        Returns:
+            검색 결과 리스트
+
+        Raises:
+            ValueError: 알 수 없는 프리셋이나 파라미터
+        """
+        normalize_spec(search_params)
+        self._ensure_worker()
+
+        pending = _PendingQuery(
+            search_system,
+            query,
+            k if k is not None else search_system.default_k,
+            similarity_threshold if similarity_threshold is not None else search_system.min_similarity_threshold,
+            search_params,
+            asyncio.get_running_loop().create_future()
+        )
+        await self._queue.put(pending)
+        return await pending.future
+
+    def _ensure_worker(self) -> None:
+        """현재 이벤트 루프에 배치 워커가 없으면 시작"""
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """배치 워커 종료"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def _collect_batch(self) -> List[_PendingQuery]:
+        """첫 질문을 기다린 뒤 max_wait 동안 또는 배치가 찰 때까지 질문 수집"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_seconds
+
+        while len(batch) < self.max_batch_size:
+            # 이미 도착한 요청은 기다리지 않고 바로 담기
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        """배치 수집과 처리를 반복하는 워커"""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+
+            # 모델 추론과 FAISS 검색은 블로킹이므로 스레드 풀에서 실행
+            # (처리 중에 도착한 질문은 다음 배치로 모인다)
+            try:
+                results = await loop.run_in_executor(self.executor, self._process_batch, batch)
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for pending, result in zip(batch, results):
+                if pending.future.done():
+                    continue  # 요청자가 이미 취소한 경우
+                if isinstance(result, Exception):
+                    pending.future.set_exception(result)
+                else:
+                    pending.future.set_result(result)
+
+    def _process_batch(self, batch: List[_PendingQuery]) -> List[Any]:
+        """
+        배치 하나 처리 (스레드 풀에서 실행)
+
+        같은 임베딩 모델을 쓰는 질문은 한 번에 임베딩하고, 같은 인덱스와 검색 설정을
+        쓰는 질문은 가장 큰 k로 한 번에 검색한 뒤 요청별 k와 임계값으로 잘라낸다.
+        """
+        start_time = time.perf_counter()
+        results: List[Any] = [None] * len(batch)
+
+        # 1. 임베딩 모델별로 묶어 한 번의 forward pass
+        by_model: Dict[str, List[int]] = OrderedDict()
+        for i, pending in enumerate(batch):
+            # 식별자는 로드 후에 확정됨 (lazy_load + ONNX면 로드 전에는 torch 식별자)
+            embedding_generator = pending.search_system.embedding_generator
+            embedding_generator._ensure_model_loaded()
+            identity = embedding_generator.model_identity
+            by_model.setdefault(identity, []).append(i)
+
+        raw_embeddings = {}
+        for members in by_model.values():
+            search_system = batch[members[0]].search_system
+            try:
+                embeddings = search_system.generate_query_embeddings(
+                    [batch[i].query for i in members], project=False
+                )
+                raw_embeddings.update(zip(members, embeddings))
+            except Exception as e:
+                # 배치 실패 시 요청 단위로 처리하여 실패를 격리
+                logger.warning(f"질문 배치 임베딩 실패, 개별 처리로 전환: {e}")
+                for i in members:
+                    pending = batch[i]
+                    results[i] = pending.search_system.semantic_search(
+                        pending.query, pending.k, pending.similarity_threshold, pending.search_params
+                    )
+
+        # 2. 인덱스(SearchSystem)와 검색 설정별로 묶어 한 번의 배치 검색
+        by_system: Dict[tuple, List[int]] = OrderedDict()
+        for i in raw_embeddings:
+            group = (id(batch[i].search_system), spec_key(batch[i].search_params))
+            by_system.setdefault(group, []).append(i)
+
+        for members in by_system.values():
+            search_system = batch[members[0]].search_system
+            vector_db = search_system.vector_db
+            try:
+                if vector_db.index is None or vector_db.live_count == 0:
+                    for i in members:
+                        results[i] = []
+                    continue
+
+                query_vectors = vector_db.project(
+                    [raw_embeddings[i] for i in members]
+                ).astype('float32', copy=True)
+                max_k = max(batch[i].k for i in members)
+                search_results = vector_db.batch_search_results(
+                    query_vectors, max_k, batch[members[0]].search_params
+                )
+
+                for row, i in enumerate(members):
+                    pending = batch[i]
+                    results[i] = search_system._build_search_results(
+                        pending.query,
+                        search_results.scores[row][:pending.k],
+                        search_results.metadata(row)[:pending.k],
+                        pending.similarity_threshold
+                    )
+            except Exception as e:
+                logger.error(f"❌ 배치 검색 실패: {e}")
+                for i in members:
+                    results[i] = e
+
+        elapsed = time.perf_counter() - start_time
+        self.batch_count += 1
+        self.request_count += len(batch)
+        self.max_observed_batch = max(self.max_observed_batch, len(batch))
+        self.total_batch_seconds += elapsed
+
+        logger.info(f"질문 배치 처리 완료: {len(batch)}개, {elapsed * 1000:.1f}ms")
+        return results
+
+    def get_stats(self) -> Dict[str, Any]:
+        """배치 처리 통계 반환"""
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait_seconds * 1000,
+            'batches': self.batch_count,
+            'requests': self.request_count,
+            'avg_batch_size': self.request_count / self.batch_count if self.batch_count else 0.0,
+            'max_observed_batch': self.max_observed_batch,
+            'avg_batch_ms': self.total_batch_seconds / self.batch_count * 1000 if self.batch_count else 0.0
+        }
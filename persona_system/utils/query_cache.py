@@ -0,0 +1,134 @@
+"""
+질문 임베딩 캐시 - (모델, 확장된 질문) 기반 LRU + TTL 캐시
+
+같은 질문이 반복되면 전처리, 질문 확장, 모델 forward pass를 모두 건너뛴다.
+원문 질문 -> 확장된 질문 매핑도 함께 기억해 전처리까지 생략한다.
+"""
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import numpy as np
+from loguru import logger
+
+
+class QueryEmbeddingCache:
+    """검색 질문 임베딩 LRU/TTL 캐시"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = 3600.0):
+        """
+        질문 임베딩 캐시 초기화
+
+        Args:
+            max_size: 최대 항목 수 (0이면 캐시 사용 안 함)
+            ttl_seconds: 항목 유효 시간 (None이면 만료 없음)
+        """
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+
+        # (모델 식별자, 확장된 질문) -> (저장 시각, 임베딩)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, np.ndarray]]" = OrderedDict()
+        # 원문 질문 -> 확장된 질문 (전처리 결과는 모델과 무관하고 결정적)
+        self._expanded: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+
+        logger.info(f"질문 임베딩 캐시 초기화: 최대 {self.max_size}개, TTL {ttl_seconds}초")
+
+    def get_expanded(self, query: str) -> Optional[str]:
+        """원문 질문의 전처리/확장 결과 조회"""
+        with self._lock:
+            expanded = self._expanded.get(query)
+            if expanded is not None:
+                self._expanded.move_to_end(query)
+            return expanded
+
+    def put_expanded(self, query: str, expanded: str) -> None:
+        """원문 질문의 전처리/확장 결과 저장"""
+        if self.max_size == 0:
+            return
+        with self._lock:
+            self._expanded[query] = expanded
+            self._expanded.move_to_end(query)
+            while len(self._expanded) > self.max_size:
+                self._expanded.popitem(last=False)
+
+    def get(self, model_identity: str, expanded_query: str) -> Optional[np.ndarray]:
+        """
+        캐시에서 질문 임베딩 조회
+
+        Args:
+            model_identity: 임베딩 모델 식별자
+            expanded_query: 전처리/확장된 질문
+
+        Returns:
+            임베딩 벡터 또는 None (없거나 만료된 경우)
+        """
+        key = (model_identity, expanded_query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, embedding = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, model_identity: str, expanded_query: str, embedding: np.ndarray) -> None:
+        """
+        질문 임베딩 저장
+
+        Args:
+            model_identity: 임베딩 모델 식별자
+            expanded_query: 전처리/확장된 질문
+            embedding: 임베딩 벡터
+        """
+        if self.max_size == 0:
+            return
+
+        embedding = np.array(embedding, dtype=np.float32).reshape(-1)
+        embedding.setflags(write=False)  # 호출자가 캐시된 벡터를 수정하지 못하도록
+
+        with self._lock:
+            key = (model_identity, expanded_query)
+            self._entries[key] = (time.monotonic(), embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """캐시 전체 초기화"""
+        with self._lock:
+            self._entries.clear()
+            self._expanded.clear()
+            self.hits = 0
+            self.misses = 0
+            self.expirations = 0
+            self.evictions = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """캐시 통계 반환"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'entries': len(self._entries),
+            'max_size': self.max_size,
+            'ttl_seconds': self.ttl_seconds,
+            'expirations': self.expirations,
+            'evictions': self.evictions
+        }
@@ -0,0 +1,273 @@
+"""
+검색 파라미터 - 요청별 재현율/지연 시간 조절 (nprobe, efSearch, 재순위 배수)과 이름 있는 프리셋
+
+인덱스에 저장된 기본값(튜닝된 nprobe, efSearch 등)은 그대로 두고, 검색 호출마다
+FAISS SearchParameters를 만들어 넘기므로 동시에 다른 설정으로 검색해도 서로 영향이 없다.
+"""
+from typing import Dict, Any, Optional, Union
+import numpy as np
+import faiss
+
+
+# 이름 있는 프리셋
+#   fast: 대화형 응답용 (탐색 범위를 줄여 지연 시간 우선)
+#   balanced: 인덱스 기본값 (IVF는 튜닝된 nprobe)
+#   exact: 오프라인 분석용 (원본 벡터가 있으면 전체 비교, IVF는 모든 클러스터 탐색)
+SEARCH_PRESETS: Dict[str, Dict[str, Any]] = {
+    'fast': {'nprobe_scale': 0.5, 'ef_search': 32, 'rerank_factor': 2},
+    'balanced': {},
+    'exact': {'exhaustive': True},
+}
+
+# 필터와 일치하는 벡터가 전체의 이 비율 미만이면 근사 탐색 대신 일치하는 벡터만 전체 비교
+FILTER_EXHAUSTIVE_FRACTION = 0.01
+
+# 허용하는 검색 파라미터 키
+_PARAM_KEYS = {'nprobe', 'nprobe_scale', 'ef_search', 'rerank_factor', 'exhaustive'}
+
+SearchSpec = Union[None, str, Dict[str, Any], faiss.SearchParameters]
+
+
+def normalize_spec(spec: SearchSpec) -> Optional[Dict[str, Any]]:
+    """
+    프리셋 이름/딕셔너리를 검색 파라미터 딕셔너리로 변환 (FAISS 객체는 그대로)
+
+    딕셔너리에 'preset' 키가 있으면 그 프리셋을 바탕으로 나머지 키를 덮어쓴다.
+    """
+    if spec is None or isinstance(spec, faiss.SearchParameters):
+        return spec
+    if isinstance(spec, str):
+        spec = {'preset': spec}
+    if not isinstance(spec, dict):
+        raise TypeError(f"지원하지 않는 검색 파라미터 형식: {type(spec).__name__}")
+
+    spec = dict(spec)
+    preset = spec.pop('preset', None)
+    if preset is not None:
+        if preset not in SEARCH_PRESETS:
+            raise ValueError(f"알 수 없는 검색 프리셋: {preset} (사용 가능: {', '.join(SEARCH_PRESETS)})")
+        spec = {**SEARCH_PRESETS[preset], **spec}
+
+    unknown = set(spec) - _PARAM_KEYS
+    if unknown:
+        raise ValueError(f"알 수 없는 검색 파라미터: {sorted(unknown)}")
+    return spec
+
+
+def spec_key(spec: SearchSpec) -> str:
+    """검색 파라미터를 묶음 처리용 키로 변환 (같은 키면 한 번의 배치 검색 가능)"""
+    if isinstance(spec, faiss.SearchParameters):
+        return f"faiss:{id(spec)}"
+    spec = normalize_spec(spec)
+    return repr(sorted(spec.items())) if spec else ""
+
+
+def build_faiss_params(index,
+                       nprobe: Optional[int] = None,
+                       ef_search: Optional[int] = None,
+                       rerank_factor: Optional[float] = None,
+                       nprobe_scale: Optional[float] = None,
+                       sel=None):
+    """
+    인덱스 구조(IDMap/Refine/PreTransform 감싸기)에 맞춘 FAISS SearchParameters 생성
+
+    지정하지 않은 값은 인덱스의 현재 설정을 쓴다. 하위 파라미터 객체는 상위 객체의
+    referenced_objects에 보관해 Python 쪽에서 먼저 해제되지 않도록 한다.
+
+    Args:
+        index: 검색할 인덱스
+        nprobe: IVF 탐색 클러스터 수
+        ef_search: HNSW 탐색 깊이
+        rerank_factor: 재순위 후보 배수 (k * rerank_factor)
+        nprobe_scale: nprobe가 없을 때 인덱스 nprobe에 곱할 배율
+        sel: 가장 안쪽 인덱스에 넘길 IDSelector (그 인덱스의 행 번호 기준)
+
+    Returns:
+        SearchParameters (조절할 값이 없는 인덱스면 None)
+    """
+    index = faiss.downcast_index(index)
+
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return build_faiss_params(index.index, nprobe, ef_search, rerank_factor, nprobe_scale, sel)
+
+    if isinstance(index, faiss.IndexRefine):
+        inner = build_faiss_params(index.base_index, nprobe, ef_search, rerank_factor, nprobe_scale, sel)
+        params = faiss.IndexRefineSearchParameters(
+            k_factor=rerank_factor if rerank_factor is not None else index.k_factor,
+            base_index_params=inner
+        )
+        params.referenced_objects = [inner]
+        return params
+
+    if isinstance(index, faiss.IndexPreTransform):
+        inner = build_faiss_params(index.index, nprobe, ef_search, rerank_factor, nprobe_scale, sel)
+        if inner is None:
+            return None
+        params = faiss.SearchParametersPreTransform(index_params=inner)
+        params.referenced_objects = [inner]
+        return params
+
+    if isinstance(index, faiss.IndexIVF):
+        if nprobe is None:
+            nprobe = index.nprobe
+            if nprobe_scale is not None:
+                nprobe = int(round(nprobe * nprobe_scale))
+        return faiss.SearchParametersIVF(nprobe=int(min(max(1, nprobe), index.nlist)), sel=sel)
+
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=int(ef_search if ef_search is not None else index.hnsw.efSearch),
+                                          sel=sel)
+
+    # Flat/SQ: 조절할 파라미터 없음 (선택자만)
+    return faiss.SearchParameters(sel=sel) if sel is not None else None
+
+
+def exact_storage(index):
+    """
+    원본 float 벡터를 행 순서대로 가진 Flat 인덱스 (HNSW 저장소, 재순위 원본 벡터)
+
+    없으면 None (Flat은 자체가 정확 검색, IVF/SQ는 원본 벡터가 없음)
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return exact_storage(index.index)
+    if isinstance(index, faiss.IndexRefine):
+        return faiss.downcast_index(index.refine_index)
+    if isinstance(index, faiss.IndexHNSWFlat):
+        return faiss.downcast_index(index.storage)
+    return None
+
+
+def search_with_spec(index, queries: np.ndarray, k: int, spec: SearchSpec,
+                     label_mask: Optional[np.ndarray] = None):
+    """
+    검색 파라미터를 적용해 검색
+
+    exhaustive 요청이면 원본 벡터 저장소를 전체 비교하고 행 번호를 라벨로 바꾼다.
+    원본 벡터가 없는 IVF는 모든 클러스터를 탐색한다.
+
+    Args:
+        index: 검색할 인덱스 (IDMap2로 감싼 인덱스 포함)
+        queries: 정규화된 질문 벡터
+        k: 가져올 결과 수
+        spec: 프리셋 이름, 파라미터 딕셔너리, FAISS SearchParameters 또는 None
+        label_mask: 검색 대상 라벨 비트맵 (None이면 전체, search_filtered 참고)
+
+    Returns:
+        (거리, 라벨) 튜플
+    """
+    if label_mask is not None:
+        return search_filtered(index, queries, k, spec, label_mask)
+
+    if isinstance(spec, faiss.SearchParameters):
+        return index.search(queries, k, params=spec)
+
+    spec = normalize_spec(spec)
+    if not spec:
+        return index.search(queries, k)
+
+    if spec.get('exhaustive'):
+        storage = exact_storage(index)
+        if storage is not None:
+            distances, rows = storage.search(queries, k)
+            if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+                row_labels = faiss.vector_to_array(index.id_map)
+                labels = np.where(rows >= 0, row_labels[np.maximum(rows, 0)], -1)
+            else:
+                labels = rows
+            return distances, labels
+
+        ivf_index = faiss.try_extract_index_ivf(index)
+        if ivf_index is not None:
+            spec = {**spec, 'nprobe': ivf_index.nlist}
+
+    params = build_faiss_params(
+        index,
+        nprobe=spec.get('nprobe'),
+        ef_search=spec.get('ef_search'),
+        rerank_factor=spec.get('rerank_factor'),
+        nprobe_scale=spec.get('nprobe_scale')
+    )
+    if params is None:
+        return index.search(queries, k)
+    return index.search(queries, k, params=params)
+
+
+def _unwrap_id_map(index):
+    """(안쪽 인덱스, 행 번호 -> 라벨 배열)"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index), faiss.vector_to_array(index.id_map)
+    # ID 매핑 이전에 저장된 인덱스는 행 위치가 곧 라벨
+    return index, np.arange(index.ntotal, dtype=np.int64)
+
+
+def _search_rows(index, queries: np.ndarray, k: int, spec: Dict[str, Any], sel):
+    """IDMap 안쪽 인덱스를 행 번호 선택자로 검색 (exhaustive면 원본 벡터 전체 비교 / 전체 클러스터)"""
+    if spec.get('exhaustive'):
+        storage = exact_storage(index)
+        if storage is not None:
+            return storage.search(queries, k, params=faiss.SearchParameters(sel=sel))
+        ivf_index = faiss.try_extract_index_ivf(index)
+        if ivf_index is not None:
+            spec = {**spec, 'nprobe': ivf_index.nlist}
+
+    params = build_faiss_params(
+        index,
+        nprobe=spec.get('nprobe'),
+        ef_search=spec.get('ef_search'),
+        rerank_factor=spec.get('rerank_factor'),
+        nprobe_scale=spec.get('nprobe_scale'),
+        sel=sel
+    )
+    return index.search(queries, k, params=params)
+
+
+def search_filtered(index, queries: np.ndarray, k: int, spec: SearchSpec, label_mask: np.ndarray):
+    """
+    라벨 비트맵에 든 벡터만 대상으로 검색 (비트맵을 FAISS IDSelectorBitmap으로 변환)
+
+    선택자는 가장 안쪽 인덱스에 걸리므로 탐색 중에 일치하지 않는 벡터는 거리 계산도
+    하지 않는다. 일치하는 벡터가 적으면(FILTER_EXHAUSTIVE_FRACTION 미만) 처음부터 전체
+    비교하고, 근사 탐색(HNSW 그래프, 일부 IVF 클러스터)이 min(k, 일치 수)개를 못 채운
+    질문은 전체 비교로 다시 검색해 항상 k개를 채운다.
+
+    Args:
+        index: 검색할 인덱스 (IDMap2로 감싼 인덱스 포함)
+        queries: 정규화된 질문 벡터
+        k: 가져올 결과 수
+        spec: 프리셋 이름, 파라미터 딕셔너리 또는 None
+        label_mask: 라벨별 검색 대상 여부 (bool 배열)
+
+    Returns:
+        (거리, 라벨) 튜플
+    """
+    if isinstance(spec, faiss.SearchParameters):
+        raise ValueError("필터 검색에는 FAISS SearchParameters 대신 프리셋 이름이나 파라미터 딕셔너리를 사용하세요.")
+    spec = dict(normalize_spec(spec) or {})
+
+    inner, row_labels = _unwrap_id_map(index)
+    if len(row_labels) and row_labels.max() >= len(label_mask):
+        # 비트맵을 만든 뒤 추가된 벡터는 검색 대상에서 제외
+        label_mask = np.pad(label_mask, (0, int(row_labels.max()) + 1 - len(label_mask)))
+    row_mask = label_mask[row_labels]
+    match_count = int(row_mask.sum())
+    if match_count == 0:
+        return (np.full((len(queries), k), -np.inf, dtype=np.float32),
+                np.full((len(queries), k), -1, dtype=np.int64))
+
+    # 비트 순서는 FAISS IDSelectorBitmap과 같은 little-endian (bitmap은 검색이 끝날 때까지 유지)
+    bitmap = np.packbits(row_mask, bitorder='little')
+    sel = faiss.IDSelectorBitmap(len(row_mask), faiss.swig_ptr(bitmap))
+
+    if match_count < FILTER_EXHAUSTIVE_FRACTION * len(row_mask):
+        spec['exhaustive'] = True
+    distances, rows = _search_rows(inner, queries, k, spec, sel)
+
+    # 근사 탐색이 일치하는 벡터를 다 찾지 못한 질문은 전체 비교로 다시
+    short = (rows != -1).sum(axis=1) < min(k, match_count)
+    if short.any() and not spec.get('exhaustive'):
+        distances[short], rows[short] = _search_rows(inner, queries[short], k, {**spec, 'exhaustive': True}, sel)
+
+    labels = np.where(rows >= 0, row_labels[np.maximum(rows, 0)], -1)
+    return distances, labels
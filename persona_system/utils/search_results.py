@@ -0,0 +1,99 @@
+"""
+배치 검색 결과 - 열(column) 배열과 지연 메타데이터 뷰
+
+점수/라벨/순위는 (질문 수 x k) 배열로 그대로 두고, 메타데이터는 처음 필요할 때
+전체 배치의 고유 라벨만 한 번에 읽는다. 행마다 dict를 복사하지 않고 저장소에서 읽은
+dict를 읽기 전용 뷰로 공유하며, 이전 형식(점수/순위가 들어간 dict 리스트)은
+to_dicts()를 호출할 때만 만든다.
+"""
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Mapping
+import numpy as np
+
+
+class SearchResults:
+    """배치 검색 결과 (점수/라벨/순위 배열 + 지연 메타데이터)"""
+
+    def __init__(self, scores: np.ndarray, labels: np.ndarray, metadata_store, external_ids: List[str]):
+        """
+        배치 검색 결과 초기화
+
+        Args:
+            scores: (질문 수 x k) 유사도 (결과가 모자라는 자리는 라벨 -1)
+            labels: (질문 수 x k) FAISS 라벨
+            metadata_store: 검색 시점의 메타데이터 저장소 (라벨로 조회)
+            external_ids: 검색 시점의 라벨 -> 외부 ID 리스트
+        """
+        self.scores = scores
+        self.labels = labels
+        self.valid = labels != -1
+        self._metadata_store = metadata_store
+        self._external_ids = external_ids
+        self._rows: Optional[Dict[int, Dict[str, Any]]] = None
+        self._ids: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    @property
+    def counts(self) -> np.ndarray:
+        """질문별 결과 수"""
+        return self.valid.sum(axis=1)
+
+    @property
+    def ranks(self) -> np.ndarray:
+        """(질문 수 x k) 순위 (1부터, 결과가 없는 자리는 0)"""
+        positions = np.arange(1, self.labels.shape[1] + 1, dtype=np.int32)
+        return np.where(self.valid, positions, 0)
+
+    @property
+    def ids(self) -> np.ndarray:
+        """(질문 수 x k) 외부 ID 배열 (결과가 없는 자리는 None, 고유 라벨만 조회)"""
+        if self._ids is None:
+            unique_labels, inverse = np.unique(self.labels[self.valid], return_inverse=True)
+            unique_ids = np.array([self._external_ids[label] for label in unique_labels.tolist()] + [None],
+                                  dtype=object)
+            ids = np.full(self.labels.shape, None, dtype=object)
+            ids[self.valid] = unique_ids[inverse]
+            self._ids = ids
+        return self._ids
+
+    def _load_rows(self) -> Dict[int, Dict[str, Any]]:
+        """배치 전체의 고유 라벨 메타데이터를 한 번에 읽기 (처음 접근할 때만)"""
+        if self._rows is None:
+            unique_labels = np.unique(self.labels[self.valid]).tolist()
+            self._rows = dict(zip(unique_labels, self._metadata_store.get_many(unique_labels)))
+        return self._rows
+
+    def metadata(self, query_idx: int) -> List[Mapping[str, Any]]:
+        """
+        질문 하나의 결과 메타데이터 (복사 없는 읽기 전용 뷰, 순위 순서)
+
+        점수와 순위는 scores/ranks 배열에서 같은 위치로 읽는다.
+
+        Args:
+            query_idx: 질문 위치
+
+        Returns:
+            메타데이터 뷰 리스트
+        """
+        rows = self._load_rows()
+        labels = self.labels[query_idx]
+        return [MappingProxyType(rows[label]) for label in labels[labels != -1].tolist()]
+
+    def to_dicts(self) -> List[List[Dict[str, Any]]]:
+        """
+        질문별 결과 dict 리스트 (메타데이터 복사본에 'similarity_score', 'rank' 추가)
+
+        Returns:
+            이전 batch_search와 같은 형식의 결과
+        """
+        rows = self._load_rows()
+        all_results = []
+        for labels, scores in zip(self.labels.tolist(), self.scores.tolist()):
+            all_results.append([
+                {**rows[label], 'similarity_score': score, 'rank': rank}
+                for rank, (label, score) in enumerate(zip(labels, scores), start=1)
+                if label != -1
+            ])
+        return all_results
@@ -5,6 +5,7 @@
 """
 import os
 import json
+import threading
 import numpy as np
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple, Union
@@ -14,6 +15,9 @@ from loguru import logger
 from .embedding_generator import EmbeddingGenerator
 from .vector_database import VectorDatabase
 from .text_preprocessor import TextPreprocessor
+from .query_cache import QueryEmbeddingCache
+from .search_params import SearchSpec, normalize_spec
+from .metadata_index import validate_filters
 
 
 class SearchSystem:
@@ -21,21 +25,33 @@ class SearchSystem:
     
     def __init__(self, 
                  vector_db_path: str = "./data/faiss_index",
-                 embedding_model: str = "klue/roberta-base"):
+                 embedding_model: str = "klue/roberta-base",
+                 embedding_cache_dir: Optional[str] = None,
+                 query_cache_size: int = 1024,
+                 query_cache_ttl: Optional[float] = 3600.0):
         """
         검색 시스템 초기화
         
         Args:
             vector_db_path: 벡터 데이터베이스 경로
             embedding_model: 임베딩 모델명
+            embedding_cache_dir: 임베딩 디스크 캐시 경로 (None이면 메모리 캐시만 사용)
+            query_cache_size: 질문 임베딩 캐시 최대 항목 수 (0이면 사용 안 함)
+            query_cache_ttl: 질문 임베딩 캐시 유효 시간 (초, None이면 만료 없음)
         """
         self.vector_db_path = vector_db_path
         self.embedding_model = embedding_model
         
         # 컴포넌트 초기화
-        self.embedding_generator = EmbeddingGenerator(model_name=embedding_model)
+        self.embedding_generator = EmbeddingGenerator(model_name=embedding_model,
+                                                      cache_dir=embedding_cache_dir)
         self.vector_db = VectorDatabase(index_path=vector_db_path)
         self.text_preprocessor = TextPreprocessor()
+        self.query_cache = QueryEmbeddingCache(max_size=query_cache_size, ttl_seconds=query_cache_ttl)
+        
+        # 스냅샷 교체는 self.vector_db 참조만 바꾸므로, 진행 중인 검색은 시작할 때 잡은 DB로 끝남
+        self._swap_lock = threading.Lock()
+        self._swap_thread: Optional[threading.Thread] = None
         
         # 검색 설정
         self.default_k = 5  # 기본 검색 결과 수
@@ -45,24 +61,76 @@ class SearchSystem:
         logger.info(f"  - 벡터 DB 경로: {vector_db_path}")
         logger.info(f"  - 임베딩 모델: {embedding_model}")
     
-    def load_index(self, index_path: Optional[str] = None) -> bool:
+    def load_index(self, index_path: Optional[str] = None, mmap: bool = False) -> bool:
         """
         저장된 FAISS 인덱스 로드
         
         Args:
             index_path: 인덱스 파일 경로
+            mmap: 인덱스를 메모리 매핑으로 로드할지 여부 (워커 프로세스 간 메모리 공유)
             
         Returns:
             로드 성공 여부
         """
         try:
-            self.vector_db.load_index(index_path)
+            self.vector_db.load_index(index_path, mmap=mmap)
             logger.info("✅ FAISS 인덱스 로드 성공")
             return True
         except Exception as e:
             logger.error(f"❌ FAISS 인덱스 로드 실패: {e}")
             return False
     
+    def swap_snapshot(self,
+                      snapshot_store,
+                      version: Optional[str] = None,
+                      mmap: bool = False,
+                      verify: bool = True,
+                      background: bool = False) -> bool:
+        """
+        게시된 인덱스 스냅샷을 새 DB로 로드한 뒤 현재 DB와 교체
+        
+        로드와 체크섬 검사는 기존 DB가 계속 검색을 처리하는 동안 진행되고, 교체는
+        self.vector_db 참조를 한 번에 바꾸는 것으로 끝난다. 교체 전에 시작한 검색은
+        기존 DB로 마치며, 기존 DB는 마지막 참조가 사라질 때 해제된다.
+        
+        Args:
+            snapshot_store: 스냅샷을 가진 SnapshotStore
+            version: 스냅샷 버전 (None이면 CURRENT, 이미 로드된 버전이면 건너뜀)
+            mmap: 인덱스를 메모리 매핑으로 로드할지 여부
+            verify: 로드 전에 체크섬을 검사할지 여부
+            background: True이면 데몬 스레드에서 실행하고 바로 반환
+            
+        Returns:
+            교체 성공 여부 (background이면 스레드 시작 여부)
+        """
+        if background:
+            if self._swap_thread is not None and self._swap_thread.is_alive():
+                logger.info("스냅샷 교체가 이미 진행 중입니다.")
+                return False
+            self._swap_thread = threading.Thread(
+                target=self.swap_snapshot, args=(snapshot_store, version, mmap, verify),
+                name="index-snapshot-swap", daemon=True
+            )
+            self._swap_thread.start()
+            return True
+        
+        try:
+            with self._swap_lock:
+                version = snapshot_store.resolve(version)
+                if version == self.vector_db.snapshot_version:
+                    logger.info(f"스냅샷 {version}이(가) 이미 로드되어 있습니다.")
+                    return False
+                
+                vector_db = snapshot_store.load(version, index_path=self.vector_db_path, mmap=mmap, verify=verify)
+                previous = self.vector_db.snapshot_version
+                self.vector_db = vector_db
+            
+            logger.info(f"✅ 인덱스 스냅샷 교체: {previous} -> {version} ({vector_db.live_count}개 벡터)")
+            return True
+        except Exception as e:
+            logger.error(f"❌ 인덱스 스냅샷 교체 실패: {e}")
+            return False
+    
     def preprocess_query(self, query: str) -> str:
         """
         사용자 질문 전처리
@@ -112,28 +180,41 @@ class SearchSystem:
             return f"{query} {' '.join(expanded_terms)}"
         return query
     
-    def generate_query_embedding(self, query: str) -> np.ndarray:
+    def generate_query_embedding(self, query: str, vector_db: Optional[VectorDatabase] = None) -> np.ndarray:
         """
         사용자 질문을 임베딩으로 변환
         
         Args:
             query: 사용자 질문
+            vector_db: 투영을 가져올 벡터 DB (None이면 현재 DB, 검색과 같은 DB를 넘겨야 교체 중에도 차원이 맞음)
             
         Returns:
             질문 임베딩 벡터
         """
         try:
-            # 질문 전처리
-            processed_query = self.preprocess_query(query)
-            
-            # 임베딩 생성
-            embedding_result = self.embedding_generator.generate_embeddings([processed_query])
+            # 질문 전처리 (반복 질문은 캐시된 확장 결과 사용)
+            processed_query = self._cached_preprocess(query)
+            
+            # 캐시 히트면 모델을 호출하지 않음
+            # (키는 로드 후의 모델 식별자: lazy_load면 로드 전에는 ONNX 백엔드가 반영되지 않음)
+            self.embedding_generator._ensure_model_loaded()
+            model_identity = self.embedding_generator.model_identity
+            embedding = self.query_cache.get(model_identity, processed_query)
+            
+            if embedding is None:
+                # 임베딩 생성
+                embedding_result = self.embedding_generator.generate_embeddings([processed_query])
+                
+                # 결과가 dict 형태인지 numpy 배열인지 확인
+                if isinstance(embedding_result, dict):
+                    embedding = embedding_result['embeddings'][0]
+                else:
+                    embedding = embedding_result[0]
+                
+                self.query_cache.put(model_identity, processed_query, embedding)
             
-            # 결과가 dict 형태인지 numpy 배열인지 확인
-            if isinstance(embedding_result, dict):
-                embedding = embedding_result['embeddings'][0]
-            else:
-                embedding = embedding_result[0]
+            # 인덱스에 차원 축소 투영이 있으면 같은 투영 적용 (검색 중 정규화로 캐시가 바뀌지 않도록 복사)
+            embedding = np.array((vector_db or self.vector_db).project(embedding), dtype=np.float32)
             
             logger.info(f"질문 임베딩 생성 완료: {embedding.shape}")
             return embedding
@@ -142,10 +223,96 @@ class SearchSystem:
             logger.error(f"질문 임베딩 생성 실패: {e}")
             raise
     
+    def generate_query_embeddings(self,
+                                  queries: List[str],
+                                  project: bool = True,
+                                  vector_db: Optional[VectorDatabase] = None) -> np.ndarray:
+        """
+        여러 질문을 한 번의 배치 forward pass로 임베딩
+        
+        Args:
+            queries: 사용자 질문 리스트
+            project: 인덱스의 차원 축소 투영 적용 여부
+            vector_db: 투영을 가져올 벡터 DB (None이면 현재 DB)
+            
+        Returns:
+            (질문 수 x 차원) 임베딩 배열 (입력 순서 유지)
+        """
+        processed_queries = [self._cached_preprocess(query) for query in queries]
+        self.embedding_generator._ensure_model_loaded()
+        model_identity = self.embedding_generator.model_identity
+        
+        # 캐시에 없는 질문만 모델로 임베딩
+        embeddings_by_text = {}
+        for processed in processed_queries:
+            cached = self.query_cache.get(model_identity, processed)
+            if cached is not None:
+                embeddings_by_text[processed] = cached
+        
+        uncached = list(dict.fromkeys(p for p in processed_queries if p not in embeddings_by_text))
+        if uncached:
+            embedding_result = self.embedding_generator.generate_embeddings(uncached)
+            
+            # 빈 텍스트나 실패한 텍스트는 결과에서 빠지므로 텍스트 기준으로 다시 정렬
+            for text, embedding in zip(embedding_result['chunks'], embedding_result['embeddings']):
+                embeddings_by_text[text] = embedding
+                self.query_cache.put(model_identity, text, embedding)
+        
+        missing = [query for query, processed in zip(queries, processed_queries)
+                   if processed not in embeddings_by_text]
+        if missing:
+            raise ValueError(f"질문 임베딩 생성 실패: {missing}")
+        
+        embeddings = np.stack([embeddings_by_text[processed] for processed in processed_queries])
+        if project:
+            embeddings = (vector_db or self.vector_db).project(embeddings)
+        
+        logger.info(f"질문 배치 임베딩 생성 완료: {embeddings.shape}")
+        return embeddings
+    
+    def _cached_preprocess(self, query: str) -> str:
+        """preprocess_query 결과를 질문 캐시에 기억해 반복 질문의 전처리 생략"""
+        processed_query = self.query_cache.get_expanded(query)
+        if processed_query is None:
+            processed_query = self.preprocess_query(query)
+            self.query_cache.put_expanded(query, processed_query)
+        return processed_query
+    
+    def _build_search_results(self,
+                              query: str,
+                              distances: np.ndarray,
+                              metadata: List[Dict[str, Any]],
+                              similarity_threshold: float) -> List[Dict[str, Any]]:
+        """
+        FAISS 검색 결과를 임계값으로 거르고 결과 딕셔너리로 정리
+        
+        Args:
+            query: 검색 질문
+            distances: 결과별 유사도
+            metadata: 결과별 메타데이터 (dict 또는 SearchResults의 읽기 전용 뷰)
+            similarity_threshold: 유사도 임계값
+            
+        Returns:
+            검색 결과 리스트
+        """
+        filtered_results = []
+        for i, meta in enumerate(metadata):
+            similarity_score = float(distances[i])
+            
+            # 유사도 임계값 체크 (메타데이터는 dict 또는 읽기 전용 뷰)
+            if similarity_score >= similarity_threshold:
+                result = meta.copy()
+                result.update(similarity_score=similarity_score, rank=i + 1, query=query)
+                filtered_results.append(result)
+        
+        return filtered_results
+    
     def semantic_search(self, 
                        query: str, 
                        k: int = None,
-                       similarity_threshold: float = None) -> List[Dict[str, Any]]:
+                       similarity_threshold: float = None,
+                       search_params: SearchSpec = None,
+                       filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         의미적 검색 실행
         
@@ -153,40 +320,43 @@ class SearchSystem:
             query: 검색 질문
             k: 반환할 결과 수
             similarity_threshold: 유사도 임계값
+            search_params: 이번 검색의 재현율/지연 시간 설정 (프리셋 이름 'fast'/'balanced'/'exact',
+                파라미터 딕셔너리 또는 FAISS SearchParameters, None이면 인덱스 기본값)
+            filters: 메타데이터 필터 (type, author, genre, emotion, date_range), 일치하는
+                청크만 검색해 선택적인 필터에서도 k개를 채움
             
         Returns:
             검색 결과 리스트
+        
+        Raises:
+            ValueError: 알 수 없는 프리셋, 파라미터 또는 필터 필드
         """
         if k is None:
             k = self.default_k
         if similarity_threshold is None:
             similarity_threshold = self.min_similarity_threshold
+        # 잘못된 설정은 빈 결과가 아니라 호출자에게 오류로 알림
+        normalize_spec(search_params)
+        validate_filters(filters)
         
         logger.info(f"🔍 의미적 검색 시작: '{query}'")
         logger.info(f"  - 검색 결과 수: {k}")
         logger.info(f"  - 유사도 임계값: {similarity_threshold}")
+        if search_params is not None:
+            logger.info(f"  - 검색 파라미터: {search_params}")
+        if filters:
+            logger.info(f"  - 필터: {filters}")
         
         try:
-            # 1. 질문 임베딩 생성
-            query_embedding = self.generate_query_embedding(query)
+            # 1. 질문 임베딩 생성 (투영과 검색은 같은 DB로, 도중에 스냅샷이 교체되어도 이 DB로 끝냄)
+            vector_db = self.vector_db
+            query_embedding = self.generate_query_embedding(query, vector_db)
             
             # 2. FAISS 유사도 검색
-            distances, indices, metadata = self.vector_db.search(query_embedding, k)
+            distances, indices, metadata = vector_db.search(query_embedding, k, search_params, filters)
             
             # 3. 결과 필터링 및 정리
-            filtered_results = []
-            for i, meta in enumerate(metadata):
-                similarity_score = float(distances[i])
-                
-                # 유사도 임계값 체크
-                if similarity_score >= similarity_threshold:
-                    result = {
-                        **meta,
-                        'similarity_score': similarity_score,
-                        'rank': i + 1,
-                        'query': query
-                    }
-                    filtered_results.append(result)
+            filtered_results = self._build_search_results(query, distances, metadata, similarity_threshold)
             
             logger.info(f"✅ 검색 완료: {len(filtered_results)}개 결과 (임계값 {similarity_threshold} 이상)")
             
@@ -196,46 +366,88 @@ class SearchSystem:
             logger.error(f"❌ 의미적 검색 실패: {e}")
             return []
     
+    def shard_search(self,
+                     shard_manager,
+                     query: str,
+                     tenant_ids: List[str],
+                     k: int = None,
+                     similarity_threshold: float = None,
+                     search_params: SearchSpec = None) -> List[Dict[str, Any]]:
+        """
+        테넌트 샤드 검색 (하나면 해당 샤드로 라우팅, 여러 개면 팬아웃 후 상위 k개 병합)
+        
+        Args:
+            shard_manager: 샤드를 가진 ShardManager
+            query: 검색 질문
+            tenant_ids: 검색할 테넌트 ID 리스트
+            k: 반환할 결과 수
+            similarity_threshold: 유사도 임계값
+            search_params: 검색 설정 (semantic_search 참고)
+            
+        Returns:
+            검색 결과 리스트 (각 결과에 'tenant_id' 포함)
+        """
+        if k is None:
+            k = self.default_k
+        if similarity_threshold is None:
+            similarity_threshold = self.min_similarity_threshold
+        normalize_spec(search_params)
+        
+        logger.info(f"🔍 샤드 검색 시작: '{query}' (샤드 {len(tenant_ids)}개)")
+        
+        try:
+            # 샤드마다 투영이 다를 수 있으므로 투영 전 임베딩을 넘김
+            query_embedding = self.generate_query_embeddings([query], project=False)[0]
+            distances, metadata = shard_manager.fan_out_search(query_embedding, k, tenant_ids, search_params)
+            
+            filtered_results = self._build_search_results(query, distances, metadata, similarity_threshold)
+            logger.info(f"✅ 샤드 검색 완료: {len(filtered_results)}개 결과")
+            return filtered_results
+            
+        except Exception as e:
+            logger.error(f"❌ 샤드 검색 실패: {e}")
+            return []
+    
     def batch_search(self, 
                     queries: List[str], 
-                    k: int = None) -> List[List[Dict[str, Any]]]:
+                    k: int = None,
+                    search_params: SearchSpec = None,
+                    filters: Optional[Dict[str, Any]] = None) -> List[List[Dict[str, Any]]]:
         """
         여러 질문에 대한 배치 검색
         
         Args:
             queries: 검색 질문 리스트
             k: 각 질문당 반환할 결과 수
+            search_params: 모든 질문에 적용할 검색 설정 (semantic_search 참고)
+            filters: 모든 질문에 적용할 메타데이터 필터 (semantic_search 참고)
             
         Returns:
             각 질문에 대한 검색 결과 리스트
         """
         if k is None:
             k = self.default_k
+        normalize_spec(search_params)
+        validate_filters(filters)
         
         logger.info(f"🔍 배치 검색 시작: {len(queries)}개 질문")
         
         try:
-            # 1. 모든 질문을 임베딩으로 변환
-            query_embeddings = []
-            for query in queries:
-                embedding = self.generate_query_embedding(query)
-                query_embeddings.append(embedding)
-            
-            query_embeddings = np.array(query_embeddings)
+            # 1. 모든 질문을 한 번에 임베딩으로 변환
+            vector_db = self.vector_db
+            query_embeddings = self.generate_query_embeddings(queries, vector_db=vector_db)
             
-            # 2. 배치 검색 실행
-            distances, indices, all_metadata = self.vector_db.batch_search(query_embeddings, k)
+            # 2. 배치 검색 실행 (메타데이터는 복사 없는 뷰로 받음)
+            results = vector_db.batch_search_results(query_embeddings, k, search_params, filters)
+            scores = results.scores.tolist()
             
-            # 3. 결과 정리
+            # 3. 결과 정리 (결과마다 dict 복사는 한 번만)
             all_results = []
-            for i, (query, query_metadata) in enumerate(zip(queries, all_metadata)):
+            for i, query in enumerate(queries):
                 query_results = []
-                for j, meta in enumerate(query_metadata):
-                    result = {
-                        **meta,
-                        'query': query,
-                        'batch_index': i
-                    }
+                for rank, (meta, score) in enumerate(zip(results.metadata(i), scores[i]), start=1):
+                    result = meta.copy()
+                    result.update(similarity_score=score, rank=rank, query=query, batch_index=i)
                     query_results.append(result)
                 all_results.append(query_results)
             
@@ -331,15 +543,18 @@ class SearchSystem:
                        query: str,
                        search_type: str = "semantic",
                        filters: Optional[Dict[str, Any]] = None,
-                       k: int = None) -> Dict[str, Any]:
+                       k: int = None,
+                       search_params: SearchSpec = None) -> Dict[str, Any]:
         """
         고급 검색 (필터링, 다양한 검색 타입 지원)
         
         Args:
             query: 검색 질문
             search_type: 검색 타입 ("semantic", "keyword", "hybrid")
-            filters: 필터 조건
+            filters: 필터 조건 (type, author, genre, emotion, date_range는 검색 단계에서,
+                min_similarity는 검색 후 적용)
             k: 반환할 결과 수
+            search_params: 검색 설정 (semantic_search 참고, 분석용은 'exact')
             
         Returns:
             검색 결과와 컨텍스트 정보
@@ -350,10 +565,12 @@ class SearchSystem:
         logger.info(f"🔍 고급 검색: '{query}' (타입: {search_type})")
         
         try:
-            # 1. 기본 의미적 검색
-            search_results = self.semantic_search(query, k * 2)  # 더 많이 가져와서 필터링
+            # 1. 메타데이터 필터를 건 의미적 검색 (일치하는 청크만 검색하므로 더 많이 가져올 필요 없음)
+            index_filters = {key: value for key, value in (filters or {}).items() if key != 'min_similarity'}
+            search_results = self.semantic_search(query, k, search_params=search_params,
+                                                  filters=index_filters or None)
             
-            # 2. 필터 적용
+            # 2. 유사도 필터 적용
             if filters:
                 search_results = self._apply_filters(search_results, filters)
             
@@ -394,7 +611,10 @@ class SearchSystem:
                       results: List[Dict[str, Any]], 
                       filters: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
-        검색 결과에 필터 적용
+        검색 결과에 유사도 필터 적용
+        
+        메타데이터 필터(type, author, genre, emotion, date_range)는 벡터 DB의 필터 색인으로
+        검색 단계에서 적용되므로 여기서는 검색 점수에 따른 조건만 처리한다.
         
         Args:
             results: 검색 결과 리스트
@@ -403,30 +623,12 @@ class SearchSystem:
         Returns:
             필터링된 결과
         """
-        filtered_results = []
+        filtered_results = results
         
-        for result in results:
-            include_result = True
-            
-            # 타입 필터
-            if 'type' in filters:
-                if result.get('type') != filters['type']:
-                    include_result = False
-            
-            # 날짜 범위 필터
-            if 'date_range' in filters and include_result:
-                result_date = result.get('date')
-                if result_date:
-                    # 날짜 범위 체크 로직 (구현 필요)
-                    pass
-            
-            # 유사도 임계값 필터
-            if 'min_similarity' in filters and include_result:
-                if result.get('similarity_score', 0) < filters['min_similarity']:
-                    include_result = False
-            
-            if include_result:
-                filtered_results.append(result)
+        # 유사도 임계값 필터
+        if 'min_similarity' in filters:
+            filtered_results = [result for result in results
+                                if result.get('similarity_score', 0) >= filters['min_similarity']]
         
         logger.info(f"필터 적용: {len(results)} -> {len(filtered_results)}개 결과")
         
@@ -448,10 +650,12 @@ class SearchSystem:
             'default_k': self.default_k,
             'similarity_threshold': self.min_similarity_threshold,
             'components': {
-                'embedding_generator': 'loaded' if self.embedding_generator.model else 'not_loaded',
+                'embedding_generator': 'loaded' if self.embedding_generator.is_loaded else 'lazy',
                 'vector_database': vector_stats['status'],
                 'text_preprocessor': 'ready'
-            }
+            },
+            'embedding_cache': self.embedding_generator.cache.get_stats(),
+            'query_cache': self.query_cache.get_stats()
         }
         
         return stats 
\ No newline at end of file
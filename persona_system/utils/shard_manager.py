@@ -0,0 +1,319 @@
+"""
+테넌트별 인덱스 샤드 관리 - 독자(또는 세션)마다 VectorDatabase 하나, 라우팅과 팬아웃 검색
+
+자주 쓰는 샤드는 메모리 예산 안에서 메모리에 두고, 예산을 넘으면 가장 오래 쓰지 않은
+샤드부터 디스크에 저장한 뒤 내린다. 내린 샤드는 다음 요청 때 다시 로드한다.
+"""
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import quote, unquote
+import numpy as np
+import faiss
+from loguru import logger
+
+from .vector_database import VectorDatabase
+from .search_params import SearchSpec
+
+
+# 샤드 디렉토리 안의 인덱스 파일 이름 (확장자 제외)
+SHARD_INDEX_NAME = "faiss_index"
+
+
+class ShardManager:
+    """테넌트 ID별 VectorDatabase 샤드를 메모리 예산 안에서 관리하는 라우터"""
+
+    def __init__(self,
+                 root_path: str = "./data/shards",
+                 memory_budget_mb: float = 512.0,
+                 index_type: str = "Flat",
+                 mmap: bool = False,
+                 auto_migrate: bool = False,
+                 latency_budget_ms: Optional[float] = None):
+        """
+        샤드 관리자 초기화
+
+        Args:
+            root_path: 샤드를 저장할 루트 디렉토리 (테넌트마다 하위 디렉토리 하나)
+            memory_budget_mb: 메모리에 올려 둘 샤드 인덱스의 총 예산 (MB)
+            index_type: 새 샤드의 인덱스 타입
+            mmap: 디스크의 샤드를 메모리 매핑으로 로드할지 여부
+            auto_migrate: 샤드가 커지면 더 알맞은 인덱스 타입으로 백그라운드 재구축 (VectorDatabase 참고)
+            latency_budget_ms: 샤드의 질문당 검색 지연 시간 예산 (VectorDatabase 참고)
+        """
+        self.root_path = Path(root_path)
+        self.memory_budget_bytes = int(memory_budget_mb * 1024 * 1024)
+        self.index_type = index_type
+        self.mmap = mmap
+        self.auto_migrate = auto_migrate
+        self.latency_budget_ms = latency_budget_ms
+
+        self._shards: "OrderedDict[str, VectorDatabase]" = OrderedDict()  # 마지막이 가장 최근 사용
+        self._dirty = set()  # 마지막 저장 이후 바뀐 샤드
+        self._saved_generation: Dict[str, int] = {}  # 테넌트 -> 마지막 로드/저장 시점의 샤드 변경 세대
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+        logger.info(f"샤드 관리자 초기화: {self.root_path}, 메모리 예산 {memory_budget_mb}MB")
+
+    def _shard_dir(self, tenant_id: str) -> Path:
+        """테넌트 샤드 디렉토리 (테넌트 ID를 파일 이름에 안전하게 인코딩)"""
+        return self.root_path / quote(str(tenant_id), safe='')
+
+    def _shard_path(self, tenant_id: str) -> Path:
+        return self._shard_dir(tenant_id) / SHARD_INDEX_NAME
+
+    def has_shard(self, tenant_id: str) -> bool:
+        """메모리나 디스크에 테넌트 샤드가 있는지 여부"""
+        with self._lock:
+            if tenant_id in self._shards:
+                return True
+        return self._shard_path(tenant_id).with_suffix('.faiss').exists()
+
+    def tenants(self, prefix: Optional[str] = None) -> List[str]:
+        """
+        샤드가 있는 테넌트 ID 목록
+
+        Args:
+            prefix: 이 접두사로 시작하는 테넌트만 (예: 세션 ID)
+
+        Returns:
+            정렬된 테넌트 ID 리스트
+        """
+        with self._lock:
+            tenant_ids = set(self._shards)
+        if self.root_path.exists():
+            tenant_ids.update(unquote(path.name) for path in self.root_path.iterdir()
+                              if (path / f"{SHARD_INDEX_NAME}.faiss").exists())
+        if prefix is not None:
+            tenant_ids = {tenant_id for tenant_id in tenant_ids if tenant_id.startswith(prefix)}
+        return sorted(tenant_ids)
+
+    def get_shard(self, tenant_id: str, create: bool = False) -> Optional[VectorDatabase]:
+        """
+        테넌트 샤드 반환 (메모리에 없으면 디스크에서 로드)
+
+        Args:
+            tenant_id: 테넌트 ID (독자 ID 또는 세션 ID)
+            create: 샤드가 없으면 빈 샤드를 만들지 여부
+
+        Returns:
+            샤드 VectorDatabase (없고 create=False면 None)
+        """
+        with self._lock:
+            vector_db = self._shards.get(tenant_id)
+            if vector_db is not None:
+                self._shards.move_to_end(tenant_id)
+                self.hits += 1
+                return vector_db
+
+            shard_path = self._shard_path(tenant_id)
+            if shard_path.with_suffix('.faiss').exists():
+                vector_db = self._new_shard(shard_path)
+                vector_db.load_index(str(shard_path), mmap=self.mmap)
+                self._saved_generation[tenant_id] = vector_db.generation
+                self.loads += 1
+                logger.info(f"샤드 로드: {tenant_id} ({vector_db.live_count}개 벡터)")
+            elif create:
+                vector_db = self._new_shard(shard_path)
+                self._saved_generation[tenant_id] = vector_db.generation
+            else:
+                return None
+
+            self._shards[tenant_id] = vector_db
+            self._evict(keep=tenant_id)
+            return vector_db
+
+    def _new_shard(self, shard_path: Path) -> VectorDatabase:
+        return VectorDatabase(index_path=str(shard_path.parent), auto_migrate=self.auto_migrate,
+                              latency_budget_ms=self.latency_budget_ms)
+
+    def upsert_vectors(self,
+                       tenant_id: str,
+                       embeddings: np.ndarray,
+                       metadata: List[Dict[str, Any]],
+                       ids: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        테넌트 샤드에 벡터 추가 또는 갱신 (샤드가 없으면 생성)
+
+        Args:
+            tenant_id: 테넌트 ID
+            embeddings: 임베딩 벡터
+            metadata: 각 벡터의 메타데이터
+            ids: 각 벡터의 외부 ID (None이면 메타데이터의 'id' 사용)
+
+        Returns:
+            'inserted', 'updated' 개수
+        """
+        # 추가 중에 샤드가 내려가 변경분이 버려지지 않도록 관리자 lock 안에서 처리
+        with self._lock:
+            vector_db = self.get_shard(tenant_id, create=True)
+            if vector_db.index is None:
+                vector_db.create_index(embeddings.shape[1], index_type=self.index_type,
+                                       vector_count=len(embeddings))
+            result = vector_db.upsert_vectors(embeddings, metadata, ids)
+            self._dirty.add(tenant_id)
+            self._evict(keep=tenant_id)
+        return result
+
+    def delete(self, tenant_id: str, ids: List[str]) -> int:
+        """
+        테넌트 샤드에서 외부 ID로 벡터 삭제
+
+        Args:
+            tenant_id: 테넌트 ID
+            ids: 삭제할 외부 ID 리스트
+
+        Returns:
+            삭제된 벡터 수
+        """
+        with self._lock:
+            vector_db = self.get_shard(tenant_id)
+            if vector_db is None:
+                return 0
+            deleted = vector_db.delete(ids)
+            if deleted:
+                self._dirty.add(tenant_id)
+        return deleted
+
+    def search(self,
+               tenant_id: str,
+               query_vector: np.ndarray,
+               k: int = 5,
+               search_params: SearchSpec = None) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """
+        테넌트 샤드 하나로 라우팅해 검색
+
+        Args:
+            tenant_id: 테넌트 ID
+            query_vector: 투영 전 질문 임베딩 (샤드마다 자체 투영 적용)
+            k: 반환할 결과 수
+            search_params: 검색 설정 (VectorDatabase.search 참고)
+
+        Returns:
+            (거리, 인덱스, 메타데이터) 튜플 (샤드가 없으면 빈 결과)
+        """
+        vector_db = self.get_shard(tenant_id)
+        if vector_db is None or vector_db.index is None:
+            return np.array([]), np.array([]), []
+        return vector_db.search(np.array(query_vector, dtype=np.float32), k, search_params)
+
+    def fan_out_search(self,
+                       query_vector: np.ndarray,
+                       k: int = 5,
+                       tenant_ids: Optional[List[str]] = None,
+                       search_params: SearchSpec = None) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+        """
+        여러 샤드를 각각 상위 k개 검색한 뒤 전체 상위 k개로 병합
+
+        Args:
+            query_vector: 투영 전 질문 임베딩
+            k: 반환할 결과 수
+            tenant_ids: 검색할 테넌트 ID 리스트 (None이면 모든 샤드)
+            search_params: 검색 설정 (VectorDatabase.search 참고)
+
+        Returns:
+            (점수, 메타데이터) 튜플, 메타데이터에는 'tenant_id'가 추가됨
+        """
+        if tenant_ids is None:
+            tenant_ids = self.tenants()
+
+        scores = []
+        results = []
+        metric_type = None
+        for tenant_id in tenant_ids:
+            vector_db = self.get_shard(tenant_id)
+            if vector_db is None or vector_db.index is None or vector_db.live_count == 0:
+                continue
+
+            # 내적과 L2는 점수 방향이 반대라 섞어서 병합할 수 없음
+            if metric_type is None:
+                metric_type = vector_db.index.metric_type
+            elif vector_db.index.metric_type != metric_type:
+                raise ValueError(f"거리 척도가 다른 샤드는 함께 검색할 수 없습니다: {tenant_id}")
+
+            distances, _, metadata = vector_db.search(np.array(query_vector, dtype=np.float32), k, search_params)
+            scores.extend(distances[:len(metadata)])
+            results.extend({**meta, 'tenant_id': tenant_id} for meta in metadata)
+
+        if not results:
+            return np.array([]), []
+
+        scores = np.asarray(scores, dtype=np.float32)
+        order = np.argsort(scores if metric_type == faiss.METRIC_L2 else -scores, kind='stable')[:k]
+        return scores[order], [results[i] for i in order]
+
+    def _is_dirty(self, tenant_id: str, vector_db: VectorDatabase) -> bool:
+        """
+        마지막 저장 이후 바뀐 샤드인지 여부 (호출자가 lock 보유)
+
+        관리자를 거친 추가/삭제 외에 샤드 스스로 시작한 백그라운드 마이그레이션/컴팩션의
+        인덱스 교체도 변경 세대로 잡는다.
+        """
+        return tenant_id in self._dirty or vector_db.generation != self._saved_generation.get(tenant_id)
+
+    def _save_shard(self, tenant_id: str, vector_db: VectorDatabase) -> None:
+        """샤드를 디스크에 저장하고 저장 시점의 변경 세대 기록 (호출자가 lock 보유)"""
+        # 저장 중에 끝난 교체는 다음 저장 대상이 되도록 세대는 저장 전에 읽음
+        generation = vector_db.generation
+        vector_db.save_index(str(self._shard_path(tenant_id)))
+        self._dirty.discard(tenant_id)
+        self._saved_generation[tenant_id] = generation
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """
+        메모리 예산을 넘으면 가장 오래 쓰지 않은 샤드부터 저장 후 내림 (호출자가 lock 보유)
+
+        백그라운드 마이그레이션/컴팩션이 진행 중인 샤드는 내리지 않는다. 내린 뒤 끝난
+        재구축은 저장되지 않고 버려지므로, 끝난 다음 번 정리 때 내린다.
+        """
+        total = sum(vector_db.memory_bytes() for vector_db in self._shards.values())
+        for tenant_id in list(self._shards):
+            if total <= self.memory_budget_bytes:
+                break
+            vector_db = self._shards[tenant_id]
+            if tenant_id == keep or vector_db.migration_running or vector_db.compaction_running:
+                continue
+
+            if self._is_dirty(tenant_id, vector_db):
+                self._save_shard(tenant_id, vector_db)
+            del self._shards[tenant_id]
+            self._saved_generation.pop(tenant_id, None)
+            total -= vector_db.memory_bytes()
+            self.evictions += 1
+            logger.info(f"샤드 내림: {tenant_id} (사용 중 {total / 1024 / 1024:.1f}MB)")
+
+    def flush(self) -> int:
+        """
+        바뀐 샤드를 모두 디스크에 저장
+
+        Returns:
+            저장한 샤드 수
+        """
+        with self._lock:
+            dirty = [tenant_id for tenant_id, vector_db in self._shards.items()
+                     if self._is_dirty(tenant_id, vector_db)]
+            for tenant_id in dirty:
+                self._save_shard(tenant_id, self._shards[tenant_id])
+        return len(dirty)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """샤드 관리 통계 반환"""
+        with self._lock:
+            loaded = {tenant_id: vector_db.memory_bytes() for tenant_id, vector_db in self._shards.items()}
+            dirty_count = sum(self._is_dirty(tenant_id, vector_db) for tenant_id, vector_db in self._shards.items())
+        return {
+            'root_path': str(self.root_path),
+            'total_shards': len(self.tenants()),
+            'loaded_shards': len(loaded),
+            'dirty_shards': dirty_count,
+            'memory_mb': sum(loaded.values()) / 1024 / 1024,
+            'memory_budget_mb': self.memory_budget_bytes / 1024 / 1024,
+            'hits': self.hits,
+            'loads': self.loads,
+            'evictions': self.evictions
+        }
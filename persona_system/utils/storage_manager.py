@@ -7,11 +7,13 @@ import pickle
 from pathlib import Path
 from typing import Dict, Any, Optional, List, Union
 from datetime import datetime
-import boto3
-from botocore.exceptions import ClientError, NoCredentialsError
 import numpy as np
 from loguru import logger
 
+from .embedding_quantization import (
+    quantize_embeddings, quantization_metadata, restore_from_metadata, storage_dtype
+)
+
 
 class StorageManager:
     """S3 호환 저장소 매니저"""
@@ -20,7 +22,8 @@ class StorageManager:
                  storage_type: str = "local",
                  base_path: str = "./data",
                  s3_bucket: str = None,
-                 s3_region: str = "ap-northeast-2"):
+                 s3_region: str = "ap-northeast-2",
+                 embedding_precision: str = "float32"):
         """
         저장소 매니저 초기화
         
@@ -29,11 +32,15 @@ class StorageManager:
             base_path: 로컬 기본 경로
             s3_bucket: S3 버킷명
             s3_region: S3 리전
+            embedding_precision: 임베딩 저장 정밀도 ("float32", "float16", "int8")
         """
+        storage_dtype(embedding_precision)  # 지원하지 않는 정밀도면 ValueError
+        
         self.storage_type = storage_type
         self.base_path = Path(base_path)
         self.s3_bucket = s3_bucket
         self.s3_region = s3_region
+        self.embedding_precision = embedding_precision
         
         # S3 클라이언트 초기화
         self.s3_client = None
@@ -46,7 +53,10 @@ class StorageManager:
         logger.info(f"저장소 매니저 초기화 완료: {storage_type}")
     
     def _init_s3_client(self):
-        """S3 클라이언트 초기화"""
+        """S3 클라이언트 초기화 (boto3는 S3를 쓸 때만 import)"""
+        import boto3
+        from botocore.exceptions import NoCredentialsError
+        
         try:
             self.s3_client = boto3.client(
                 's3',
@@ -117,7 +127,7 @@ class StorageManager:
             }
     
     def save_user_embeddings(self, user_id: str, embeddings_data: Dict[str, Any], 
-                            version: str = None) -> bool:
+                            version: str = None, precision: str = None) -> bool:
         """
         사용자 임베딩 저장
         
@@ -125,23 +135,26 @@ class StorageManager:
             user_id: 사용자 ID
             embeddings_data: 임베딩 데이터
             version: 버전 (None이면 현재 날짜)
+            precision: 저장 정밀도 (None이면 embedding_precision 사용)
         
         Returns:
             저장 성공 여부
         """
         if version is None:
             version = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        if precision is None:
+            precision = self.embedding_precision
         
         paths = self.get_user_path(user_id, "embeddings", version)
         
         try:
             # 로컬 저장
             if self.storage_type in ["local", "hybrid"]:
-                self._save_local_embeddings(paths['local_path'], embeddings_data)
+                self._save_local_embeddings(paths['local_path'], embeddings_data, precision)
             
             # S3 저장
             if self.storage_type in ["s3", "hybrid"] and self.s3_client:
-                self._save_s3_embeddings(paths['s3_key'], embeddings_data)
+                self._save_s3_embeddings(paths['s3_key'], embeddings_data, precision)
             
             # 최신 버전 링크 업데이트
             self._update_latest_version(user_id, "embeddings", version)
@@ -153,14 +166,16 @@ class StorageManager:
             logger.error(f"사용자 임베딩 저장 실패: {e}")
             return False
     
-    def _save_local_embeddings(self, local_path: str, embeddings_data: Dict[str, Any]):
+    def _save_local_embeddings(self, local_path: str, embeddings_data: Dict[str, Any],
+                               precision: str = "float32"):
         """로컬에 임베딩 저장"""
         local_path = Path(local_path)
         local_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # 임베딩 벡터 저장 (.npy)
+        # 임베딩 벡터 저장 (.npy, 요청한 정밀도로 변환)
         embeddings_path = local_path.with_suffix('.npy')
-        np.save(embeddings_path, embeddings_data['embeddings'])
+        quantized = quantize_embeddings(embeddings_data['embeddings'], precision)
+        np.save(embeddings_path, quantized['data'])
         
         # 메타데이터 저장 (.json)
         metadata_path = local_path.with_suffix('.json')
@@ -173,17 +188,22 @@ class StorageManager:
                 'embedding_dim': embeddings_data['embedding_dim'],
                 'chunk_count': len(embeddings_data['chunks']),
                 'created_at': datetime.now().isoformat(),
-                'version': embeddings_data.get('version', 'unknown')
+                'version': embeddings_data.get('version', 'unknown'),
+                **quantization_metadata(quantized, embeddings_data['embeddings'])
             }, f, ensure_ascii=False, indent=2)
     
-    def _save_s3_embeddings(self, s3_key: str, embeddings_data: Dict[str, Any]):
+    def _save_s3_embeddings(self, s3_key: str, embeddings_data: Dict[str, Any],
+                            precision: str = "float32"):
         """S3에 임베딩 저장"""
         if not self.s3_client:
             return
         
+        from botocore.exceptions import ClientError
+        
         try:
-            # 임베딩 벡터를 바이트로 변환
-            embeddings_bytes = embeddings_data['embeddings'].tobytes()
+            # 임베딩 벡터를 요청한 정밀도의 바이트로 변환
+            quantized = quantize_embeddings(embeddings_data['embeddings'], precision)
+            embeddings_bytes = quantized['data'].tobytes()
             
             # S3에 업로드
             self.s3_client.put_object(
@@ -201,7 +221,8 @@ class StorageManager:
                 'embedding_dim': embeddings_data['embedding_dim'],
                 'chunk_count': len(embeddings_data['chunks']),
                 'created_at': datetime.now().isoformat(),
-                'version': embeddings_data.get('version', 'unknown')
+                'version': embeddings_data.get('version', 'unknown'),
+                **quantization_metadata(quantized, embeddings_data['embeddings'])
             }
             
             self.s3_client.put_object(
@@ -262,13 +283,13 @@ class StorageManager:
             return None
         
         try:
-            # 임베딩 벡터 로드
-            embeddings = np.load(embeddings_path)
-            
             # 메타데이터 로드
             with open(metadata_path, 'r', encoding='utf-8') as f:
                 metadata = json.load(f)
             
+            # 임베딩 벡터 로드 (float16/int8로 저장된 경우 float32로 복원)
+            embeddings = restore_from_metadata(np.load(embeddings_path), metadata)
+            
             return {
                 'embeddings': embeddings,
                 'chunks': metadata['chunks'],
@@ -287,6 +308,8 @@ class StorageManager:
         if not self.s3_client:
             return None
         
+        from botocore.exceptions import ClientError
+        
         try:
             # 메타데이터 로드
             response = self.s3_client.get_object(
@@ -301,9 +324,11 @@ class StorageManager:
                 Key=f"{s3_key}.npy"
             )
             embeddings_bytes = response['Body'].read()
-            embeddings = np.frombuffer(embeddings_bytes, dtype=np.float32).reshape(
+            precision = metadata.get('storage_precision', 'float32')
+            embeddings = np.frombuffer(embeddings_bytes, dtype=storage_dtype(precision)).reshape(
                 metadata['chunk_count'], metadata['embedding_dim']
             )
+            embeddings = restore_from_metadata(embeddings, metadata)
             
             return {
                 'embeddings': embeddings,
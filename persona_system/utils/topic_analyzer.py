@@ -2,17 +2,14 @@
 토픽 모델링 유틸리티
 """
 import re
+import importlib.util
 from typing import Dict, List, Tuple, Optional
 from collections import Counter
 from loguru import logger
 
-try:
-    from sklearn.feature_extraction.text import TfidfVectorizer
-    from sklearn.decomposition import LatentDirichletAllocation
-    from sklearn.cluster import KMeans
-    SKLEARN_AVAILABLE = True
-except ImportError:
-    SKLEARN_AVAILABLE = False
+# scikit-learn은 import 비용이 커서 설치 여부만 확인하고 실제 import는 사용 시점에 한다
+SKLEARN_AVAILABLE = importlib.util.find_spec("sklearn") is not None
+if not SKLEARN_AVAILABLE:
     logger.warning("scikit-learn이 설치되지 않았습니다. 토픽 모델링이 제한됩니다.")
 
 
@@ -114,6 +111,10 @@ class TopicAnalyzer:
             return {}
         
         try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.decomposition import LatentDirichletAllocation
+            from sklearn.cluster import KMeans
+            
             # TF-IDF 벡터화
             self.vectorizer = TfidfVectorizer(
                 max_features=1000,
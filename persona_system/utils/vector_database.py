@@ -4,82 +4,326 @@ FAISS 벡터 데이터베이스 관리
 import os
 import json
 import pickle
+import shutil
+import time
+import threading
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 import numpy as np
 import faiss
 from loguru import logger
 
+from .vector_projection import VectorProjection
+from .metadata_store import MetadataStore
+from .metadata_index import MetadataIndex
+from .search_params import SearchSpec, search_with_spec, normalize_spec, spec_key
+from .search_results import SearchResults
+from .index_tuning import (
+    choose_nlist, choose_pq_m, choose_index_type, training_sample, sweep_nprobe, evaluate_recall,
+    drop_own_labels, ivf_of, index_memory_bytes, index_kind, migration_target, train_ivf,
+    DEFAULT_NPROBE, PQ_NBITS, COMPRESSED_INDEX_TYPES
+)
+
+
+# 질문당 검색 지연 시간 이동 평균의 새 값 가중치
+LATENCY_EMA_WEIGHT = 0.1
+
 
 class VectorDatabase:
     """FAISS 벡터 데이터베이스 관리 클래스"""
     
-    def __init__(self, index_path: str = "./data/faiss_index"):
+    def __init__(self,
+                 index_path: str = "./data/faiss_index",
+                 compaction_threshold: float = 0.2,
+                 target_recall: Optional[float] = 0.95,
+                 auto_migrate: bool = False,
+                 latency_budget_ms: Optional[float] = None):
         """
         벡터 데이터베이스 초기화
         
         Args:
             index_path: FAISS 인덱스 저장 경로
+            compaction_threshold: 백그라운드 컴팩션을 시작할 톰스톤 비율 (None이면 자동 컴팩션 안 함)
+            target_recall: IVF 인덱스 학습 후 nprobe 자동 튜닝의 목표 recall@10 (None이면 튜닝 안 함)
+            auto_migrate: 벡터 수/지연 시간 기준을 넘으면 더 알맞은 인덱스 타입으로 백그라운드 재구축
+                          (Flat -> HNSW -> IVFPQ, index_tuning.MIGRATION_STAGES)
+            latency_budget_ms: 질문당 검색 지연 시간 예산 (넘으면 마이그레이션을 앞당김, None이면 벡터 수만 봄)
+                               프리셋('fast', 'balanced')과 기본 설정 검색마다 따로 재고 그중 가장 느린 값과 비교
         """
         self.index_path = Path(index_path)
         self.index_path.mkdir(parents=True, exist_ok=True)
         
         self.index = None
-        self.metadata = {}
+        self.metadata = MetadataStore()  # FAISS 라벨(행 번호) 순서의 메타데이터
+        self.filter_index = MetadataIndex()  # 라벨 순서의 필터 필드 색인 (type, author, genre, emotion, date)
+        self.external_ids: List[str] = []  # 라벨 -> 외부 ID
+        self.id_to_label: Dict[str, int] = {}  # 외부 ID -> 라벨 (삭제된 라벨 제외)
+        self.duplicate_of: Dict[str, int] = {}  # 근중복 구성원 외부 ID -> 대표 라벨 (대표 메타데이터의 'duplicate_ids')
+        self.tombstones = np.zeros(0, dtype=bool)  # 라벨 -> 삭제 여부 (True면 검색에서 제외)
+        self.deleted_count = 0
         self.is_trained = False
+        self.projection: Optional[VectorProjection] = None  # 선택적 차원 축소 투영
+        self.index_mmapped = False  # 인덱스 데이터가 파일 매핑(페이지 캐시 공유)인지 여부
+        self.target_recall = target_recall
+        self.tuning: Optional[Dict[str, Any]] = None  # nprobe 튜닝/압축 재현율 측정 결과 (인덱스와 함께 저장)
+        self.snapshot_version: Optional[str] = None  # 스냅샷에서 로드했으면 그 버전
+        
+        # 변경/컴팩션 교체는 lock 안에서, 검색은 lock 안에서 뜬 스냅샷으로 수행
+        self.compaction_threshold = compaction_threshold
+        self._lock = threading.RLock()
+        self._generation = 0  # 변경될 때마다 증가 (컴팩션 중 변경 감지용)
+        self._compaction_thread: Optional[threading.Thread] = None
+        
+        # 인덱스 타입 자동 마이그레이션 (구축은 lock 밖, 교체만 lock 안)
+        self.auto_migrate = auto_migrate
+        self.latency_budget_ms = latency_budget_ms
+        self.search_latency_ms: Optional[float] = None  # 검색 설정별 질문당 지연 시간 이동 평균 중 최댓값
+        self.search_latency_by_spec: Dict[str, float] = {}  # 검색 설정 키 -> 질문당 지연 시간 이동 평균
+        self.last_migration: Optional[Dict[str, Any]] = None
+        self._migration_thread: Optional[threading.Thread] = None
+        self._migration_retry_at = 0  # 실패한 마이그레이션은 벡터 수가 이만큼 될 때까지 다시 시도하지 않음
         
         logger.info(f"벡터 데이터베이스 초기화: {index_path}")
     
-    def create_index(self, embedding_dim: int, index_type: str = "auto", vector_count: int = 0) -> None:
+    def create_index(self,
+                     embedding_dim: int,
+                     index_type: str = "auto",
+                     vector_count: int = 0,
+                     memory_budget_mb: Optional[float] = None,
+                     pq_m: Optional[int] = None,
+                     rerank: bool = False,
+                     rerank_factor: int = 4) -> None:
         """
         FAISS 인덱스 생성
         
         Args:
             embedding_dim: 임베딩 차원
-            index_type: 인덱스 타입 ("IVFFlat", "Flat", "HNSW", "auto")
-            vector_count: 예상 벡터 수 (auto 모드에서 사용)
+            index_type: 인덱스 타입 ("IVFFlat", "Flat", "HNSW", "IVFPQ", "OPQIVFPQ", "SQ8", "SQfp16", "auto")
+            vector_count: 예상 벡터 수 (auto 모드와 IVF 클러스터 수 결정에 사용)
+            memory_budget_mb: auto 모드의 인덱스 메모리 예산 (넘으면 압축 인덱스 선택)
+            pq_m: PQ 부분 공간 수 = 벡터당 코드 바이트 수 (None이면 차원에 맞춰 선택)
+            rerank: 압축 인덱스 결과를 원본 벡터로 정확 재순위할지 여부 (원본 벡터를 함께 저장)
+            rerank_factor: 재순위 시 압축 인덱스에서 가져올 후보 배수 (k * rerank_factor)
         """
-        # auto 모드에서 벡터 수에 따라 인덱스 타입 결정
+        # 투영이 설정되어 있으면 원본 차원 대신 축소된 차원으로 인덱스 생성
+        if self.projection is not None and embedding_dim == self.projection.input_dim:
+            embedding_dim = self.projection.output_dim
+        
+        # auto 모드에서 벡터 수와 메모리 예산에 따라 인덱스 타입 결정
         if index_type == "auto":
-            if vector_count < 100:
-                index_type = "Flat"  # 소량 데이터는 Flat 사용
-            elif vector_count < 10000:
-                index_type = "HNSW"  # 중간 규모는 HNSW 사용
-            else:
-                index_type = "IVFFlat"  # 대용량은 IVFFlat 사용
+            choice = choose_index_type(vector_count, embedding_dim, memory_budget_mb)
+            index_type = choice['index_type']
+            pq_m = pq_m or choice['pq_m']
+            logger.info(f"auto 인덱스 선택: {index_type} (벡터당 약 {choice['bytes_per_vector']}바이트)")
         
         logger.info(f"FAISS 인덱스 생성: {index_type}, 차원: {embedding_dim}, 예상 벡터 수: {vector_count}")
+        base_index = self._build_base_index(index_type, embedding_dim, vector_count, pq_m, rerank, rerank_factor)
+        
+        # 검색 결과가 행 위치가 아닌 안정적인 라벨을 반환하도록 ID 매핑으로 감쌈
+        with self._lock:
+            self.index = faiss.IndexIDMap2(base_index)
+            self.index_mmapped = False
+            self.tuning = None
+            self._reset_state()
         
+        logger.info(f"인덱스 생성 완료: {type(base_index).__name__}")
+    
+    @staticmethod
+    def _build_base_index(index_type: str,
+                          embedding_dim: int,
+                          vector_count: int = 0,
+                          pq_m: Optional[int] = None,
+                          rerank: bool = False,
+                          rerank_factor: int = 4):
+        """
+        인덱스 타입별 빈 FAISS 인덱스 (ID 매핑으로 감싸기 전, create_index 인자 참고)
+        
+        Returns:
+            학습/추가 전 인덱스
+        """
         if index_type == "IVFFlat":
             # IVF (Inverted File Index) + Flat
-            # 클러스터 수를 벡터 개수에 맞게 조정 (최소 1개, 벡터 수보다 작게)
-            nlist = min(max(1, vector_count // 10), max(1, embedding_dim // 100))
+            # 클러스터 수는 벡터 수에 맞게 (약 4*sqrt(N)), nprobe는 학습 후 목표 재현율로 튜닝
+            nlist = choose_nlist(vector_count)
             quantizer = faiss.IndexFlatIP(embedding_dim)
-            self.index = faiss.IndexIVFFlat(quantizer, embedding_dim, nlist, faiss.METRIC_INNER_PRODUCT)
-            self.index.nprobe = min(5, nlist)  # 검색 시 탐색할 클러스터 수
+            base_index = faiss.IndexIVFFlat(quantizer, embedding_dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            base_index.nprobe = min(DEFAULT_NPROBE, nlist)  # 검색 시 탐색할 클러스터 수
             
         elif index_type == "Flat":
             # Flat (정확한 검색, 메모리 사용량 많음)
-            self.index = faiss.IndexFlatIP(embedding_dim)
+            base_index = faiss.IndexFlatIP(embedding_dim)
             
         elif index_type == "HNSW":
             # HNSW (Hierarchical Navigable Small World, 빠른 근사 검색)
-            self.index = faiss.IndexHNSWFlat(embedding_dim, 32)  # 32는 각 노드의 최대 이웃 수
-            self.index.hnsw.efConstruction = 200  # 인덱스 구축 시 탐색 깊이
-            self.index.hnsw.efSearch = 100  # 검색 시 탐색 깊이
+            # 32는 각 노드의 최대 이웃 수, 다른 타입과 같이 내적(정규화 벡터의 코사인 유사도) 사용
+            base_index = faiss.IndexHNSWFlat(embedding_dim, 32, faiss.METRIC_INNER_PRODUCT)
+            base_index.hnsw.efConstruction = 200  # 인덱스 구축 시 탐색 깊이
+            base_index.hnsw.efSearch = 100  # 검색 시 탐색 깊이
+            
+        elif index_type in ("IVFPQ", "OPQIVFPQ"):
+            # IVF + Product Quantization (벡터당 pq_m 바이트 코드, 선택적으로 OPQ 회전)
+            pq_m = pq_m or choose_pq_m(embedding_dim)
+            if embedding_dim % pq_m != 0:
+                raise ValueError(f"PQ 부분 공간 수({pq_m})가 차원({embedding_dim})의 약수가 아닙니다.")
+            nlist = choose_nlist(vector_count)
+            quantizer = faiss.IndexFlatIP(embedding_dim)
+            ivf_index = faiss.IndexIVFPQ(quantizer, embedding_dim, nlist, pq_m, PQ_NBITS, faiss.METRIC_INNER_PRODUCT)
+            ivf_index.nprobe = min(DEFAULT_NPROBE, nlist)
+            if index_type == "OPQIVFPQ":
+                # PQ 전에 부분 공간 간 분산을 고르게 하는 회전 학습
+                base_index = faiss.IndexPreTransform(faiss.OPQMatrix(embedding_dim, pq_m), ivf_index)
+            else:
+                base_index = ivf_index
+            
+        elif index_type in ("SQ8", "SQfp16"):
+            # 스칼라 양자화 (차원당 1바이트 / 2바이트, 전체 탐색)
+            qtype = faiss.ScalarQuantizer.QT_8bit if index_type == "SQ8" else faiss.ScalarQuantizer.QT_fp16
+            base_index = faiss.IndexScalarQuantizer(embedding_dim, qtype, faiss.METRIC_INNER_PRODUCT)
             
         else:
             raise ValueError(f"지원하지 않는 인덱스 타입: {index_type}")
         
-        logger.info(f"인덱스 생성 완료: {type(self.index).__name__}")
+        if rerank:
+            if index_type not in COMPRESSED_INDEX_TYPES:
+                raise ValueError(f"정확 재순위는 압축 인덱스에서만 사용할 수 있습니다: {index_type}")
+            # 압축 코드로 k * rerank_factor개 후보를 찾고 원본 벡터로 다시 정렬
+            base_index = faiss.IndexRefineFlat(base_index)
+            base_index.k_factor = rerank_factor
+        
+        return base_index
+    
+    def _reset_state(self) -> None:
+        """메타데이터, ID 매핑, 톰스톤 초기화 (호출자가 lock 보유)"""
+        self.metadata = MetadataStore()
+        self.filter_index = MetadataIndex()
+        self.external_ids = []
+        self.id_to_label = {}
+        self.duplicate_of = {}
+        self.tombstones = np.zeros(0, dtype=bool)
+        self.deleted_count = 0
+        self.is_trained = False
+        self._generation += 1
     
-    def add_vectors(self, embeddings: np.ndarray, metadata: List[Dict[str, Any]]) -> None:
+    def train_projection(self,
+                         sample: np.ndarray,
+                         output_dim: int,
+                         method: str = "pca",
+                         opq_subspaces: Optional[int] = None) -> VectorProjection:
         """
-        벡터를 인덱스에 추가
+        샘플 임베딩으로 차원 축소 투영 학습 후 설정
+        
+        인덱스에 벡터가 들어간 뒤에는 투영을 바꿀 수 없다 (기존 벡터와 차원이 달라짐).
+        
+        Args:
+            sample: 학습용 원본 임베딩 샘플
+            output_dim: 축소할 차원
+            method: 투영 방식 ("pca", "opq")
+            opq_subspaces: OPQ 부분 공간 수
+        
+        Returns:
+            학습된 투영
+        """
+        projection = VectorProjection(sample.shape[1], output_dim, method, opq_subspaces)
+        projection.train(sample)
+        self.set_projection(projection)
+        return projection
+    
+    def set_projection(self, projection: Optional[VectorProjection]) -> None:
+        """
+        차원 축소 투영 설정 (None이면 해제)
+        
+        Args:
+            projection: 학습된 투영
+        """
+        if self.index is not None and self.index.ntotal > 0:
+            raise ValueError("벡터가 있는 인덱스의 투영은 바꿀 수 없습니다. 인덱스를 다시 구축하세요.")
+        if projection is not None and not projection.is_trained:
+            raise ValueError("학습되지 않은 투영은 설정할 수 없습니다.")
+        
+        self.projection = projection
+        if projection is not None:
+            logger.info(f"차원 축소 투영 설정: {projection.method} {projection.input_dim} -> {projection.output_dim}")
+    
+    def project(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        투영이 설정되어 있으면 원본 차원 벡터를 인덱스 차원으로 변환
+        
+        이미 투영된 벡터(출력 차원)는 그대로 통과하므로 여러 단계에서 호출해도 안전하다.
+        
+        Args:
+            vectors: (N x 차원) 또는 (차원,) 벡터
+        
+        Returns:
+            인덱스에 넣거나 검색할 수 있는 float32 벡터
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.projection is None or vectors.shape[-1] != self.projection.input_dim:
+            return vectors
+        
+        projected = self.projection.apply(vectors)
+        return projected if vectors.ndim > 1 else projected[0]
+    
+    def _base_index(self):
+        """ID 매핑 래퍼 안쪽의 실제 인덱스 (IVF/HNSW 설정 조회용)"""
+        if isinstance(self.index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            return faiss.downcast_index(self.index.index)
+        return self.index
+    
+    def _ivf_index(self):
+        """인덱스 안의 IVF 인덱스 (OPQ/재순위로 감싼 경우 포함, IVF가 아니면 None)"""
+        return ivf_of(self._base_index()) if self.index is not None else None
+    
+    def _resolve_external_ids(self,
+                              metadata: List[Dict[str, Any]],
+                              ids: Optional[List[str]]) -> List[str]:
+        """
+        추가할 벡터의 외부 ID 결정 (없으면 메타데이터 'id', 그것도 없거나 None이면 자동 생성)
+        
+        자동 ID는 새 라벨 번호로 만들어 겹치지 않는다 ('id': None을 str()로 바꾸면 모두 "None"이
+        되어 한 라벨을 두고 서로 덮어씀).
+        """
+        if ids is None:
+            ids = [meta.get('id') for meta in metadata]
+        elif len(ids) != len(metadata):
+            raise ValueError("외부 ID와 메타데이터의 개수가 일치하지 않습니다.")
+        
+        next_label = len(self.metadata)
+        ids = [str(external_id) if external_id is not None else f"auto_{next_label + i}"
+               for i, external_id in enumerate(ids)]
+        if len(set(ids)) != len(ids):
+            raise ValueError("추가할 벡터에 중복된 외부 ID가 있습니다.")
+        return ids
+    
+    def _resolve_label(self, external_id: str) -> Optional[int]:
+        """외부 ID의 라벨 (근중복 구성원이면 살아 있는 대표의 라벨, 없으면 None)"""
+        external_id = str(external_id)
+        label = self.id_to_label.get(external_id)
+        if label is None:
+            label = self.duplicate_of.get(external_id)
+            if label is not None and self.tombstones[label]:
+                return None
+        return label
+    
+    def contains(self, external_id: str) -> bool:
+        """외부 ID가 인덱스에 있는지 확인 (대표 벡터로 합쳐진 근중복 구성원 포함)"""
+        return self._resolve_label(external_id) is not None
+    
+    def get_metadata(self, external_id: str) -> Optional[Dict[str, Any]]:
+        """외부 ID로 메타데이터 조회 (근중복 구성원은 대표의 메타데이터)"""
+        label = self._resolve_label(external_id)
+        return self.metadata[label] if label is not None else None
+    
+    def add_vectors(self,
+                    embeddings: np.ndarray,
+                    metadata: List[Dict[str, Any]],
+                    ids: Optional[List[str]] = None) -> None:
+        """
+        벡터를 인덱스에 추가 (기존 벡터 뒤에 이어 붙임, 재구축 없음)
         
         Args:
             embeddings: 추가할 임베딩 벡터 (numpy array)
             metadata: 각 벡터의 메타데이터
+            ids: 각 벡터의 안정적인 외부 ID (예: "book_12:0", None이면 메타데이터의 'id' 사용)
         """
         if self.index is None:
             raise ValueError("인덱스가 생성되지 않았습니다. create_index()를 먼저 호출하세요.")
@@ -87,34 +331,351 @@ class VectorDatabase:
         if len(embeddings) != len(metadata):
             raise ValueError("임베딩과 메타데이터의 개수가 일치하지 않습니다.")
         
+        with self._lock:
+            external_ids = self._resolve_external_ids(metadata, ids)
+            existing = [external_id for external_id in external_ids if external_id in self.id_to_label]
+            if existing:
+                raise ValueError(f"이미 인덱스에 있는 외부 ID입니다: {existing[:5]} (갱신은 upsert_vectors 사용)")
+            
+            self._append(embeddings, metadata, external_ids)
+        
+        self._maybe_migrate()
+    
+    def upsert_vectors(self,
+                       embeddings: np.ndarray,
+                       metadata: List[Dict[str, Any]],
+                       ids: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        외부 ID 기준 추가 또는 갱신 (바뀐 행 수에 비례하는 비용, 재구축 없음)
+        
+        이미 있는 ID는 기존 벡터에 톰스톤을 표시하고 새 벡터를 이어 붙인다.
+        
+        Args:
+            embeddings: 추가/갱신할 임베딩 벡터
+            metadata: 각 벡터의 메타데이터
+            ids: 각 벡터의 외부 ID (None이면 메타데이터의 'id' 사용)
+        
+        Returns:
+            'inserted', 'updated' 개수
+        """
+        if self.index is None:
+            raise ValueError("인덱스가 생성되지 않았습니다. create_index()를 먼저 호출하세요.")
+        
+        if len(embeddings) != len(metadata):
+            raise ValueError("임베딩과 메타데이터의 개수가 일치하지 않습니다.")
+        
+        with self._lock:
+            external_ids = self._resolve_external_ids(metadata, ids)
+            updated = self._mark_deleted([self.id_to_label[external_id] for external_id in external_ids
+                                          if external_id in self.id_to_label])
+            self._append(embeddings, metadata, external_ids)
+        
+        logger.info(f"벡터 upsert 완료: 추가 {len(external_ids) - updated}개, 갱신 {updated}개")
+        self._maybe_compact()
+        self._maybe_migrate()
+        
+        return {'inserted': len(external_ids) - updated, 'updated': updated}
+    
+    def delete(self, ids: List[str]) -> int:
+        """
+        외부 ID로 벡터 삭제 (톰스톤 표시, 검색에서 즉시 제외)
+        
+        Args:
+            ids: 삭제할 외부 ID 리스트
+        
+        Returns:
+            실제로 삭제된 벡터 수
+        """
+        with self._lock:
+            labels = [self.id_to_label[str(external_id)] for external_id in ids
+                      if str(external_id) in self.id_to_label]
+            deleted = self._mark_deleted(labels)
+            # 대표로 합쳐진 구성원은 벡터 없이 연결만 끊음
+            for external_id in ids:
+                self.duplicate_of.pop(str(external_id), None)
+        
+        logger.info(f"벡터 삭제 완료: {deleted}개 (톰스톤 비율 {self.tombstone_ratio:.1%})")
+        self._maybe_compact()
+        
+        return deleted
+    
+    def _append(self, embeddings: np.ndarray, metadata: List[Dict[str, Any]], external_ids: List[str]) -> None:
+        """검증된 벡터를 인덱스 끝에 추가 (호출자가 lock 보유)"""
         logger.info(f"벡터 추가 시작: {len(embeddings)}개")
+        self._ensure_writable()
+        
+        # 차원 축소 투영 (설정된 경우)
+        embeddings = self.project(embeddings)
         
         # 벡터 정규화 (코사인 유사도 계산을 위해)
         faiss.normalize_L2(embeddings)
         
         # 인덱스에 벡터 추가
+        trained_now = False
         if hasattr(self.index, 'is_trained') and not self.index.is_trained:
-            # IVF 인덱스의 경우 훈련 필요
-            logger.info("인덱스 훈련 중...")
-            self.index.train(embeddings)
+            # IVF/PQ/SQ 인덱스의 경우 훈련 필요 (벡터가 많으면 무작위 샘플로)
+            sample = training_sample(embeddings, self._training_centroids())
+            logger.info(f"인덱스 훈련 중... (학습 벡터 {len(sample)}개)")
+            self.index.train(sample)
             self.is_trained = True
+            trained_now = True
             logger.info("인덱스 훈련 완료")
         
-        # 벡터 추가
-        self.index.add(embeddings)
+        # 벡터 추가 (라벨은 메타데이터 리스트의 위치)
+        first_label = len(self.metadata)
+        labels = np.arange(first_label, first_label + len(embeddings), dtype=np.int64)
+        if isinstance(self.index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+            self.index.add_with_ids(embeddings, labels)
+        else:
+            # ID 매핑 이전에 저장된 인덱스는 행 위치가 곧 라벨
+            self.index.add(embeddings)
+        
+        # 메타데이터, ID 매핑, 톰스톤 비트맵을 벡터와 함께 확장
+        self.metadata.append(metadata, external_ids)
+        self.filter_index.append(metadata)
+        # 톰스톤은 새 배열로 교체 (검색 중인 스냅샷은 이전 배열을 그대로 봄)
+        self.tombstones = np.concatenate([self.tombstones, np.zeros(len(embeddings), dtype=bool)])
+        for label, external_id, meta in zip(labels.tolist(), external_ids, metadata):
+            self.external_ids.append(external_id)
+            self.id_to_label[external_id] = label
+            self.duplicate_of.pop(external_id, None)  # 자기 벡터가 생긴 구성원
+            for member_id in meta.get('duplicate_ids') or []:
+                if member_id is not None:
+                    self.duplicate_of[str(member_id)] = label
+        self._generation += 1
+        
+        logger.info(f"벡터 추가 완료: {len(embeddings)}개 추가, 총 {self.index.ntotal}개")
+        
+        # 학습 직후 이번에 추가한 원본 벡터를 정답으로 nprobe 튜닝 / 압축 재현율 측정
+        if trained_now and self.target_recall is not None:
+            self._tune_with_exact_truth(embeddings, first_label)
+    
+    def _training_centroids(self) -> int:
+        """학습 샘플 크기를 정할 중심 수 (IVF 클러스터 수와 PQ 코드북 크기 중 큰 값)"""
+        ivf_index = self._ivf_index()
+        centroids = ivf_index.nlist if ivf_index is not None else 1
+        if ivf_index is not None and hasattr(faiss.downcast_index(ivf_index), 'pq'):
+            centroids = max(centroids, 1 << PQ_NBITS)
+        return centroids
+    
+    def _tune_with_exact_truth(self, embeddings: np.ndarray, first_label: int,
+                               k: int = 10, num_queries: int = 256, seed: int = 0) -> None:
+        """
+        학습에 쓴 배치의 원본 벡터로 정확 검색 정답을 만들어 튜닝 (호출자가 lock 보유)
+        
+        IVF 계열은 목표 재현율을 만족하는 nprobe를 고르고, SQ 계열은 압축으로 인한
+        재현율만 측정해 기록한다. 원본 벡터가 그대로 저장되는 Flat/HNSW는 건너뛴다.
+        """
+        ivf_index = self._ivf_index()
+        compressed = ivf_index is None and self.is_trained and not isinstance(
+            self._base_index(), (faiss.IndexFlat, faiss.IndexHNSW))
+        if ivf_index is None and not compressed:
+            return
+        if len(embeddings) <= k:
+            return
+        
+        rng = np.random.default_rng(seed)
+        rows = np.sort(rng.choice(len(embeddings), min(num_queries, len(embeddings)), replace=False))
+        queries = np.ascontiguousarray(embeddings[rows])
+        exclude = rows + first_label
+        
+        # 정확 검색 정답 (자기 자신 제외)
+        _, truth_rows = faiss.knn(queries, embeddings, k + 1, faiss.METRIC_INNER_PRODUCT)
+        truth = drop_own_labels(truth_rows + first_label, k, exclude)
+        
+        if ivf_index is not None:
+            self.tuning = sweep_nprobe(self.index, ivf_index.nlist, queries, k=k,
+                                       target_recall=self.target_recall, exclude=exclude, truth=truth)
+            ivf_index.nprobe = self.tuning['nprobe']
+        else:
+            self.tuning = evaluate_recall(self.index, queries, truth, k=k, exclude=exclude)
+    
+    def tune_nprobe(self,
+                    target_recall: Optional[float] = None,
+                    k: int = 10,
+                    num_queries: int = 256,
+                    queries: Optional[np.ndarray] = None,
+                    seed: int = 0) -> Dict[str, Any]:
+        """
+        IVF 인덱스의 nprobe를 목표 재현율을 만족하는 가장 작은 값으로 설정
+        
+        질문을 주지 않으면 저장된 벡터를 무작위로 골라 질문으로 쓰고, 정답과 결과에서
+        자기 자신을 제외한다(leave-one-out). 정답은 모든 클러스터를 탐색한 결과이므로
+        PQ 계열에서는 압축 손실을 제외한 재현율이다. 결과는 save_index 시 함께 저장된다.
+        
+        Args:
+            target_recall: 목표 recall@k (None이면 생성 시 설정값)
+            k: 재현율을 잴 상위 k
+            num_queries: 저장된 벡터에서 뽑을 질문 수
+            queries: 별도 검증 질문 벡터 (원본 임베딩)
+            seed: 질문 샘플링 시드
+        
+        Returns:
+            튜닝 결과
+        """
+        target_recall = target_recall if target_recall is not None else (self.target_recall or 0.95)
+        
+        with self._lock:
+            ivf_index = self._ivf_index()
+            if ivf_index is None:
+                raise ValueError("nprobe 튜닝은 IVF 인덱스에서만 지원합니다.")
+            if self.live_count == 0:
+                raise ValueError("튜닝할 벡터가 없습니다.")
+            
+            exclude = None
+            if queries is not None:
+                queries = self.project(queries).astype('float32', copy=True).reshape(-1, self.index.d)
+                faiss.normalize_L2(queries)
+            else:
+                live_labels = np.flatnonzero(~self.tombstones)
+                rng = np.random.default_rng(seed)
+                exclude = np.sort(rng.choice(live_labels, min(num_queries, len(live_labels)), replace=False))
+                ivf_index.make_direct_map()
+                queries = np.stack([self.index.reconstruct(int(label)) for label in exclude]).astype('float32')
+            
+            self.tuning = sweep_nprobe(self.index, ivf_index.nlist, queries, k=k,
+                                       target_recall=target_recall, exclude=exclude)
+            ivf_index.nprobe = self.tuning['nprobe']
+        
+        return self.tuning
+    
+    def _mark_deleted(self, labels: List[int]) -> int:
+        """
+        라벨에 톰스톤 표시 후 ID 매핑에서 제거 (호출자가 lock 보유)
+        
+        톰스톤은 복사본에 표시한 뒤 교체하므로 이미 스냅샷을 잡은 검색은 삭제 전 상태를 끝까지 본다.
+        """
+        tombstones = self.tombstones.copy()
+        deleted = 0
+        for label in labels:
+            if 0 <= label < len(tombstones) and not tombstones[label]:
+                tombstones[label] = True
+                self.id_to_label.pop(self.external_ids[label], None)
+                deleted += 1
+        
+        if deleted:
+            self.tombstones = tombstones
+            self.deleted_count += deleted
+            self._generation += 1
+        return deleted
+    
+    @property
+    def live_count(self) -> int:
+        """삭제되지 않은 벡터 수"""
+        return (self.index.ntotal if self.index is not None else 0) - self.deleted_count
+    
+    @property
+    def tombstone_ratio(self) -> float:
+        """전체 벡터 중 톰스톤 비율"""
+        total = self.index.ntotal if self.index is not None else 0
+        return self.deleted_count / total if total else 0.0
+    
+    @property
+    def generation(self) -> int:
+        """변경 세대 (추가/삭제/컴팩션/마이그레이션 교체/로드마다 증가, 저장 필요 여부 판단용)"""
+        return self._generation
+    
+    @property
+    def compaction_running(self) -> bool:
+        """백그라운드 컴팩션이 진행 중인지 여부"""
+        return self._compaction_thread is not None and self._compaction_thread.is_alive()
+    
+    @property
+    def migration_running(self) -> bool:
+        """백그라운드 마이그레이션이 진행 중인지 여부"""
+        return self._migration_thread is not None and self._migration_thread.is_alive()
+    
+    def memory_bytes(self) -> int:
+        """인덱스가 차지하는 전용 메모리 추정치 (메모리 매핑된 인덱스는 페이지 캐시를 공유하므로 0)"""
+        if self.index is None or self.index_mmapped:
+            return 0
+        return index_memory_bytes(self.index)
+    
+    def iter_live_metadata(self):
+        """삭제되지 않은 벡터의 메타데이터 순회"""
+        for label, meta in enumerate(self.metadata):
+            if not self.tombstones[label]:
+                yield meta
+    
+    def _search_state(self):
+        """검색에 쓸 인덱스/메타데이터/외부 ID/톰스톤/필터 색인 스냅샷 (컴팩션 교체와 섞이지 않도록)"""
+        with self._lock:
+            return (self.index, self.metadata, self.external_ids, self.tombstones,
+                    self.deleted_count, self.filter_index)
+    
+    def _search_index(self,
+                      query_vectors: np.ndarray,
+                      k: int,
+                      search_params: SearchSpec = None,
+                      filters: Optional[Dict[str, Any]] = None):
+        """
+        톰스톤을 제외한 상위 k개 검색
+        
+        톰스톤(과 필터)은 라벨 비트맵으로 FAISS IDSelectorBitmap에 넘겨 검색 단계에서
+        제외하므로, 삭제된 수만큼 더 가져오지 않아도 살아 있는 결과로 k개를 채운다.
+        
+        Returns:
+            (거리, 라벨, 메타데이터 저장소, 외부 ID 리스트) 튜플 (검색 시점 스냅샷)
+        """
+        index, metadata, external_ids, tombstones, deleted_count, filter_index = self._search_state()
+        
+        label_mask = None
+        if filters:
+            label_mask = filter_index.match(filters)
+            if deleted_count:
+                label_mask &= ~tombstones
+        elif deleted_count:
+            label_mask = ~tombstones
         
-        # 메타데이터 저장
-        self.metadata = metadata
+        start_time = time.perf_counter()
+        distances, indices = search_with_spec(index, query_vectors, min(k, index.ntotal),
+                                              search_params, label_mask=label_mask)
+        if not filters and self._tracks_latency(search_params):
+            # 필터 검색은 일치 비율에 좌우되므로 마이그레이션 판단에서 제외
+            self._record_latency((time.perf_counter() - start_time) * 1000 / max(1, len(query_vectors)),
+                                 spec_key(search_params))
+        return distances, indices, metadata, external_ids
+    
+    @staticmethod
+    def _tracks_latency(search_params: SearchSpec) -> bool:
+        """
+        마이그레이션 판단에 쓸 검색 설정인지 여부
         
-        logger.info(f"벡터 추가 완료: 총 {self.index.ntotal}개")
+        전체 비교('exact')는 일부러 느린 검색이고, FAISS SearchParameters 객체는 설정을
+        알 수 없으므로 제외한다.
+        """
+        if isinstance(search_params, faiss.SearchParameters):
+            return False
+        return not (normalize_spec(search_params) or {}).get('exhaustive')
+    
+    def _record_latency(self, latency_ms: float, key: str = "") -> None:
+        """검색 설정별 질문당 지연 시간 이동 평균 갱신 후 마이그레이션 필요 여부 확인"""
+        previous = self.search_latency_by_spec.get(key)
+        if previous is None:
+            self.search_latency_by_spec[key] = latency_ms
+        else:
+            self.search_latency_by_spec[key] = previous + LATENCY_EMA_WEIGHT * (latency_ms - previous)
+        # 서비스에서 쓰는 설정 중 가장 느린 것이 예산을 넘으면 마이그레이션
+        self.search_latency_ms = max(self.search_latency_by_spec.values())
+        if self.latency_budget_ms is not None:
+            self._maybe_migrate()
     
-    def search(self, query_vector: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+    def search(self,
+               query_vector: np.ndarray,
+               k: int = 5,
+               search_params: SearchSpec = None,
+               filters: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, Any]]]:
         """
         유사한 벡터 검색
         
         Args:
             query_vector: 검색할 쿼리 벡터
             k: 반환할 상위 k개 결과
+            search_params: 이번 검색에만 적용할 파라미터 (프리셋 이름 'fast'/'balanced'/'exact',
+                {'nprobe', 'ef_search', 'rerank_factor', 'exhaustive'} 딕셔너리 또는
+                FAISS SearchParameters, None이면 인덱스 기본값)
+            filters: 메타데이터 필터 (type, author, genre, emotion, date_range), 일치하는
+                벡터만 검색 대상으로 삼는다
         
         Returns:
             (거리, 인덱스, 메타데이터) 튜플
@@ -122,28 +683,30 @@ class VectorDatabase:
         if self.index is None:
             raise ValueError("인덱스가 생성되지 않았습니다.")
         
-        if self.index.ntotal == 0:
+        if self.live_count == 0:
             logger.warning("인덱스에 벡터가 없습니다.")
             return np.array([]), np.array([]), []
         
-        # 쿼리 벡터 정규화
-        query_vector = query_vector.reshape(1, -1)
+        # 쿼리 벡터 투영 및 정규화
+        query_vector = self.project(query_vector).reshape(1, -1)
         faiss.normalize_L2(query_vector)
         
         # 검색 실행
-        distances, indices = self.index.search(query_vector, min(k, self.index.ntotal))
+        distances, indices, metadata, _ = self._search_index(query_vector, k, search_params, filters)
         
-        # 결과 메타데이터 추출
-        results_metadata = []
-        for idx in indices[0]:
-            if idx != -1:  # -1은 유효하지 않은 인덱스
-                results_metadata.append(self.metadata[idx])
+        # 결과 메타데이터 추출 (상위 k개 행만 저장소에서 읽음, -1은 유효하지 않은 인덱스)
+        results_metadata = metadata.get_many([idx for idx in indices[0] if idx != -1])
         
         logger.info(f"검색 완료: {len(results_metadata)}개 결과")
         
         return distances[0], indices[0], results_metadata
     
-    def search_by_text(self, query_text: str, k: int = 5, embedding_generator=None) -> List[Dict[str, Any]]:
+    def search_by_text(self,
+                       query_text: str,
+                       k: int = 5,
+                       embedding_generator=None,
+                       search_params: SearchSpec = None,
+                       filters: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """
         텍스트로 유사한 벡터 검색
         
@@ -151,6 +714,8 @@ class VectorDatabase:
             query_text: 검색할 텍스트
             k: 반환할 상위 k개 결과
             embedding_generator: 임베딩 생성기
+            search_params: 이번 검색에만 적용할 파라미터 (search 참고)
+            filters: 메타데이터 필터 (search 참고)
         
         Returns:
             검색 결과 메타데이터 리스트
@@ -162,7 +727,7 @@ class VectorDatabase:
         query_embedding = embedding_generator.model.encode([query_text], normalize_embeddings=True)[0]
         
         # 검색 실행
-        distances, indices, metadata = self.search(query_embedding, k)
+        distances, indices, metadata = self.search(query_embedding, k, search_params, filters)
         
         # 거리 정보 추가
         for i, meta in enumerate(metadata):
@@ -171,41 +736,59 @@ class VectorDatabase:
         
         return metadata
     
-    def batch_search(self, query_vectors: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray, List[List[Dict[str, Any]]]]:
+    def batch_search(self,
+                     query_vectors: np.ndarray,
+                     k: int = 5,
+                     search_params: SearchSpec = None,
+                     filters: Optional[Dict[str, Any]] = None) -> Tuple[np.ndarray, np.ndarray, List[List[Dict[str, Any]]]]:
         """
         여러 쿼리 벡터에 대한 배치 검색
         
+        결과마다 메타데이터 dict를 복사해 점수와 순위를 넣은 이전 형식으로 반환한다.
+        배치가 크면 복사 없이 배열로 받는 batch_search_results를 사용한다.
+        
         Args:
             query_vectors: 검색할 쿼리 벡터들 (numpy array)
             k: 각 쿼리당 반환할 상위 k개 결과
+            search_params: 모든 쿼리에 적용할 검색 파라미터 (search 참고)
+            filters: 모든 쿼리에 적용할 메타데이터 필터 (search 참고)
         
         Returns:
             (거리, 인덱스, 메타데이터) 튜플
         """
+        results = self.batch_search_results(query_vectors, k, search_params, filters)
+        return results.scores, results.labels, results.to_dicts()
+    
+    def batch_search_results(self,
+                             query_vectors: np.ndarray,
+                             k: int = 5,
+                             search_params: SearchSpec = None,
+                             filters: Optional[Dict[str, Any]] = None) -> SearchResults:
+        """
+        여러 쿼리 벡터에 대한 배치 검색 (열 배열 결과, 메타데이터는 접근할 때 읽음)
+        
+        Args:
+            query_vectors: 검색할 쿼리 벡터들 (numpy array)
+            k: 각 쿼리당 반환할 상위 k개 결과
+            search_params: 모든 쿼리에 적용할 검색 파라미터 (search 참고)
+            filters: 모든 쿼리에 적용할 메타데이터 필터 (search 참고)
+        
+        Returns:
+            SearchResults (scores, labels, ranks, ids 배열과 질문별 메타데이터 뷰)
+        """
         if self.index is None:
             raise ValueError("인덱스가 생성되지 않았습니다.")
         
-        # 쿼리 벡터 정규화
+        # 쿼리 벡터 투영 및 정규화
+        query_vectors = self.project(query_vectors)
         faiss.normalize_L2(query_vectors)
         
         # 배치 검색 실행
-        distances, indices = self.index.search(query_vectors, min(k, self.index.ntotal))
-        
-        # 결과 메타데이터 추출
-        all_results_metadata = []
-        for query_idx in range(len(query_vectors)):
-            query_results = []
-            for rank_idx, idx in enumerate(indices[query_idx]):
-                if idx != -1:
-                    meta = self.metadata[idx].copy()
-                    meta['similarity_score'] = float(distances[query_idx][rank_idx])
-                    meta['rank'] = rank_idx + 1
-                    query_results.append(meta)
-            all_results_metadata.append(query_results)
+        distances, indices, metadata, external_ids = self._search_index(query_vectors, k, search_params, filters)
         
         logger.info(f"배치 검색 완료: {len(query_vectors)}개 쿼리, 각각 {k}개 결과")
         
-        return distances, indices, all_results_metadata
+        return SearchResults(distances, indices, metadata, external_ids)
     
     def save_index(self, save_path: Optional[str] = None) -> None:
         """
@@ -220,30 +803,71 @@ class VectorDatabase:
         save_path = Path(save_path)
         save_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # FAISS 인덱스 저장
+        # 저장 중에 인덱스와 메타데이터가 어긋나지 않도록 lock 안에서 기록
+        with self._lock:
+            self._write_files(save_path)
+        
+        logger.info(f"인덱스 저장 완료: {save_path}")
+        logger.info(f"  - FAISS 인덱스: {save_path.with_suffix('.faiss')}")
+        logger.info(f"  - 메타데이터: {save_path.with_suffix('.metadb')}")
+    
+    def write_snapshot(self, save_path: str) -> None:
+        """
+        현재 상태를 파일 묶음으로 기록 (스냅샷 게시용)
+        
+        save_index와 달리 메타데이터 저장소를 기록한 파일로 전환하지 않으므로, 이후
+        변경이나 저장이 게시된 스냅샷 파일에 영향을 주지 않는다.
+        
+        Args:
+            save_path: 기록할 파일 경로 (확장자 제외)
+        """
+        save_path = Path(save_path)
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        with self._lock:
+            self._write_files(save_path, reopen=False)
+    
+    def _write_files(self, save_path: Path, reopen: bool = True) -> None:
+        """인덱스, 투영, 메타데이터 파일 기록 (호출자가 lock 보유)"""
+        # FAISS 인덱스 저장 (임시 파일에 쓴 뒤 교체하여, 이 파일을 매핑 중인
+        # 다른 프로세스가 내용이 바뀌는 도중의 파일을 보지 않도록 함)
         index_path = save_path.with_suffix('.faiss')
-        faiss.write_index(self.index, str(index_path))
+        tmp_path = index_path.with_name(index_path.name + '.tmp')
+        faiss.write_index(self.index, str(tmp_path))
+        os.replace(tmp_path, index_path)
         
-        # 메타데이터 저장
-        metadata_path = save_path.with_suffix('.json')
-        with open(metadata_path, 'w', encoding='utf-8') as f:
+        # 차원 축소 투영 저장 (인덱스와 항상 함께 로드되어야 함)
+        if self.projection is not None:
+            self.projection.save(save_path)
+        
+        # 메타데이터 저장 (행은 SQLite 저장소, JSON에는 인덱스 정보만)
+        self.metadata.save(save_path.with_suffix('.metadb'), reopen=reopen)
+        self.filter_index.save(save_path.with_suffix('.filters'))
+        self._write_header(save_path)
+    
+    def _write_header(self, save_path: Path) -> None:
+        """인덱스 정보 JSON 기록 (호출자가 lock 보유)"""
+        with open(save_path.with_suffix('.json'), 'w', encoding='utf-8') as f:
             json.dump({
-                'metadata': self.metadata,
+                'metadata_store': save_path.with_suffix('.metadb').name,
+                'filter_index': save_path.with_suffix('.filters').name,
+                'deleted_labels': np.flatnonzero(self.tombstones).tolist(),
+                'duplicate_of': self.duplicate_of,
                 'total_vectors': self.index.ntotal if self.index else 0,
                 'is_trained': self.is_trained,
-                'index_type': type(self.index).__name__ if self.index else None
+                'index_type': type(self._base_index()).__name__ if self.index else None,
+                'tuning': self.tuning,
+                'projection': self.projection.get_info() if self.projection else None
             }, f, ensure_ascii=False, indent=2)
-        
-        logger.info(f"인덱스 저장 완료: {save_path}")
-        logger.info(f"  - FAISS 인덱스: {index_path}")
-        logger.info(f"  - 메타데이터: {metadata_path}")
     
-    def load_index(self, load_path: Optional[str] = None) -> None:
+    def load_index(self, load_path: Optional[str] = None, mmap: bool = False) -> None:
         """
         저장된 FAISS 인덱스와 메타데이터 로드
         
         Args:
             load_path: 로드할 파일 경로 (None이면 기본 경로 사용)
+            mmap: True이면 인덱스 파일을 메모리 매핑으로 로드 (여러 워커 프로세스가
+                  페이지 캐시를 공유, 첫 추가/컴팩션 시 전용 메모리로 복사)
         """
         if load_path is None:
             load_path = self.index_path / "faiss_index"
@@ -255,7 +879,7 @@ class VectorDatabase:
         if not index_path.exists():
             raise FileNotFoundError(f"FAISS 인덱스 파일을 찾을 수 없습니다: {index_path}")
         
-        self.index = faiss.read_index(str(index_path))
+        index, mmapped = self._read_index(index_path, mmap)
         
         # 메타데이터 로드
         metadata_path = load_path.with_suffix('.json')
@@ -264,12 +888,125 @@ class VectorDatabase:
         
         with open(metadata_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
-            self.metadata = data['metadata']
+        
+        legacy = 'metadata' in data
+        if legacy:
+            # 메타데이터 전체를 JSON에 담던 이전 형식
+            external_ids = data.get('external_ids') or self._legacy_external_ids(data['metadata'])
+            metadata = MetadataStore.from_records(data['metadata'], external_ids)
+        else:
+            metadata = MetadataStore(load_path.with_suffix('.metadb'))
+            external_ids = metadata.external_ids()
+        
+        # 필터 색인 (색인 파일이 없거나 행 수가 다른 이전 인덱스는 메타데이터에서 다시 생성)
+        filter_index_path = load_path.with_suffix('.filters')
+        filter_index = MetadataIndex.load(filter_index_path) if filter_index_path.exists() else None
+        if filter_index is None or len(filter_index) != len(metadata):
+            logger.info("메타데이터 필터 색인 생성 중...")
+            filter_index = MetadataIndex.from_metadata(metadata)
+        
+        with self._lock:
+            self.index = index
+            self.index_mmapped = mmapped
+            self._reset_state()
+            self.metadata = metadata
+            self.filter_index = filter_index
             self.is_trained = data.get('is_trained', False)
+            self.tuning = data.get('tuning')
+            if self.tuning and self.tuning.get('nprobe') and self._ivf_index() is not None:
+                self._ivf_index().nprobe = self.tuning['nprobe']
+            self.external_ids = external_ids
+            self.tombstones = np.zeros(len(self.metadata), dtype=bool)
+            self.tombstones[np.asarray(data.get('deleted_labels', []), dtype=np.int64)] = True
+            self.deleted_count = int(self.tombstones.sum())
+            self.id_to_label = {external_id: label for label, external_id in enumerate(self.external_ids)
+                                if not self.tombstones[label]}
+            if 'duplicate_of' in data:
+                self.duplicate_of = data['duplicate_of']
+            else:
+                # 구성원 연결을 저장하기 전의 인덱스는 대표 메타데이터에서 다시 만듦
+                self.duplicate_of = {str(member_id): label for label, meta in enumerate(self.metadata)
+                                     for member_id in meta.get('duplicate_ids') or [] if member_id is not None}
+        
+        # 차원 축소 투영 로드
+        if data.get('projection'):
+            if not VectorProjection.exists(load_path):
+                raise FileNotFoundError(f"차원 축소 투영 파일을 찾을 수 없습니다: {load_path.with_suffix('.projection')}")
+            self.projection = VectorProjection.load(load_path)
+        else:
+            self.projection = None
+        
+        if legacy:
+            self._migrate_json_sidecar(load_path)
         
         logger.info(f"인덱스 로드 완료: {load_path}")
-        logger.info(f"  - 총 벡터 수: {self.index.ntotal}")
-        logger.info(f"  - 인덱스 타입: {type(self.index).__name__}")
+        logger.info(f"  - 총 벡터 수: {self.index.ntotal} (삭제 표시 {self.deleted_count}개)")
+        logger.info(f"  - 인덱스 타입: {type(self._base_index()).__name__}")
+        logger.info(f"  - 메모리 매핑: {self.index_mmapped}")
+    
+    @staticmethod
+    def _read_index(index_path: Path, mmap: bool):
+        """
+        FAISS 인덱스 파일 읽기
+        
+        Returns:
+            (인덱스, 메모리 매핑 여부) 튜플
+        """
+        if mmap:
+            # IO_FLAG_MMAP_IFC는 Flat/HNSW 저장 벡터와 IVF 역색인 리스트를 모두 매핑한다.
+            # 이를 지원하지 않는 구버전 FAISS는 IO_FLAG_MMAP(IVF 역색인 리스트만 매핑)을 사용
+            flags = getattr(faiss, 'IO_FLAG_MMAP_IFC', None)
+            if flags is None:
+                flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+            try:
+                return faiss.read_index(str(index_path), flags), True
+            except RuntimeError as e:
+                logger.warning(f"메모리 매핑 로드를 지원하지 않는 인덱스입니다. 일반 로드로 전환: {e}")
+        
+        return faiss.read_index(str(index_path)), False
+    
+    def _ensure_writable(self) -> None:
+        """
+        메모리 매핑된 인덱스를 전용 메모리로 복사 (호출자가 lock 보유)
+        
+        매핑된 벡터 저장소는 크기를 바꿀 수 없고, 바꾸려 하면 FAISS가 프로세스를
+        중단시키므로 추가/초기화/컴팩션 전에 반드시 호출해야 한다.
+        """
+        if not self.index_mmapped:
+            return
+        
+        logger.info("메모리 매핑된 인덱스를 쓰기 가능한 복사본으로 전환")
+        self.index = faiss.deserialize_index(faiss.serialize_index(self.index))
+        self.index_mmapped = False
+        self._generation += 1
+    
+    def _migrate_json_sidecar(self, load_path: Path) -> None:
+        """
+        이전 형식 JSON 사이드카를 SQLite 메타데이터 저장소로 변환
+        
+        원래 JSON은 '.json.bak'으로 남기며, 실패하면 메모리의 메타데이터로 계속 동작한다.
+        """
+        metadata_path = load_path.with_suffix('.json')
+        backup_path = metadata_path.with_name(metadata_path.name + '.bak')
+        
+        try:
+            with self._lock:
+                self.metadata.save(load_path.with_suffix('.metadb'))
+                if not backup_path.exists():
+                    shutil.copy2(metadata_path, backup_path)
+                self._write_header(load_path)
+            logger.info(f"JSON 메타데이터를 SQLite 저장소로 변환했습니다: {load_path.with_suffix('.metadb')} "
+                        f"(원본: {backup_path})")
+        except Exception as e:
+            logger.warning(f"메타데이터 저장소 변환 실패, JSON 메타데이터로 계속 진행합니다: {e}")
+    
+    @staticmethod
+    def _legacy_external_ids(metadata: List[Dict[str, Any]]) -> List[str]:
+        """외부 ID 없이 저장된 인덱스용 ID (메타데이터 'id'가 모두 고유하면 사용, 아니면 행 번호)"""
+        ids = [str(meta.get('id')) if meta.get('id') is not None else None for meta in metadata]
+        if None not in ids and len(set(ids)) == len(ids):
+            return ids
+        return [str(label) for label in range(len(metadata))]
     
     def get_index_stats(self) -> Dict[str, Any]:
         """
@@ -285,54 +1022,347 @@ class VectorDatabase:
                 'index_type': None
             }
         
+        base_index = self._base_index()
         stats = {
             'status': 'ready',
             'total_vectors': self.index.ntotal,
-            'index_type': type(self.index).__name__,
+            'index_type': type(base_index).__name__,
             'is_trained': self.is_trained,
-            'metadata_count': len(self.metadata)
+            'mmap': self.index_mmapped,
+            'memory_mb': self.memory_bytes() / 1024 / 1024,
+            'metadata_count': len(self.metadata),
+            'metadata_store': self.metadata.get_stats(),
+            'filter_index': self.filter_index.get_stats(),
+            'live_vectors': self.live_count,
+            'deleted_vectors': self.deleted_count,
+            'tombstone_ratio': self.tombstone_ratio,
+            'compaction_running': self.compaction_running,
+            'projection': self.projection.get_info() if self.projection else None,
+            'snapshot_version': self.snapshot_version,
+            'index_kind': index_kind(self.index),
+            'auto_migrate': self.auto_migrate,
+            'search_latency_ms': self.search_latency_ms,
+            'search_latency_by_spec': dict(self.search_latency_by_spec),
+            'migration_running': self.migration_running,
+            'last_migration': self.last_migration
         }
         
-        # IVF 인덱스 특별 정보
-        if hasattr(self.index, 'nlist'):
-            stats['nlist'] = self.index.nlist
-            stats['nprobe'] = self.index.nprobe
+        # 벡터당 코드 크기 (압축/재순위 인덱스 비교용)
+        try:
+            stats['code_size_bytes'] = base_index.sa_code_size()
+        except RuntimeError:
+            pass
+        
+        # IVF 인덱스 특별 정보 (OPQ/재순위로 감싼 경우 포함)
+        ivf_index = self._ivf_index()
+        if ivf_index is not None:
+            stats['nlist'] = ivf_index.nlist
+            stats['nprobe'] = ivf_index.nprobe
+        if self.tuning:
+            stats['tuned_recall'] = self.tuning['recall']
+            stats['target_recall'] = self.tuning.get('target_recall')
+        
+        # 재순위 정보
+        if isinstance(base_index, faiss.IndexRefine):
+            stats['rerank_factor'] = base_index.k_factor
         
         # HNSW 인덱스 특별 정보
-        if hasattr(self.index, 'hnsw'):
-            stats['ef_construction'] = self.index.hnsw.efConstruction
-            stats['ef_search'] = self.index.hnsw.efSearch
+        if hasattr(base_index, 'hnsw'):
+            stats['ef_construction'] = base_index.hnsw.efConstruction
+            stats['ef_search'] = base_index.hnsw.efSearch
         
         return stats
     
     def clear_index(self) -> None:
         """인덱스 초기화"""
         if self.index:
-            self.index.reset()
-            self.metadata = []
-            self.is_trained = False
+            with self._lock:
+                self._ensure_writable()
+                self.index.reset()
+                self._reset_state()
             logger.info("인덱스 초기화 완료")
     
     def delete_vectors(self, indices: List[int]) -> None:
         """
-        특정 벡터 삭제 (제한적 지원)
+        라벨로 벡터 삭제 (톰스톤 표시, 외부 ID로 삭제할 때는 delete 사용)
+        
+        Args:
+            indices: 삭제할 벡터의 라벨 리스트
+        """
+        with self._lock:
+            deleted = self._mark_deleted([int(label) for label in indices])
+        
+        logger.info(f"벡터 삭제 완료: {deleted}개")
+        self._maybe_compact()
+    
+    def _maybe_compact(self) -> None:
+        """톰스톤 비율이 임계값을 넘으면 백그라운드 컴팩션 시작"""
+        if self.compaction_threshold is None or self.tombstone_ratio <= self.compaction_threshold:
+            return
+        if self._compaction_thread is not None and self._compaction_thread.is_alive():
+            return
+        
+        logger.info(f"톰스톤 비율 {self.tombstone_ratio:.1%} > {self.compaction_threshold:.0%}: 백그라운드 컴팩션 시작")
+        self.compact(background=True)
+    
+    def compact(self, background: bool = False) -> bool:
+        """
+        톰스톤 표시된 벡터를 물리적으로 제거하여 인덱스 재구성
+        
+        살아 있는 벡터를 새 인덱스로 옮기고 라벨을 0부터 다시 매긴 뒤 lock 안에서
+        한 번에 교체한다. 재구성 중에 추가/삭제가 일어나면 교체하지 않는다.
         
         Args:
-            indices: 삭제할 벡터의 인덱스 리스트
+            background: True이면 데몬 스레드에서 실행하고 바로 반환
+        
+        Returns:
+            교체 성공 여부 (background이면 스레드 시작 여부)
         """
-        if not hasattr(self.index, 'remove_ids'):
-            logger.warning("이 인덱스 타입은 벡터 삭제를 지원하지 않습니다.")
+        if background:
+            self._compaction_thread = threading.Thread(target=self.compact, name="faiss-compaction", daemon=True)
+            self._compaction_thread.start()
+            return True
+        
+        try:
+            return self._compact()
+        except Exception as e:
+            logger.error(f"❌ 인덱스 컴팩션 실패: {e}")
+            return False
+    
+    def _compact(self) -> bool:
+        """compact 본체"""
+        with self._lock:
+            if self.index is None or self.deleted_count == 0:
+                return False
+            
+            self._ensure_writable()
+            generation = self._generation
+            index = self.index
+            alive = ~self.tombstones
+            
+            # 저장된 벡터 복원 (이미 투영/정규화된 상태, 행 순서 -> 라벨 매핑 포함)
+            base_index = self._base_index()
+            ivf_index = self._ivf_index()
+            if ivf_index is not None:
+                ivf_index.make_direct_map()
+            vectors = base_index.reconstruct_n(0, base_index.ntotal)
+            if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+                row_labels = faiss.vector_to_array(index.id_map)
+            else:
+                row_labels = np.arange(index.ntotal, dtype=np.int64)
+            
+            metadata = self.metadata
+            filter_index = self.filter_index
+            external_ids = self.external_ids
+        
+        # 새 인덱스 구축은 lock 밖에서 (그동안 검색/변경 계속 가능)
+        keep = alive[row_labels]
+        live_labels = row_labels[keep]
+        order = np.argsort(live_labels, kind='stable')
+        live_labels = live_labels[order]
+        live_vectors = np.ascontiguousarray(vectors[keep][order])
+        
+        new_base = faiss.clone_index(base_index)
+        new_base.reset()
+        new_index = faiss.IndexIDMap2(new_base)
+        if len(live_vectors):
+            new_index.add_with_ids(live_vectors, np.arange(len(live_vectors), dtype=np.int64))
+        
+        new_metadata = metadata.take(live_labels.tolist())
+        new_filter_index = filter_index.take(live_labels)
+        new_external_ids = [external_ids[label] for label in live_labels.tolist()]
+        removed = index.ntotal - len(live_vectors)
+        
+        with self._lock:
+            if self._generation != generation:
+                logger.info("컴팩션 중 인덱스가 변경되어 교체를 건너뜁니다.")
+                return False
+            
+            self.index = new_index
+            self.metadata = new_metadata
+            self.filter_index = new_filter_index
+            self.external_ids = new_external_ids
+            self.id_to_label = {external_id: label for label, external_id in enumerate(new_external_ids)}
+            new_label_of = {old_label: new_label for new_label, old_label in enumerate(live_labels.tolist())}
+            self.duplicate_of = {member_id: new_label_of[label] for member_id, label in self.duplicate_of.items()
+                                 if label in new_label_of}
+            self.tombstones = np.zeros(len(new_metadata), dtype=bool)
+            self.deleted_count = 0
+            self._generation += 1
+        
+        logger.info(f"인덱스 컴팩션 완료: {removed}개 제거, {len(new_metadata)}개 유지")
+        return True
+    
+    def migration_target(self) -> Optional[str]:
+        """현재 벡터 수와 검색 지연 시간 기준으로 옮겨 갈 인덱스 타입 (없으면 None)"""
+        if self.index is None or self.live_count == 0:
+            return None
+        ivf_index = self._ivf_index()
+        return migration_target(index_kind(self.index), self.live_count,
+                                nlist=ivf_index.nlist if ivf_index is not None else None,
+                                latency_ms=self.search_latency_ms,
+                                latency_budget_ms=self.latency_budget_ms)
+    
+    def _maybe_migrate(self) -> None:
+        """자동 마이그레이션이 켜져 있고 기준을 넘었으면 백그라운드 재구축 시작"""
+        if not self.auto_migrate or self.live_count < self._migration_retry_at or self.migration_running:
             return
         
-        # FAISS 인덱스에서 벡터 삭제
-        self.index.remove_ids(np.array(indices))
+        # 동시에 들어온 검색/추가가 재구축을 중복 시작하지 않도록 확인과 시작을 lock 안에서
+        with self._lock:
+            if self.migration_running:
+                return
+            target = self.migration_target()
+            if target is None:
+                return
+            
+            logger.info(f"인덱스 마이그레이션 기준 도달: {index_kind(self.index)} -> {target} "
+                        f"({self.live_count}개 벡터, 질문당 {self.search_latency_ms or 0:.2f}ms)")
+            self.migrate(target, background=True)
+    
+    def migrate(self, index_type: Optional[str] = None, background: bool = False) -> bool:
+        """
+        저장된 벡터로 다른 타입의 인덱스를 새로 구축해 교체
+        
+        라벨, 메타데이터, 톰스톤은 그대로 두고 FAISS 인덱스만 바꾼다. 구축하는 동안
+        검색은 기존 인덱스로 계속 처리되고, 그 사이 추가된 벡터는 교체 직전에 lock 안에서
+        새 인덱스에 따라 넣는다. 이전 인덱스가 IVF이면 그 중심으로 k-means를 시작한다
+        (warm start). 구축 중에 컴팩션/재생성/로드로 인덱스가 바뀌면 교체하지 않는다.
+        
+        Args:
+            index_type: 새 인덱스 타입 (None이면 migration_target 결과)
+            background: True이면 데몬 스레드에서 실행하고 바로 반환
+        
+        Returns:
+            교체 성공 여부 (background이면 스레드 시작 여부, 이미 진행 중이면 False)
+        """
+        if background:
+            with self._lock:
+                if self.migration_running:
+                    logger.info("인덱스 마이그레이션이 이미 진행 중입니다.")
+                    return False
+                self._migration_thread = threading.Thread(target=self.migrate, args=(index_type,),
+                                                          name="faiss-migration", daemon=True)
+                self._migration_thread.start()
+            return True
+        
+        try:
+            return self._migrate(index_type)
+        except Exception as e:
+            # 같은 기준에서 계속 실패하지 않도록 벡터 수가 두 배가 될 때까지 자동 재시도 보류
+            self._migration_retry_at = 2 * self.live_count
+            logger.error(f"❌ 인덱스 마이그레이션 실패: {e}")
+            return False
+    
+    def _migrate(self, index_type: Optional[str]) -> bool:
+        """migrate 본체"""
+        start_time = time.perf_counter()
+        
+        with self._lock:
+            if self.index is None or self.index.ntotal == 0:
+                return False
+            index_type = index_type or self.migration_target()
+            if index_type is None:
+                return False
+            
+            index = self.index
+            source_kind = index_kind(index)
+            base_index = self._base_index()
+            ivf_index = self._ivf_index()
+            previous_centroids = None
+            pq_m = None  # PQ 코드 크기는 이전 인덱스와 같게 유지
+            if ivf_index is not None:
+                ivf_index.make_direct_map()  # 복원용 (이후 추가분도 따라잡을 수 있도록 유지)
+                previous_centroids = faiss.downcast_index(ivf_index.quantizer).reconstruct_n(0, ivf_index.nlist)
+                if hasattr(faiss.downcast_index(ivf_index), 'pq'):
+                    pq_m = faiss.downcast_index(ivf_index).pq.M
+            
+            # 저장된 벡터 복원 (이미 투영/정규화된 상태)
+            built = index.ntotal
+            vectors = base_index.reconstruct_n(0, built)
+            if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+                row_labels = faiss.vector_to_array(index.id_map).copy()
+            else:
+                row_labels = np.arange(built, dtype=np.int64)
+            alive = ~self.tombstones[row_labels]
+        
+        # 새 인덱스 구축과 학습/튜닝은 lock 밖에서 (그동안 검색은 기존 인덱스로)
+        live_vectors = np.ascontiguousarray(vectors[alive])
+        new_base = self._build_base_index(index_type, index.d, len(live_vectors), pq_m)
+        if new_base.metric_type != index.metric_type:
+            # 점수 의미(유사도/거리)와 임계값이 바뀌므로 거리 척도가 다른 인덱스로는 옮기지 않음
+            raise ValueError(f"거리 척도가 다른 인덱스로는 마이그레이션할 수 없습니다: {index_type}")
+        new_index = faiss.IndexIDMap2(new_base)
+        new_ivf = ivf_of(new_base)
+        
+        needs_training = not new_index.is_trained
+        warm_start = False
+        if needs_training:
+            # 학습 샘플 크기는 IVF 클러스터 수와 PQ 코드북 크기 중 큰 값 기준 (_training_centroids와 같음)
+            centroids = new_ivf.nlist if new_ivf is not None else 1
+            if new_ivf is not None and hasattr(faiss.downcast_index(new_ivf), 'pq'):
+                centroids = max(centroids, 1 << PQ_NBITS)
+            sample = training_sample(live_vectors, centroids)
+            logger.info(f"마이그레이션 인덱스 훈련 중... (학습 벡터 {len(sample)}개)")
+            warm_start = train_ivf(new_base, sample, previous_centroids)
+        new_index.add_with_ids(vectors, row_labels)
+        
+        tuning = None
+        if new_ivf is not None and self.target_recall is not None and len(live_vectors) > 10:
+            tuning = self._tune_migrated(new_index, new_ivf, vectors, row_labels, alive)
+        
+        with self._lock:
+            if self.index is not index:
+                logger.info("마이그레이션 중 인덱스가 교체되어 (컴팩션/재생성/로드) 결과를 버립니다.")
+                return False
+            
+            # 구축 중에 추가된 벡터 따라잡기
+            if index.ntotal > built:
+                extra = base_index.reconstruct_n(built, index.ntotal - built)
+                if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+                    extra_labels = faiss.vector_to_array(index.id_map)[built:].copy()
+                else:
+                    extra_labels = np.arange(built, index.ntotal, dtype=np.int64)
+                new_index.add_with_ids(extra, extra_labels)
+            
+            self.index = new_index
+            self.index_mmapped = False
+            self.is_trained = needs_training
+            self.tuning = tuning
+            self.search_latency_ms = None  # 새 인덱스 기준으로 다시 측정
+            self.search_latency_by_spec = {}
+            self._generation += 1
+            self.last_migration = {
+                'from': source_kind,
+                'to': index_type,
+                'vectors': self.index.ntotal,
+                'caught_up': self.index.ntotal - built,
+                'warm_start': warm_start,
+                'seconds': time.perf_counter() - start_time
+            }
+        
+        logger.info(f"✅ 인덱스 마이그레이션 완료: {source_kind} -> {index_type} "
+                    f"({self.last_migration['vectors']}개, warm start {warm_start}, "
+                    f"{self.last_migration['seconds']:.1f}초)")
+        return True
+    
+    def _tune_migrated(self, index, ivf_index, vectors: np.ndarray, row_labels: np.ndarray,
+                       alive: np.ndarray, k: int = 10, num_queries: int = 256, seed: int = 0) -> Dict[str, Any]:
+        """마이그레이션으로 만든 IVF 인덱스의 nprobe를 복원한 벡터의 정확 검색 정답으로 튜닝"""
+        rng = np.random.default_rng(seed)
+        live_rows = np.flatnonzero(alive)
+        rows = np.sort(rng.choice(live_rows, min(num_queries, len(live_rows)), replace=False))
+        queries = np.ascontiguousarray(vectors[rows])
+        exclude = row_labels[rows]
         
-        # 메타데이터에서도 삭제
-        for idx in sorted(indices, reverse=True):
-            if idx < len(self.metadata):
-                del self.metadata[idx]
+        # 정확 검색 정답 (자기 자신 제외, 라벨 공간)
+        _, truth_rows = faiss.knn(queries, vectors, k + 1, faiss.METRIC_INNER_PRODUCT)
+        truth = drop_own_labels(row_labels[truth_rows], k, exclude)
         
-        logger.info(f"벡터 삭제 완료: {len(indices)}개")
+        tuning = sweep_nprobe(index, ivf_index.nlist, queries, k=k,
+                              target_recall=self.target_recall, exclude=exclude, truth=truth)
+        ivf_index.nprobe = tuning['nprobe']
+        return tuning
     
     def get_supabase_migration_info(self) -> Dict[str, Any]:
         """
@@ -382,7 +1412,7 @@ class VectorDatabase:
         Returns:
             Supabase 호환 데이터 형식
         """
-        if not self.index or self.index.ntotal == 0:
+        if not self.index or self.live_count == 0:
             return {
                 'status': 'no_data',
                 'message': '내보낼 데이터가 없습니다.'
@@ -392,7 +1422,7 @@ class VectorDatabase:
         supabase_data = []
         
         for i, meta in enumerate(self.metadata):
-            if self.index:
+            if self.index and not self.tombstones[i]:
                 # 벡터 데이터 추출 (numpy array를 list로 변환)
                 vector_data = self.index.reconstruct(i).tolist()
                 
@@ -0,0 +1,155 @@
+"""
+벡터 차원 축소 - FAISS PCA / OPQ 투영
+
+샘플로 학습한 투영 행렬을 인덱스 옆에 저장해 두고, 벡터 추가와 검색,
+질문 임베딩 생성이 모두 같은 투영을 거치도록 한다.
+"""
+import json
+from pathlib import Path
+from typing import Dict, Any, Optional
+import numpy as np
+import faiss
+from loguru import logger
+
+
+SUPPORTED_METHODS = ("pca", "opq")
+
+
+class VectorProjection:
+    """학습된 차원 축소 투영 (입력 차원 -> 출력 차원)"""
+
+    def __init__(self,
+                 input_dim: int,
+                 output_dim: int,
+                 method: str = "pca",
+                 opq_subspaces: Optional[int] = None):
+        """
+        투영 초기화
+
+        Args:
+            input_dim: 원본 임베딩 차원
+            output_dim: 축소할 차원
+            method: 투영 방식 ("pca", "opq")
+            opq_subspaces: OPQ 부분 공간 수 (None이면 output_dim // 4, output_dim의 약수여야 함)
+        """
+        if method not in SUPPORTED_METHODS:
+            raise ValueError(f"지원하지 않는 투영 방식: {method} (지원: {SUPPORTED_METHODS})")
+        if not 0 < output_dim <= input_dim:
+            raise ValueError(f"출력 차원은 1 이상 {input_dim} 이하여야 합니다: {output_dim}")
+
+        self.input_dim = input_dim
+        self.output_dim = output_dim
+        self.method = method
+        self.opq_subspaces = opq_subspaces or max(1, output_dim // 4)
+        self.sample_size = 0
+
+        if method == "pca":
+            self.transform = faiss.PCAMatrix(input_dim, output_dim)
+        else:
+            if output_dim % self.opq_subspaces != 0:
+                raise ValueError(f"OPQ 부분 공간 수({self.opq_subspaces})가 출력 차원({output_dim})의 약수가 아닙니다.")
+            self.transform = faiss.OPQMatrix(input_dim, self.opq_subspaces, output_dim)
+
+    @property
+    def is_trained(self) -> bool:
+        """투영 행렬 학습 여부"""
+        return bool(self.transform.is_trained)
+
+    def train(self, sample: np.ndarray) -> None:
+        """
+        샘플 벡터로 투영 행렬 학습
+
+        Args:
+            sample: (N x input_dim) 학습용 임베딩 (N은 output_dim 이상 권장)
+        """
+        sample = self._normalized(sample, self.input_dim)
+        if len(sample) < self.output_dim:
+            logger.warning(f"투영 학습 샘플({len(sample)}개)이 출력 차원({self.output_dim})보다 적습니다.")
+
+        logger.info(f"{self.method.upper()} 투영 학습: {self.input_dim} -> {self.output_dim}차원, 샘플 {len(sample)}개")
+        self.transform.train(sample)
+        self.sample_size = len(sample)
+
+    def apply(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        벡터 투영 (입력과 출력 모두 L2 정규화)
+
+        Args:
+            vectors: (N x input_dim) 또는 (input_dim,) 벡터
+
+        Returns:
+            (N x output_dim) 투영된 float32 벡터
+        """
+        if not self.is_trained:
+            raise ValueError("투영 행렬이 학습되지 않았습니다. train()을 먼저 호출하세요.")
+
+        projected = self.transform.apply(self._normalized(vectors, self.input_dim))
+        faiss.normalize_L2(projected)
+        return projected
+
+    def explained_variance_ratio(self) -> Optional[float]:
+        """PCA가 보존하는 분산 비율 (OPQ는 None)"""
+        if self.method != "pca" or not self.is_trained:
+            return None
+
+        eigenvalues = faiss.vector_to_array(self.transform.eigenvalues)
+        total = eigenvalues.sum()
+        return float(eigenvalues[:self.output_dim].sum() / total) if total > 0 else None
+
+    @staticmethod
+    def _normalized(vectors: np.ndarray, dim: int) -> np.ndarray:
+        """float32 2차원 사본으로 변환 후 L2 정규화 (원본은 수정하지 않음)"""
+        vectors = np.array(vectors, dtype=np.float32).reshape(-1, dim)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def get_info(self) -> Dict[str, Any]:
+        """투영 설정 정보 반환"""
+        return {
+            'method': self.method,
+            'input_dim': self.input_dim,
+            'output_dim': self.output_dim,
+            'opq_subspaces': self.opq_subspaces if self.method == "opq" else None,
+            'sample_size': self.sample_size,
+            'explained_variance_ratio': self.explained_variance_ratio()
+        }
+
+    def save(self, save_path: str) -> None:
+        """
+        투영 행렬(.projection)과 설정(.projection.json) 저장
+
+        Args:
+            save_path: 저장 경로 (확장자는 자동으로 붙음)
+        """
+        save_path = Path(save_path)
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+
+        faiss.write_VectorTransform(self.transform, str(save_path.with_suffix('.projection')))
+        with open(save_path.with_suffix('.projection.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.get_info(), f, ensure_ascii=False, indent=2)
+
+    @classmethod
+    def load(cls, load_path: str) -> "VectorProjection":
+        """
+        저장된 투영 로드
+
+        Args:
+            load_path: save()에 사용한 경로
+
+        Returns:
+            학습된 투영
+        """
+        load_path = Path(load_path)
+        with open(load_path.with_suffix('.projection.json'), 'r', encoding='utf-8') as f:
+            info = json.load(f)
+
+        projection = cls(info['input_dim'], info['output_dim'], info['method'], info.get('opq_subspaces'))
+        projection.transform = faiss.read_VectorTransform(str(load_path.with_suffix('.projection')))
+        projection.sample_size = info.get('sample_size', 0)
+        return projection
+
+    @staticmethod
+    def exists(load_path: str) -> bool:
+        """저장된 투영 파일 존재 여부"""
+        load_path = Path(load_path)
+        return load_path.with_suffix('.projection').exists() and load_path.with_suffix('.projection.json').exists()